@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from langchain_core.messages import ToolMessage
+from custom_logging.logging import logger
+
+
+class ExecutionBudget:
+    """
+    Latency limits for one agent request.
+
+    A request has an end-to-end deadline and a maximum number of chatbot (LLM) steps.
+    Each tool call gets its own timeout, cut short by the request deadline; a tool that
+    misses it is cancelled and answered with an error ToolMessage, so the LLM continues
+    with the results of the tools that did finish.
+
+    Cancelling a sync-only tool only stops waiting for it: the worker thread it runs in
+    finishes the call in the background.
+    """
+
+    def __init__(self, request_timeout_seconds: float = 60, max_iterations: int = 5,
+                 tool_timeout_seconds: float = 20, tool_timeouts: Optional[Dict[str, float]] = None):
+        self.request_timeout_seconds = request_timeout_seconds
+        self.max_iterations = max_iterations
+        self.tool_timeout_seconds = tool_timeout_seconds
+        self.tool_timeouts = dict(tool_timeouts or {})
+
+    @classmethod
+    def from_config(cls, agent_config: dict) -> "ExecutionBudget":
+        return cls(
+            request_timeout_seconds=agent_config.get("request_timeout_seconds", 60),
+            max_iterations=agent_config.get("max_iterations", 5),
+            tool_timeout_seconds=agent_config.get("tool_timeout_seconds", 20),
+            tool_timeouts=agent_config.get("tool_timeouts", {}),
+        )
+
+    def new_deadline(self) -> float:
+        return time.time() + self.request_timeout_seconds
+
+    def exhausted(self, deadline: float, iterations: int) -> bool:
+        """
+        True when the request may not start another tool-using LLM step.
+        """
+        return iterations > self.max_iterations or time.time() >= deadline
+
+    def tool_timeout(self, tool_name: str, deadline: Optional[float]) -> float:
+        timeout = self.tool_timeouts.get(tool_name, self.tool_timeout_seconds)
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.time())
+        return max(timeout, 0.0)
+
+    async def awrap_tool_call(self, request, execute):
+        """
+        ToolNode wrapper that runs one tool call under its timeout.
+        """
+        name = request.tool_call["name"]
+        timeout = self.tool_timeout(name, (request.state or {}).get("deadline"))
+        try:
+            return await asyncio.wait_for(execute(request), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Tool %s timed out after %.1fs", name, timeout)
+            return ToolMessage(
+                content=f"{name} did not finish within {timeout:.1f}s and was cancelled. "
+                        "Answer with the other results or say the information is unavailable.",
+                name=name,
+                tool_call_id=request.tool_call["id"],
+                status="error",
+            )
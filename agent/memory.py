@@ -0,0 +1,121 @@
+from typing import List, Optional, Sequence
+from langchain_core.messages import (
+    AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from utils.rate_limiter import llm_usage_tokens
+from custom_logging.logging import logger
+from custom_logging.metrics import LLM_SECONDS, record_llm_usage
+
+_SUMMARY_PROMPT = (
+    "Summarize the earlier part of a conversation between a user and a stock market assistant, "
+    "so the assistant can continue it. Keep tickers, figures, dates, conclusions and the user's "
+    "stated preferences; drop small talk. Reply with the summary only.\n\n"
+    "Summary so far:\n{summary}\n\nNew messages:\n{transcript}"
+)
+_TOOL_PREVIEW_CHARS = 500
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """
+    Group messages into turns, each starting at a user message.
+    """
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _transcript(messages: Sequence[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {message.content}")
+        elif isinstance(message, ToolMessage):
+            lines.append(f"Tool {message.name}: {str(message.content)[:_TOOL_PREVIEW_CHARS]}")
+        elif isinstance(message, AIMessage) and message.content:
+            lines.append(f"Assistant: {message.content}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Keeps a session's history bounded.
+
+    Once a thread has more than max_turns turns (or its history exceeds
+    summarize_token_threshold), the oldest turns are folded into a running summary and
+    removed from the checkpointed state, leaving keep_turns turns. Every LLM call then
+    sees the summary plus as much recent history as fits history_token_budget; the
+    current turn is always sent in full.
+    """
+
+    def __init__(self, max_turns: int = 12, keep_turns: int = 6, history_token_budget: int = 6000,
+                 summarize_token_threshold: int = 12000):
+        self.max_turns = max_turns
+        self.keep_turns = min(keep_turns, max_turns)
+        self.history_token_budget = history_token_budget
+        self.summarize_token_threshold = summarize_token_threshold
+
+    @classmethod
+    def from_config(cls, sessions_config: dict) -> Optional["ConversationMemory"]:
+        """
+        Build the memory policy from the sessions config section, or None when sessions are disabled.
+        """
+        if not sessions_config.get("enabled", False):
+            return None
+        return cls(
+            max_turns=sessions_config.get("max_turns", 12),
+            keep_turns=sessions_config.get("keep_turns", 6),
+            history_token_budget=sessions_config.get("history_token_budget", 6000),
+            summarize_token_threshold=sessions_config.get("summarize_token_threshold", 12000),
+        )
+
+    async def compact(self, messages: Sequence[BaseMessage], summary: str, llm, limiter=None) -> dict:
+        """
+        Return the state update that folds old turns into the summary, or {} when under the limits.
+        """
+        turns = split_turns(messages)
+        over_tokens = count_tokens_approximately(messages) > self.summarize_token_threshold
+        if len(turns) <= self.max_turns and not over_tokens:
+            return {}
+
+        # The current turn is never summarized
+        keep = max(1, self.keep_turns if len(turns) > self.max_turns else len(turns) // 2)
+        old = [message for turn in turns[:-keep] for message in turn]
+        if not old:
+            return {}
+
+        prompt = _SUMMARY_PROMPT.format(summary=summary or "(none)", transcript=_transcript(old))
+        request = [HumanMessage(content=prompt)]
+        with LLM_SECONDS.labels("summary").time():
+            if limiter is None:
+                result = await llm.ainvoke(request)
+            else:
+                result = await limiter.acall(llm.ainvoke, request, tokens=count_tokens_approximately(request),
+                                             usage=llm_usage_tokens, description="Session summary")
+        record_llm_usage(result, "summary")
+        new_summary = result.content if isinstance(result.content, str) else str(result.content)
+        logger.info("Summarized %d old messages (%d turns kept)", len(old), keep)
+        return {
+            "summary": new_summary,
+            "messages": [RemoveMessage(id=message.id) for message in old],
+        }
+
+    def prompt_messages(self, messages: Sequence[BaseMessage], summary: str) -> List[BaseMessage]:
+        """
+        Messages to send to the LLM: the summary, recent history within the token budget and the current turn.
+        """
+        last_question = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        history, current = list(messages[:last_question]), list(messages[last_question:])
+
+        budget = self.history_token_budget - count_tokens_approximately(current)
+        if history and budget > 0:
+            history = trim_messages(history, max_tokens=budget, token_counter=count_tokens_approximately,
+                                    strategy="last", start_on="human")
+        elif budget <= 0:
+            history = []
+
+        prefix = [SystemMessage(content=f"Summary of the earlier conversation:\n{summary}")] if summary else []
+        return prefix + history + current
@@ -0,0 +1,231 @@
+import asyncio
+import csv
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from langchain_core.messages import ToolMessage
+from vector_store.keyword_index import tokenize
+from custom_logging.logging import logger
+
+_WORD = re.compile(r"\$?[A-Za-z0-9][A-Za-z0-9&.'\-]*")
+_MAX_NAME_WORDS = 4
+
+
+def _normalize_word(word: str) -> str:
+    word = word.rstrip(".,'-")
+    if word.lower().endswith("'s"):
+        word = word[:-2]
+    return word.lower()
+
+
+class SymbolMatcher:
+    """
+    Finds tickers and company names in a question using a local symbol table.
+
+    Upper-case tickers ("NVDA") and cash-tagged tickers ("$V") match directly; single-letter
+    tickers only match when cash-tagged. Company names and aliases match case-insensitively
+    as whole-word phrases.
+    """
+
+    def __init__(self, symbols: Dict[str, List[str]]):
+        self.tickers = {ticker.upper() for ticker in symbols}
+        self._names = {}  # tuple of normalized words -> ticker
+        for ticker, names in symbols.items():
+            for name in names:
+                words = tuple(_normalize_word(w) for w in _WORD.findall(name))
+                if words:
+                    self._names[words] = ticker.upper()
+
+    @classmethod
+    def from_csv(cls, path: str) -> "SymbolMatcher":
+        """
+        Load a symbol table with ticker, name and "|"-separated aliases columns.
+        """
+        symbols = {}
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                aliases = [alias for alias in (row.get("aliases") or "").split("|") if alias]
+                symbols[row["ticker"]] = [row["name"], *aliases]
+        logger.info("Loaded %d symbols from %s", len(symbols), path)
+        return cls(symbols)
+
+    def match(self, text: str) -> List[str]:
+        """
+        Tickers mentioned in the text, in order of first mention.
+        """
+        found = []
+        words = _WORD.findall(text)
+        normalized = [_normalize_word(word) for word in words]
+        for i, word in enumerate(words):
+            candidate = word.lstrip("$").rstrip(".,'")
+            if candidate.endswith("'s"):
+                candidate = candidate[:-2]
+            tagged = word.startswith("$")
+            if candidate.upper() in self.tickers and (tagged or (candidate.isupper() and len(candidate) > 1)):
+                found.append(candidate.upper())
+                continue
+            for length in range(min(_MAX_NAME_WORDS, len(words) - i), 0, -1):
+                ticker = self._names.get(tuple(normalized[i:i + length]))
+                if ticker:
+                    found.append(ticker)
+                    break
+        return list(dict.fromkeys(found))
+
+
+def _consume_exception(task: asyncio.Task):
+    # Failures of prefetches nobody awaits are expected; keep asyncio from logging them
+    if not task.cancelled():
+        task.exception()
+
+
+class _Prefetch:
+    def __init__(self, tool_name: str, args: dict, task: asyncio.Task):
+        self.tool_name = tool_name
+        self.args = args
+        self.task = task
+        self.used = False
+
+
+class Prefetcher:
+    """
+    Speculatively starts the tool lookups a question is likely to need, so they run while
+    the first LLM call is still deciding which tools to call.
+
+    Polygon financials are prefetched for each ticker found by the SymbolMatcher and the
+    retriever for the question itself. When the LLM later requests a matching call (same
+    ticker, or a retriever question sharing enough words with the prefetched one), the tool
+    node uses the prefetched result. Prefetches never used by the end of the request are
+    cancelled and counted as wasted.
+    """
+
+    def __init__(self, tools, matcher: SymbolMatcher, max_tickers: int = 2, retrieval: bool = True,
+                 retrieval_match_threshold: float = 0.3, ttl_seconds: float = 120,
+                 financials_tool_name: str = "polygon_financials", retriever_tool_name: str = "retriever_tool"):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.matcher = matcher
+        self.max_tickers = max_tickers
+        self.retrieval = retrieval
+        self.retrieval_match_threshold = retrieval_match_threshold
+        self.ttl_seconds = ttl_seconds
+        self.financials_tool_name = financials_tool_name
+        self.retriever_tool_name = retriever_tool_name
+        self._requests: Dict[str, tuple] = {}  # prefetch id -> (started_at, [_Prefetch])
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "started": 0, "used": 0, "wasted": 0, "failed": 0}
+
+    @classmethod
+    def from_config(cls, prefetch_config: dict, tools) -> Optional["Prefetcher"]:
+        """
+        Build a prefetcher from the prefetch config section, or None when it is disabled.
+        """
+        if not prefetch_config.get("enabled", False):
+            return None
+        return cls(
+            tools,
+            SymbolMatcher.from_csv(prefetch_config.get("symbols_path", "config/symbols.csv")),
+            max_tickers=prefetch_config.get("max_tickers", 2),
+            retrieval=prefetch_config.get("retrieval", True),
+            retrieval_match_threshold=prefetch_config.get("retrieval_match_threshold", 0.3),
+            ttl_seconds=prefetch_config.get("ttl_seconds", 120),
+        )
+
+    def _plan(self, question: str) -> List[tuple]:
+        calls = []
+        if self.financials_tool_name in self.tools_by_name:
+            tickers = self.matcher.match(question)[:self.max_tickers]
+            calls.extend((self.financials_tool_name, {"query": ticker}) for ticker in tickers)
+        if self.retrieval and self.retriever_tool_name in self.tools_by_name:
+            calls.append((self.retriever_tool_name, {"question": question}))
+        return calls
+
+    def start(self, question: str) -> Optional[str]:
+        """
+        Start the likely lookups for a question on the running event loop; returns the prefetch id.
+        """
+        self._expire()
+        calls = self._plan(question)
+        if not calls:
+            return None
+
+        prefetch_id = uuid.uuid4().hex
+        prefetches = []
+        for tool_name, args in calls:
+            tool_call = {"type": "tool_call", "name": tool_name, "args": args, "id": f"prefetch_{prefetch_id}"}
+            task = asyncio.create_task(self.tools_by_name[tool_name].ainvoke(tool_call))
+            task.add_done_callback(_consume_exception)
+            prefetches.append(_Prefetch(tool_name, args, task))
+        with self._lock:
+            self._requests[prefetch_id] = (time.monotonic(), prefetches)
+            self._counters["requests"] += 1
+            self._counters["started"] += len(prefetches)
+        logger.info("Prefetching %s", [(p.tool_name, p.args) for p in prefetches])
+        return prefetch_id
+
+    def _matches(self, prefetch: _Prefetch, tool_name: str, args: dict) -> bool:
+        if prefetch.used or prefetch.tool_name != tool_name:
+            return False
+        if tool_name == self.financials_tool_name:
+            return str(args.get("query", "")).strip().upper() == prefetch.args["query"]
+        wanted, prefetched = set(tokenize(str(args.get("question", "")))), set(tokenize(prefetch.args["question"]))
+        if not wanted or not prefetched:
+            return False
+        return len(wanted & prefetched) / len(wanted | prefetched) >= self.retrieval_match_threshold
+
+    def _take(self, prefetch_id: Optional[str], tool_name: str, args: dict) -> Optional[_Prefetch]:
+        with self._lock:
+            _, prefetches = self._requests.get(prefetch_id, (None, []))
+            for prefetch in prefetches:
+                if self._matches(prefetch, tool_name, args):
+                    prefetch.used = True
+                    return prefetch
+        return None
+
+    async def awrap_tool_call(self, request, execute):
+        """
+        ToolNode wrapper that answers a tool call from a matching prefetch when there is one.
+        """
+        call = request.tool_call
+        prefetch = self._take((request.state or {}).get("prefetch_id"), call["name"], call["args"])
+        if prefetch is None:
+            return await execute(request)
+        try:
+            message = await asyncio.shield(prefetch.task)
+        except Exception as e:
+            logger.warning("Prefetched %s failed, calling it again: %s", call["name"], str(e))
+            with self._lock:
+                self._counters["failed"] += 1
+            return await execute(request)
+        with self._lock:
+            self._counters["used"] += 1
+        if isinstance(message, ToolMessage):
+            return message.model_copy(update={"tool_call_id": call["id"]})
+        return ToolMessage(content=str(message), name=call["name"], tool_call_id=call["id"])
+
+    def finish(self, prefetch_id: Optional[str]):
+        """
+        End a request: cancel its unused prefetches and count them as wasted.
+        """
+        with self._lock:
+            _, prefetches = self._requests.pop(prefetch_id, (None, []))
+            unused = [prefetch for prefetch in prefetches if not prefetch.used]
+            self._counters["wasted"] += len(unused)
+        for prefetch in unused:
+            prefetch.task.cancel()
+
+    def _expire(self):
+        # Requests that ended without finish() (errors, disconnects) are dropped after the TTL
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (started, _) in self._requests.items() if now - started > self.ttl_seconds]
+        for key in expired:
+            self.finish(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["pending_requests"] = len(self._requests)
+        settled = counters["used"] + counters["wasted"]
+        counters["waste_rate"] = round(counters["wasted"] / settled, 4) if settled else 0.0
+        return counters
@@ -0,0 +1,128 @@
+import threading
+from agent.workflow import GraphBuilder
+from toolkit.tools import reset_changed_tools
+from utils.config_loader import load_config
+from custom_logging.logging import logger
+
+# Config sections read once at application startup; changing them needs a restart
+_STARTUP_SECTIONS = ("metrics", "runtime", "sessions", "answer_cache", "jobs")
+
+
+class AgentRuntime:
+    """
+    Application-lifespan owner of the compiled agent graph.
+
+    The LLM client, the tools and the compiled graph are built once and shared by every
+    request. A compiled graph holds no per-request state, so concurrent requests can
+    invoke it safely; with a checkpointer, conversation state is kept per thread_id in the
+    checkpointer rather than in the graph. Reloading rebuilds the tools whose config changed,
+    then builds a new graph and swaps it in atomically; requests already running keep the
+    graph and tools they started with.
+    """
+
+    def __init__(self, graph_builder_factory=GraphBuilder, config_loader=load_config, checkpointer=None,
+                 tool_resetter=reset_changed_tools):
+        self._graph_builder_factory = graph_builder_factory
+        self._config_loader = config_loader
+        self._tool_resetter = tool_resetter
+        self._checkpointer = checkpointer
+        self._lock = threading.Lock()
+        self._graph_service = None
+        self._graph = None
+        self._config = None
+        self._warm_up_hooks = []
+
+    def start(self):
+        """
+        Build the graph if it has not been built yet.
+        """
+        with self._lock:
+            if self._graph is None:
+                self._swap(*self._build())
+        return self
+
+    def _build(self):
+        """
+        Build a new graph service together with the config snapshot it was built from.
+        """
+        logger.info("Building shared agent runtime...")
+        config = self._config_loader()
+        graph_service = self._graph_builder_factory()
+        graph_service.build(checkpointer=self._checkpointer)
+        return graph_service, config
+
+    def _swap(self, graph_service, config):
+        self._graph_service = graph_service
+        self._graph = graph_service.get_graph()
+        self._config = config
+        logger.info("Shared agent runtime is ready.")
+
+    @property
+    def graph(self):
+        """
+        Returns the shared compiled graph, building it on first access.
+        """
+        graph = self._graph
+        if graph is None:
+            self.start()
+            graph = self._graph
+        return graph
+
+    @property
+    def graph_service(self):
+        self.start()
+        return self._graph_service
+
+    def add_warm_up_hook(self, hook):
+        """
+        Register a callable run by warm_up(), e.g. to open connections before the first request.
+        """
+        self._warm_up_hooks.append(hook)
+
+    def warm_up(self):
+        """
+        Build the graph and run the registered warm-up hooks. Hook failures are logged, not raised.
+        """
+        self.start()
+        self._run_warm_up_hooks()
+        logger.info("Agent runtime warm-up completed.")
+
+    def _run_warm_up_hooks(self):
+        for hook in self._warm_up_hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.warning("Warm-up hook %s failed: %s", getattr(hook, "__name__", hook), str(e))
+
+    def reload(self):
+        """
+        Rebuild the tools whose config sections changed and the graph, and swap the graph in.
+        """
+        reset = []
+        if self._config is not None:
+            new_config = self._config_loader()
+            reset = self._tool_resetter(self._config, new_config)
+            if reset:
+                logger.info("Rebuilding tools with changed config: %s", reset)
+            startup_changed = [section for section in _STARTUP_SECTIONS
+                               if self._config.get(section) != new_config.get(section)]
+            if startup_changed:
+                logger.warning("Config sections %s changed; they only take effect after a restart.",
+                               startup_changed)
+        graph_service, config = self._build()
+        with self._lock:
+            self._swap(graph_service, config)
+        if reset:
+            # Open the rebuilt clients now rather than on the next request
+            self._run_warm_up_hooks()
+        logger.info("Agent runtime reloaded.")
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the runtime when config.yaml differs from the snapshot it was built from.
+        """
+        if self._config is not None and self._config_loader() == self._config:
+            return False
+        logger.info("Configuration change detected, reloading agent runtime.")
+        self.reload()
+        return True
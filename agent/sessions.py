@@ -0,0 +1,119 @@
+import os
+import time
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from custom_logging.logging import logger
+
+
+class SessionStore:
+    """
+    SQLite-backed conversation sessions keyed by thread id.
+
+    Owns the LangGraph checkpointer the agent graph is compiled with, keeps only the
+    latest checkpoint of each thread (older checkpoints are never read back), and records
+    when each thread was last active so idle sessions can be evicted.
+    """
+
+    def __init__(self, path: str, idle_ttl_seconds: float = 86400):
+        self.path = path
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.checkpointer = None
+        self._conn = None
+
+    @classmethod
+    def from_config(cls, sessions_config: dict) -> "SessionStore":
+        return cls(
+            path=sessions_config.get("store_path", "cache/sessions.sqlite"),
+            idle_ttl_seconds=sessions_config.get("idle_ttl_seconds", 86400),
+        )
+
+    async def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = await aiosqlite.connect(self.path)
+        self.checkpointer = AsyncSqliteSaver(self._conn)
+        await self.checkpointer.setup()
+        async with self.checkpointer.lock:
+            await self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions "
+                "(thread_id TEXT PRIMARY KEY, created_at REAL NOT NULL, last_active REAL NOT NULL, turns INTEGER NOT NULL)"
+            )
+            await self._conn.commit()
+        logger.info("Session store opened at %s", self.path)
+        return self
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def finish_turn(self, thread_id: str):
+        """
+        Record activity on a thread and drop all but its latest checkpoint.
+        """
+        now = time.time()
+        async with self.checkpointer.lock:
+            await self._conn.execute(
+                "INSERT INTO sessions (thread_id, created_at, last_active, turns) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(thread_id) DO UPDATE SET last_active = excluded.last_active, turns = turns + 1",
+                (thread_id, now, now),
+            )
+            latest = await (await self._conn.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+                "ORDER BY checkpoint_id DESC LIMIT 1", (thread_id,)
+            )).fetchone()
+            if latest is not None:
+                for table in ("checkpoints", "writes"):
+                    await self._conn.execute(
+                        f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id != ?", (thread_id, latest[0])
+                    )
+            await self._conn.commit()
+
+    async def delete(self, thread_id: str):
+        await self.checkpointer.adelete_thread(thread_id)
+        async with self.checkpointer.lock:
+            await self._conn.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+            await self._conn.commit()
+
+    async def evict_idle(self) -> int:
+        """
+        Delete sessions idle for longer than idle_ttl_seconds; returns how many were evicted.
+        """
+        cutoff = time.time() - self.idle_ttl_seconds
+        async with self.checkpointer.lock:
+            rows = await (await self._conn.execute(
+                "SELECT thread_id FROM sessions WHERE last_active < ?", (cutoff,)
+            )).fetchall()
+        for (thread_id,) in rows:
+            await self.delete(thread_id)
+        if rows:
+            logger.info("Evicted %d idle sessions", len(rows))
+        return len(rows)
+
+    async def session_bytes(self, thread_id: str) -> int:
+        """
+        Bytes of checkpoint data stored for one thread.
+        """
+        async with self.checkpointer.lock:
+            row = await (await self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?",
+                (thread_id,),
+            )).fetchone()
+            writes = await (await self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?", (thread_id,)
+            )).fetchone()
+        return row[0] + writes[0]
+
+    async def stats(self) -> dict:
+        async with self.checkpointer.lock:
+            sessions, turns = await (await self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(turns), 0) FROM sessions"
+            )).fetchone()
+            stored = await (await self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints"
+            )).fetchone()
+        return {
+            "sessions": sessions,
+            "turns": turns,
+            "checkpoint_bytes": stored[0],
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+        }
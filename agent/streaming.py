@@ -0,0 +1,118 @@
+import json
+import time
+from custom_logging.logging import logger
+from custom_logging.metrics import TTFT_SECONDS
+
+# Longest tool input/output preview sent to the client in tool events
+_PREVIEW_CHARS = 500
+
+
+def _sse(event: str, data: dict) -> str:
+    """
+    Format one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _chunk_text(chunk) -> str:
+    """
+    Extract the text of a streamed message chunk (content may be a string or a list of parts).
+    """
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def cached_answer_frame(answer: str, similarity: float) -> str:
+    """
+    The final event for an answer served from the answer cache.
+    """
+    return _sse("final", {"answer": answer, "metrics": {"cached": True, "similarity": round(similarity, 4)}})
+
+
+def batch_result_frame(index: int, question: str, result: dict) -> str:
+    """
+    One question's outcome in a /query/batch stream: a result event, or an error event when
+    result has an "error".
+    """
+    return _sse("error" if "error" in result else "result", {"index": index, "question": question, **result})
+
+
+def batch_done_frame(summary: dict) -> str:
+    """
+    The last event of a /query/batch stream.
+    """
+    return _sse("done", summary)
+
+
+async def stream_answer(graph, inputs: dict, config: dict = None, on_final=None):
+    """
+    Run the graph with astream_events and yield SSE frames as the answer is produced.
+    on_final, if given, is called with the graph's final output before the final event.
+
+    Events:
+        token       - an LLM token ({"content": ...})
+        tool_start  - a tool call began ({"name": ..., "input": ...})
+        tool_end    - a tool call finished ({"name": ..., "output": ...})
+        final       - the final answer plus timing metrics
+        error       - the run failed ({"error": ...})
+    """
+    start = time.perf_counter()
+    time_to_first_token = None
+    final_output = None
+
+    try:
+        async for event in graph.astream_events(inputs, config=config, version="v2"):
+            kind = event["event"]
+
+            if kind == "on_chat_model_stream":
+                # Only the chatbot node's LLM calls are answer text (not e.g. session summaries)
+                if event.get("metadata", {}).get("langgraph_node") != "chatbot":
+                    continue
+                text = _chunk_text(event["data"].get("chunk"))
+                if not text:
+                    continue
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - start
+                    logger.info("Time to first token: %.3fs", time_to_first_token)
+                    TTFT_SECONDS.labels().observe(time_to_first_token)
+                yield _sse("token", {"content": text})
+
+            elif kind == "on_tool_start":
+                yield _sse("tool_start", {
+                    "name": event["name"],
+                    "input": str(event["data"].get("input"))[:_PREVIEW_CHARS],
+                })
+
+            elif kind == "on_tool_end":
+                output = event["data"].get("output")
+                yield _sse("tool_end", {
+                    "name": event["name"],
+                    "output": str(getattr(output, "content", output))[:_PREVIEW_CHARS],
+                })
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                final_output = event["data"].get("output")
+
+        if isinstance(final_output, dict) and final_output.get("messages"):
+            answer = final_output["messages"][-1].content
+        else:
+            answer = str(final_output)
+
+        if on_final is not None:
+            on_final(final_output)
+
+        total = time.perf_counter() - start
+        logger.info("Streamed query completed in %.3fs", total)
+        yield _sse("final", {
+            "answer": answer,
+            "metrics": {
+                "time_to_first_token_ms": None if time_to_first_token is None else round(1000 * time_to_first_token, 1),
+                "total_ms": round(1000 * total, 1),
+            },
+        })
+
+    except Exception as e:
+        logger.error("Error during streamed query: %s", str(e), exc_info=True)
+        yield _sse("error", {"error": str(e)})
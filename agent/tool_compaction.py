@@ -0,0 +1,217 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from vector_store.keyword_index import tokenize
+from custom_logging.logging import logger
+
+# Fields holding passage text in tool results (Tavily, retriever) and fields kept as a passage header
+_TEXT_FIELDS = ("content", "page_content", "raw_content", "snippet", "text")
+_HEADER_FIELDS = ("title", "url", "source", "page")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_MAX_SENTENCE_WORDS = 60  # longer runs (tables, scraped text without punctuation) are cut into windows
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about four characters per token), good enough for budgeting.
+    """
+    return math.ceil(len(text) / 4)
+
+
+def _shingles(text: str) -> set:
+    """
+    Word trigrams of the text, compared with Jaccard similarity to find near-duplicates.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < 3:
+        return {tuple(tokens)}
+    return set(zip(tokens, tokens[1:], tokens[2:]))
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _split_sentences(text: str) -> List[str]:
+    sentences = []
+    for part in _SENTENCE.split(text):
+        words = part.split()
+        if len(words) <= _MAX_SENTENCE_WORDS:
+            sentences.append(" ".join(words))
+        else:
+            sentences.extend(" ".join(words[i:i + _MAX_SENTENCE_WORDS])
+                             for i in range(0, len(words), _MAX_SENTENCE_WORDS))
+    return [sentence for sentence in sentences if sentence]
+
+
+def _parse_passages(content) -> Optional[List[Tuple[str, str]]]:
+    """
+    Split a tool result into (header, text) passages, or return None when it is not a list of records.
+    """
+    if not isinstance(content, str):
+        return None
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return None
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        return None
+
+    passages = []
+    for item in data:
+        header = " | ".join(str(item[field]) for field in _HEADER_FIELDS if item.get(field))
+        metadata = item.get("metadata") if isinstance(item.get("metadata"), dict) else {}
+        header = header or " | ".join(str(metadata[field]) for field in _HEADER_FIELDS if metadata.get(field))
+        texts = [item[field] for field in _TEXT_FIELDS if isinstance(item.get(field), str) and item[field]]
+        # Records without a text field (e.g. Polygon financials) are kept whole
+        passages.append((header, "\n\n".join(texts) if texts else json.dumps(item, default=str)))
+    return passages
+
+
+class ToolOutputCompactor:
+    """
+    Shrinks the tool results of one agent turn before they enter graph state.
+
+    Tool results are split into passages; near-duplicate passages (within the turn) are
+    dropped, and the sentences most relevant to the question and tool arguments are kept
+    until the tool's token budget is used. When the turn's results together exceed the
+    turn budget, each tool's budget is scaled down proportionally.
+    """
+
+    def __init__(self, turn_token_budget: int = 4000, default_tool_token_budget: int = 2000,
+                 tool_token_budgets: Optional[Dict[str, int]] = None, dedup_threshold: float = 0.8):
+        self.turn_token_budget = turn_token_budget
+        self.default_tool_token_budget = default_tool_token_budget
+        self.tool_token_budgets = dict(tool_token_budgets or {})
+        self.dedup_threshold = dedup_threshold
+
+    @classmethod
+    def from_config(cls, compaction_config: dict) -> Optional["ToolOutputCompactor"]:
+        """
+        Build a compactor from the tool_compaction config section, or None when it is disabled.
+        """
+        if not compaction_config.get("enabled", False):
+            return None
+        return cls(
+            turn_token_budget=compaction_config.get("turn_token_budget", 4000),
+            default_tool_token_budget=compaction_config.get("default_tool_token_budget", 2000),
+            tool_token_budgets=compaction_config.get("tool_token_budgets", {}),
+            dedup_threshold=compaction_config.get("dedup_threshold", 0.8),
+        )
+
+    def _budgets(self, tool_messages: Sequence[ToolMessage]) -> List[int]:
+        budgets = [self.tool_token_budgets.get(m.name, self.default_tool_token_budget) for m in tool_messages]
+        total = sum(budgets)
+        if total > self.turn_token_budget:
+            budgets = [int(budget * self.turn_token_budget / total) for budget in budgets]
+        return budgets
+
+    @staticmethod
+    def _query_terms(history: Sequence[BaseMessage], tool_call_id: str) -> Counter:
+        """
+        Terms of the latest user question plus the arguments of the tool call that produced the result.
+        """
+        text = []
+        for message in reversed(history):
+            if isinstance(message, AIMessage):
+                for call in message.tool_calls:
+                    if call["id"] == tool_call_id:
+                        text.extend(str(value) for value in call["args"].values())
+            if isinstance(message, HumanMessage):
+                text.append(str(message.content))
+                break
+        return Counter(tokenize(" ".join(text)))
+
+    def _select(self, passages, query_terms: Counter, budget: int) -> str:
+        """
+        Keep the highest-scoring sentences of the passages within the budget, in their original order.
+        """
+        sentences = []  # (passage index, sentence index, text)
+        for p, (_, text) in enumerate(passages):
+            sentences.extend((p, s, sentence) for s, sentence in enumerate(_split_sentences(text)))
+
+        # Rarer query terms across this result count for more (idf over sentences)
+        sentence_terms = [set(tokenize(sentence)) for _, _, sentence in sentences]
+        document_frequency = Counter(term for terms in sentence_terms for term in terms)
+        weights = {t: math.log(1 + len(sentences) / document_frequency[t]) for t in query_terms if t in document_frequency}
+        scores = [sum(weight for t, weight in weights.items() if t in terms) for terms in sentence_terms]
+
+        ranked = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+        remaining = budget - sum(estimate_tokens(header) + 1 for header, _ in passages)
+        chosen = set()
+        for i in ranked:
+            cost = estimate_tokens(sentences[i][2]) + 1
+            if cost > remaining:
+                if remaining > 16 and not chosen:
+                    # Nothing fits yet: keep a truncated copy of the best sentence
+                    p, s, sentence = sentences[i]
+                    sentences[i] = (p, s, sentence[:4 * remaining] + " …")
+                    chosen.add(i)
+                    remaining = 0
+                continue
+            chosen.add(i)
+            remaining -= cost
+
+        by_passage: Dict[int, List[str]] = {}
+        for i in sorted(chosen):
+            by_passage.setdefault(sentences[i][0], []).append(sentences[i][2])
+        blocks = []
+        for p, (header, _) in enumerate(passages):
+            if p in by_passage:
+                body = " ".join(by_passage[p])
+                blocks.append(f"[{len(blocks) + 1}] {header}\n{body}" if header else f"[{len(blocks) + 1}] {body}")
+        return "\n\n".join(blocks)
+
+    def compact(self, history: Sequence[BaseMessage], tool_messages: Sequence[ToolMessage]) -> List[ToolMessage]:
+        """
+        Return compacted copies of the ToolMessages produced for the latest AI message.
+        """
+        budgets = self._budgets(tool_messages)
+        seen_shingles = []
+        compacted = []
+        tokens_before = tokens_after = 0
+
+        for message, budget in zip(tool_messages, budgets):
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+            tokens_before += estimate_tokens(content)
+            if message.status == "error":
+                compacted.append(message)
+                tokens_after += estimate_tokens(content)
+                continue
+
+            passages = _parse_passages(content)
+            if passages is None:
+                if estimate_tokens(content) <= budget:
+                    compacted.append(message)
+                    tokens_after += estimate_tokens(content)
+                    continue
+                passages = [("", content)]
+
+            unique = []
+            for header, text in passages:
+                shingles = _shingles(text)
+                if any(_jaccard(shingles, other) >= self.dedup_threshold for other in seen_shingles):
+                    continue
+                seen_shingles.append(shingles)
+                unique.append((header, text))
+
+            text = self._select(unique, self._query_terms(history, message.tool_call_id), budget)
+            if not passages:
+                text = text or content
+            elif not unique:
+                text = "No new results (duplicates of results already shown)."
+            elif not text:
+                # The passages were new, but the turn's token budget left no room for them
+                text = (f"Results truncated: {len(unique)} new passage(s) were left out because the "
+                        f"token budget for tool output in this turn was used up.")
+            tokens_after += estimate_tokens(text)
+            compacted.append(message.model_copy(update={"content": text}))
+
+        logger.info("Tool output compaction: %d -> %d estimated tokens across %d results",
+                    tokens_before, tokens_after, len(tool_messages))
+        return compacted
@@ -1,51 +1,196 @@
 from langgraph.graph import StateGraph, START
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt.tool_node import ToolNode, tools_condition
+import functools
+import time
 from langchain_core.messages import AIMessage, HumanMessage
-from typing_extensions import Annotated, TypedDict
-from utils.model_loader import ModelLoader
-from toolkit.tools import *
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.runnables import RunnableConfig
+from typing import Optional
+from typing_extensions import Annotated, NotRequired, TypedDict
+from agent.execution_budget import ExecutionBudget
+from agent.memory import ConversationMemory
+from agent.prefetch import Prefetcher
+from agent.tool_compaction import ToolOutputCompactor
+from utils.config_loader import load_config
+from utils.rate_limiter import get_rate_limiter, llm_usage_tokens
+from toolkit.tools import default_tools, registry as tool_registry
 from custom_logging.logging import logger
+from custom_logging.metrics import LLM_SECONDS, NODE_SECONDS, TOOL_SECONDS, record_llm_usage
 
-# Define the state for the graph, containing message history
+# Define the state for the graph, containing message history and the request's latency budget
 class State(TypedDict):
     messages: Annotated[list, add_messages]
+    deadline: NotRequired[float]  # epoch seconds by which the request must stop calling tools
+    iterations: NotRequired[int]  # chatbot steps taken for the current request
+    prefetch_id: NotRequired[Optional[str]]  # speculative tool lookups started for the current request
+    summary: NotRequired[str]  # summary of session turns dropped from messages
+
+# Sent (not stored) with the last LLM call once the budget is spent
+_BUDGET_EXHAUSTED_NOTE = (
+    "The time or step budget for tools is used up. Answer now using only the information above, "
+    "and say briefly if something could not be looked up."
+)
+
+def _timed_node(name: str):
+    """
+    Record the duration of a graph node in the agent_node_duration_seconds histogram.
+    """
+    def decorator(node):
+        histogram = NODE_SECONDS.labels(name)
+
+        @functools.wraps(node)
+        async def timed(*args, **kwargs):
+            with histogram.time():
+                return await node(*args, **kwargs)
+
+        return timed
+
+    return decorator
+
+
+async def _timed_llm_call(llm, messages, purpose: str, limiter=None, output_tokens: int = 0):
+    """
+    Call the LLM, recording its latency and token usage. With a rate limiter the call waits
+    for request and token budget (prompt plus output_tokens expected) and is retried on 429s.
+    """
+    with LLM_SECONDS.labels(purpose).time():
+        if limiter is None:
+            result = await llm.ainvoke(messages)
+        else:
+            result = await limiter.acall(
+                llm.ainvoke, messages, tokens=count_tokens_approximately(messages) + output_tokens,
+                usage=llm_usage_tokens, description=f"LLM call ({purpose})",
+            )
+    record_llm_usage(result, purpose)
+    return result
+
 
 class GraphBuilder:
-    def __init__(self):
-        # Initialize model loader and load base LLM
+    def __init__(self, llm=None, tools=None, config: dict = None):
+        # Initialize model loader and load base LLM (an already constructed LLM can be injected)
         logger.info("Initializing GraphBuilder...")
-        self.model_loader = ModelLoader()
-        self.llm = self.model_loader.load_llm()
+        if llm is None:
+            self.model_loader = tool_registry.get("model_loader")
+            llm = self.model_loader.load_llm()
+        self.llm = llm
         logger.info("LLM loaded successfully.")
 
         # Define tools for the agent to use
-        self.tools = [retriever_tool, financials_tool, tavilytool]
+        self.tools = tools if tools is not None else default_tools()
         logger.info("Tools loaded: %s", [tool.name for tool in self.tools])
 
         # Bind tools with LLM for reasoning + tool usage
         self.llm_with_tools = self.llm.bind_tools(tools=self.tools)
         logger.info("LLM successfully bound with tools.")
 
+        # Optional post-processing that shrinks tool results before they reach the LLM
+        self.config = config if config is not None else load_config()
+        self.compactor = ToolOutputCompactor.from_config(self.config.get("tool_compaction", {}))
+
+        # Per-tool timeouts, a request deadline and a cap on agent loop iterations
+        self.budget = ExecutionBudget.from_config(self.config.get("agent", {}))
+
+        # Optional speculative tool lookups that overlap with the first LLM call
+        self.prefetcher = Prefetcher.from_config(self.config.get("prefetch", {}), self.tools)
+        self.tool_node = ToolNode(tools=self.tools, awrap_tool_call=self._awrap_tool_call)
+
+        # History bounds for thread-id sessions (only used when compiled with a checkpointer)
+        self.memory = ConversationMemory.from_config(self.config.get("sessions", {}))
+
+        # Process-wide request/token budget shared with every other caller of the LLM provider
+        rate_limits = self.config.get("rate_limits", {})
+        self.llm_limiter = get_rate_limiter("groq", rate_limits)
+        self.expected_output_tokens = rate_limits.get("groq", {}).get("expected_output_tokens", 0)
+
         self.graph = None
 
-    def _chatbot_node(self, state: State):
+    def _llm_call(self, llm, messages, purpose: str):
+        return _timed_llm_call(llm, messages, purpose, self.llm_limiter, self.expected_output_tokens)
+
+    @_timed_node("chatbot")
+    async def _chatbot_node(self, state: State):
         """
         Chatbot node that processes the state and generates AI response.
         """
         logger.debug("Processing chatbot node with state: %s", state)
         try:
-            # Use the LLM with tools to generate a response
-            result = self.llm_with_tools.invoke(state["messages"])
+            # A new user message starts a new request with a fresh budget
+            if isinstance(state["messages"][-1], HumanMessage) or "deadline" not in state:
+                deadline, iterations = self.budget.new_deadline(), 1
+            else:
+                deadline, iterations = state["deadline"], state.get("iterations", 0) + 1
+
+            if self.budget.exhausted(deadline, iterations):
+                # Out of time or steps: answer from what has been gathered, without tools
+                logger.warning("Agent budget exhausted after %d steps; forcing a final answer.", iterations - 1)
+                result = await self._llm_call(
+                    self.llm, self._prompt(state) + [HumanMessage(content=_BUDGET_EXHAUSTED_NOTE)], "final_answer"
+                )
+                if getattr(result, "tool_calls", None):
+                    result = AIMessage(content=result.content, id=result.id)
+            else:
+                # Use the LLM with tools to generate a response without blocking the event loop
+                result = await self._llm_call(self.llm_with_tools, self._prompt(state), "agent")
+            if self.prefetcher is not None and not getattr(result, "tool_calls", None):
+                self.prefetcher.finish(state.get("prefetch_id"))
             logger.debug("Chatbot node response generated.")
-            return {"messages": [result]}
+            return {"messages": [result], "deadline": deadline, "iterations": iterations}
         except Exception as e:
             logger.exception("Error in chatbot node.")
             raise
 
-    def build(self):
+    def _prompt(self, state: State):
+        if self.memory is None:
+            return state["messages"]
+        return self.memory.prompt_messages(state["messages"], state.get("summary", ""))
+
+    @_timed_node("memory")
+    async def _memory_node(self, state: State):
+        """
+        Fold old session turns into the running summary once the history is over its limits.
+        """
+        return await self.memory.compact(state["messages"], state.get("summary", ""), self.llm, self.llm_limiter)
+
+    @_timed_node("prefetch")
+    async def _prefetch_node(self, state: State):
+        """
+        Start the likely tool lookups for the new question without waiting for them.
+        """
+        question = state["messages"][-1]
+        return {"prefetch_id": self.prefetcher.start(str(question.content))}
+
+    async def _awrap_tool_call(self, request, execute):
+        """
+        Run one tool call under its timeout, answering it from a prefetch when one matches.
+        """
+        if self.prefetcher is not None:
+            inner = execute
+
+            async def execute(req):
+                return await self.prefetcher.awrap_tool_call(req, inner)
+
+        start = time.perf_counter()
+        result = await self.budget.awrap_tool_call(request, execute)
+        TOOL_SECONDS.labels(request.tool_call["name"], getattr(result, "status", "success")).observe(
+            time.perf_counter() - start
+        )
+        return result
+
+    @_timed_node("tools")
+    async def _tools_node(self, state: State, config: RunnableConfig):
+        """
+        Tool node that runs the requested tools, then compacts their results.
+        """
+        result = await self.tool_node.ainvoke(state, config)
+        if self.compactor is None or not isinstance(result, dict):
+            return result  # compaction disabled, or tools returned Commands
+        return {"messages": self.compactor.compact(state["messages"], result["messages"])}
+
+    def build(self, checkpointer=None):
         """
-        Builds the LangGraph with conditional tool execution.
+        Builds the LangGraph with conditional tool execution. With a checkpointer, state is
+        kept per thread_id so follow-up questions see the conversation so far.
         """
         logger.info("Building graph...")
         graph_builder = StateGraph(State)
@@ -54,9 +199,10 @@ class GraphBuilder:
         graph_builder.add_node("chatbot", self._chatbot_node)
         logger.info("Chatbot node added to graph.")
 
-        # Add tool-handling node
-        tool_node = ToolNode(tools=self.tools)
-        graph_builder.add_node("tools", tool_node)
+        # Add tool-handling node; a step's tool calls run concurrently under their timeouts.
+        # Async tools are awaited, sync-only tools run in the event loop's default executor,
+        # which the application bounds at startup
+        graph_builder.add_node("tools", self._tools_node)
         logger.info("Tool node added to graph.")
 
         # Add conditional edge to call tools if needed
@@ -66,11 +212,20 @@ class GraphBuilder:
         # Return flow from tools to chatbot
         graph_builder.add_edge("tools", "chatbot")
 
-        # Define graph start point
-        graph_builder.add_edge(START, "chatbot")
+        # Define graph start point: optional session memory, then prefetch (which only starts
+        # lookups, so it adds no latency), then the chatbot
+        entry = []
+        if checkpointer is not None and self.memory is not None:
+            graph_builder.add_node("memory", self._memory_node)
+            entry.append("memory")
+        if self.prefetcher is not None:
+            graph_builder.add_node("prefetch", self._prefetch_node)
+            entry.append("prefetch")
+        for source, target in zip([START] + entry, entry + ["chatbot"]):
+            graph_builder.add_edge(source, target)
 
         # Compile graph
-        self.graph = graph_builder.compile()
+        self.graph = graph_builder.compile(checkpointer=checkpointer)
         logger.info("Graph successfully compiled.")
 
     def get_graph(self):
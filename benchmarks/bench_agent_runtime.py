@@ -0,0 +1,51 @@
+"""
+Compare building the agent graph per request against the shared AgentRuntime.
+
+Run from the repository root:
+    python -m benchmarks.bench_agent_runtime --requests 200
+"""
+import argparse
+import asyncio
+import time
+from agent.workflow import GraphBuilder
+from agent.runtime import AgentRuntime
+from benchmarks.stubs import StubChatModel, make_stub_tools
+
+
+def _question():
+    return {"messages": ["What is the outlook for NIFTY 50?"]}
+
+
+def per_request_build(n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        graph_service = GraphBuilder(llm=StubChatModel(), tools=make_stub_tools(), config={})
+        graph_service.build()
+        asyncio.run(graph_service.get_graph().ainvoke(_question()))
+    return time.perf_counter() - start
+
+
+def shared_runtime(n: int) -> float:
+    runtime = AgentRuntime(
+        graph_builder_factory=lambda: GraphBuilder(llm=StubChatModel(), tools=make_stub_tools(), config={}),
+        config_loader=dict,
+    )
+    runtime.warm_up()
+    start = time.perf_counter()
+    for _ in range(n):
+        asyncio.run(runtime.graph.ainvoke(_question()))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, fn in (("per-request build", per_request_build), ("shared runtime", shared_runtime)):
+        elapsed = fn(args.requests)
+        print(f"{label:>18}: {elapsed:.3f}s total, {1000 * elapsed / args.requests:.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
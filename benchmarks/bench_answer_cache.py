@@ -0,0 +1,122 @@
+"""
+Hit rate and latency of the semantic answer cache on a stream of paraphrased questions,
+plus lookup cost against cache size and TTL / invalidation behaviour.
+
+Questions are drawn (Zipf-distributed) from groups of paraphrases. The stub embedding puts
+every paraphrase of a group near the group's centroid (paraphrase pairs at cosine ~0.94)
+and different groups far apart, standing in for a real embedding model. A cache miss runs the agent graph
+with the stub LLM (--llm-ms per call) and stub tools.
+
+Run from the repository root:
+    python -m benchmarks.bench_answer_cache --questions 300
+"""
+import argparse
+import asyncio
+import time
+import zlib
+import numpy as np
+from agent.workflow import GraphBuilder
+from benchmarks.stubs import StubChatModel, make_stub_tools
+from utils.answer_cache import AnswerCache, tools_used
+
+DIMENSION = 768
+PARAPHRASES = [
+    "What's Apple's revenue?", "AAPL revenue last quarter", "How much revenue did Apple make?",
+    "Apple quarterly sales", "Revenue of Apple Inc.",
+]
+
+
+def make_embed_fn(groups: int, noise: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centroids = rng.normal(size=(groups, DIMENSION))
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    def embed(question: str):
+        group = int(question.split("#")[1].split()[0])
+        jitter = np.random.default_rng(zlib.crc32(question.encode())).normal(size=DIMENSION)
+        return centroids[group] + noise * jitter / np.linalg.norm(jitter)
+
+    return embed
+
+
+def question_stream(count: int, groups: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        group = min(int(rng.zipf(1.3)) - 1, groups - 1)
+        yield f"{PARAPHRASES[int(rng.integers(len(PARAPHRASES)))]} #{group}", group
+
+
+async def run(cache, graph, args):
+    latencies, wrong = [], 0
+    for question, group in question_stream(args.questions, args.groups):
+        start = time.perf_counter()
+        vector = cache.embed(question) if cache else None
+        cached = cache.lookup(question, vector) if cache else None
+        if cached is not None:
+            wrong += int(not cached["question"].endswith(f"#{group}"))
+        else:
+            result = await graph.ainvoke({"messages": [question]})
+            names, failed = tools_used(result["messages"])
+            if cache and not failed:
+                cache.store(question, result["messages"][-1].content, names, vector)
+        latencies.append(time.perf_counter() - start)
+    return 1000 * np.array(latencies), wrong
+
+
+def lookup_cost(sizes, repeats: int = 200):
+    rng = np.random.default_rng(2)
+    for size in sizes:
+        cache = AnswerCache(lambda q: rng.normal(size=DIMENSION), max_entries=size)
+        for i in range(size):
+            cache.store(f"question {i}", "answer", [], rng.normal(size=DIMENSION).astype(np.float32))
+        vector = cache.embed("probe")
+        start = time.perf_counter()
+        for _ in range(repeats):
+            cache.lookup("probe", vector)
+        print(f"{size:>8} entries | lookup {1e6 * (time.perf_counter() - start) / repeats:8.1f} us")
+
+
+def check_expiry():
+    embed = make_embed_fn(2, 0.25)
+    cache = AnswerCache(embed, tool_ttl_seconds={"polygon_financials": 0.05, "retriever_tool": 60})
+    cache.store("Apple price #0", "market answer", ["polygon_financials", "retriever_tool"])
+    cache.store("Apple 10-K risks #1", "document answer", ["retriever_tool"])
+    assert cache.lookup("AAPL price #0") is not None
+    time.sleep(0.06)
+    assert cache.lookup("AAPL price #0") is None, "market data answer should expire with the Polygon TTL"
+    assert cache.lookup("Apple 10-K risks #1") is not None
+    assert cache.invalidate("retriever_tool") == 1
+    assert cache.lookup("Apple 10-K risks #1") is None, "ingestion should invalidate document answers"
+    print("expiry and invalidation: ok")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--groups", type=int, default=40, help="Distinct questions, each asked in several phrasings")
+    parser.add_argument("--noise", type=float, default=0.25, help="Paraphrase spread around the group centroid")
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--llm-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    builder = GraphBuilder(llm=StubChatModel(latency=args.llm_ms / 1000), tools=make_stub_tools(), config={})
+    builder.build()
+    graph = builder.get_graph()
+
+    for enabled in (False, True):
+        cache = AnswerCache(make_embed_fn(args.groups, args.noise), similarity_threshold=args.threshold,
+                            max_entries=500) if enabled else None
+        latencies, wrong = await run(cache, graph, args)
+        line = (f"cache {'on ' if enabled else 'off'} | p50 {np.percentile(latencies, 50):7.1f} ms"
+                f" | p95 {np.percentile(latencies, 95):7.1f} ms | total {latencies.sum() / 1000:6.1f} s")
+        if enabled:
+            stats = cache.stats()
+            line += f" | hit rate {stats['hit_rate']:.0%} | wrong-question hits {wrong}"
+        print(line)
+
+    lookup_cost([100, 1000, 10000])
+    check_expiry()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
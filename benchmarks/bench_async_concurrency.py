@@ -0,0 +1,59 @@
+"""
+Load test for the async /query path against a stub LLM with simulated latency.
+
+Each request makes two LLM round-trips and one tool call. If the event loop is not
+blocked, wall time stays close to a single request's latency as concurrency grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_concurrency --latency 0.2 --concurrency 1 8 32 128
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from agent.workflow import GraphBuilder
+from agent.runtime import AgentRuntime
+from benchmarks.stubs import StubChatModel, make_stub_tools
+from main import app
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int) -> float:
+    async def one(i):
+        response = await client.post("/query", json={"question": f"Question {i}"})
+        response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main_async(args):
+    # The app's lifespan is not run here: no sessions, answer cache or trace ids
+    app.state.session_store = None
+    app.state.answer_cache = None
+    app.state.agent_runtime = AgentRuntime(
+        graph_builder_factory=lambda: GraphBuilder(
+            llm=StubChatModel(latency=args.latency),
+            tools=make_stub_tools(latency=args.latency, sync_only=args.sync_tools),
+            config={},  # no provider rate limits in front of the stub LLM
+        ),
+        config_loader=dict,
+    ).start()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for concurrency in args.concurrency:
+            elapsed = await run_level(client, concurrency)
+            print(f"concurrency={concurrency:>4}: {elapsed:.3f}s wall, {concurrency / elapsed:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated latency per LLM/tool call (s)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--sync-tools", action="store_true", help="Use sync-only tools (thread-pool fallback)")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Throughput of POST /query/batch against the same questions sent as separate /query calls.
+
+The real app is served by uvicorn on a local port (so streamed results arrive as they are
+sent) with the offline fakes from benchmarks/fakes.py (see bench_load). Each mode answers
+--questions questions:
+
+  sequential  one /query call after another, as the research jobs do today
+  concurrent  /query calls from --concurrency clients at once
+  batch       one /query/batch request with max_concurrency --concurrency
+
+Reported per mode: wall time, questions per second, time to the first answer, errors, and
+the calls that reached the fake embeddings, vector store and LLM.
+
+Run from the repository root:
+    python -m benchmarks.bench_batch_query --questions 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import tempfile
+import time
+from types import SimpleNamespace
+import httpx
+import uvicorn
+from langchain_core.documents import Document
+from benchmarks.bench_load import question, write_config
+from benchmarks.corpus import synthetic_text
+from benchmarks.fakes import Faults, FakeServices, install_fakes
+
+
+async def run_queries(client, questions, concurrency: int) -> dict:
+    pending = iter(questions)
+    first, errors = None, 0
+    start = time.perf_counter()
+
+    async def client_loop():
+        nonlocal first, errors
+        for text in pending:
+            response = await client.post("/query", json={"question": text})
+            errors += response.status_code != 200
+            first = first or time.perf_counter() - start
+
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return {"seconds": time.perf_counter() - start, "first": first, "errors": errors}
+
+
+async def run_batch(client, questions, concurrency: int) -> dict:
+    first, errors, event = None, 0, None
+    start = time.perf_counter()
+    body = {"questions": questions, "max_concurrency": concurrency}
+    async with client.stream("POST", "/query/batch", json=body) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event in ("result", "error"):
+                first = first or time.perf_counter() - start
+                errors += event == "error"
+            elif line.startswith("data: ") and event == "done":
+                summary = json.loads(line[len("data: "):])
+                errors += len(questions) - summary["questions"]
+    return {"seconds": time.perf_counter() - start, "first": first, "errors": errors}
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory(prefix="bench_batch_") as directory:
+        config = write_config(directory, SimpleNamespace(answer_cache=False, embedding_cache=False, rate_limits=False))
+        services = FakeServices(
+            llm=Faults("llm", args.llm_ms / 1000, args.jitter_ms / 1000, seed=args.seed),
+            embeddings=Faults("embeddings", args.embed_ms / 1000, args.jitter_ms / 1000, seed=args.seed + 1),
+            vector_store=Faults("vector_store", args.vector_ms / 1000, args.jitter_ms / 1000, seed=args.seed + 2),
+            polygon=Faults("polygon", args.tool_ms / 1000, args.jitter_ms / 1000, seed=args.seed + 3),
+            tavily=Faults("tavily", args.tool_ms / 1000, args.jitter_ms / 1000, seed=args.seed + 4),
+        )
+        rng = random.Random(args.seed)
+        corpus = [Document(page_content=synthetic_text(rng, 120), metadata={"source": f"seed-{i}.pdf", "page": i})
+                  for i in range(args.corpus)]
+        install_fakes(services, config, corpus)
+        questions = [question(rng, i) for i in range(args.questions)]
+
+        from main import app  # imported after the config path is set
+        print(f"{args.questions} questions, concurrency {args.concurrency}")
+        print(f"{'mode':<11} {'seconds':>8} {'q/s':>7} {'first ms':>9} {'errors':>6} "
+              f"{'embed calls':>11} {'vector calls':>12} {'llm calls':>9}")
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        serving = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started:
+            await asyncio.sleep(0.05)
+        try:
+            base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+                for mode in args.modes:
+                    before = services.stats()
+                    if mode == "batch":
+                        result = await run_batch(client, questions, args.concurrency)
+                    else:
+                        result = await run_queries(client, questions, 1 if mode == "sequential" else args.concurrency)
+                    after = services.stats()
+                    calls = {name: after[name]["calls"] - before[name]["calls"] for name in after}
+                    print(f"{mode:<11} {result['seconds']:8.2f} {args.questions / result['seconds']:7.1f} "
+                          f"{1000 * (result['first'] or 0):9.0f} {result['errors']:6d} {calls['embeddings']:11d} "
+                          f"{calls['vector_store']:12d} {calls['llm']:9d}")
+        finally:
+            server.should_exit = True
+            await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--modes", nargs="+", choices=["sequential", "concurrent", "batch"],
+                        default=["sequential", "concurrent", "batch"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", type=int, default=500, help="Chunks seeded into the fake vector store")
+    parser.add_argument("--llm-ms", type=float, default=50.0)
+    parser.add_argument("--embed-ms", type=float, default=30.0)
+    parser.add_argument("--vector-ms", type=float, default=20.0)
+    parser.add_argument("--tool-ms", type=float, default=40.0, help="Latency of the fake Polygon and Tavily tools")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
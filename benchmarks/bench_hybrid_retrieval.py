@@ -0,0 +1,160 @@
+"""
+Latency and recall of vector-only, BM25-only and hybrid (RRF) retrieval on two synthetic query sets.
+
+  identifier  Every chunk carries one unique identifier (like a ticker or filing number) inside
+              generic financial text, and each query asks about one identifier. The only relevant
+              chunk shares one exact token with the query, which barely moves its embedding.
+  semantic    Chunks are grouped into topics; each chunk states a few facts ("concepts") drawn
+              from its topic's pool, so its topic neighbours are close competitors. A query
+              restates the chunk's facts in other words (synonymous surface forms), sharing a
+              single exact token with it.
+
+The embeddings are a bag-of-words hashing model that maps the synonyms of a concept to one
+token, standing in for an embedding model that places paraphrases close together. Each set is
+indexed into its own store, so vector search wins on paraphrases and BM25 on identifiers, and
+the hybrid weights can be judged on both.
+
+Run from the repository root:
+    python -m benchmarks.bench_hybrid_retrieval --chunks 20000 --queries 200
+    python -m benchmarks.bench_hybrid_retrieval --vector-weight 1.0 --keyword-weight 0.5
+"""
+import argparse
+import hashlib
+import os
+import random
+import string
+import tempfile
+import time
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from benchmarks.corpus import synthetic_text
+from toolkit.retrieval_service import RetrievalService
+from vector_store.keyword_index import KeywordIndex, tokenize
+from vector_store.local_store import LocalVectorStore
+
+
+class HashingEmbeddings(Embeddings):
+    def __init__(self, dimension: int = 256, synonyms: dict = None):
+        self.dimension = dimension
+        self.synonyms = synonyms or {}
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for token in tokenize(text):
+            token = self.synonyms.get(token, token)
+            digest = int(hashlib.md5(token.encode()).hexdigest(), 16)
+            vector[digest % self.dimension] += 1.0 if (digest >> 64) & 1 else -1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def identifier_set(rng: random.Random, chunks: int, queries: int):
+    """
+    Chunks with one unique identifier each, and (question, relevant chunk id) pairs asking about one.
+    """
+    docs = [Document(page_content=f"{synthetic_text(rng, 60)} filing ZX-{i} {synthetic_text(rng, 60)}")
+            for i in range(chunks)]
+    targets = [rng.randrange(chunks) for _ in range(queries)]
+    return docs, [(f"What did filing ZX-{t} say about revenue guidance?", f"chunk-{t}") for t in targets], {}
+
+
+def semantic_set(rng: random.Random, chunks: int, queries: int, topic_size: int = 20,
+                 topic_concepts: int = 12, chunk_concepts: int = 6, forms: int = 4):
+    """
+    Topic-clustered chunks and paraphrased questions about them, plus the synonym table
+    (surface form -> concept) for the embeddings.
+    """
+    words = set()
+    while len(words) < (chunks // topic_size + 1) * topic_concepts * forms:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(8)))
+    words = sorted(words)
+    rng.shuffle(words)
+    concepts = [words[i:i + forms] for i in range(0, len(words), forms)]
+    synonyms = {form: f"concept{c}" for c, surface in enumerate(concepts) for form in surface}
+
+    docs, facts = [], []
+    for i in range(chunks):
+        topic = i // topic_size
+        chosen = rng.sample(range(topic * topic_concepts, (topic + 1) * topic_concepts), chunk_concepts)
+        used = [rng.randrange(forms) for _ in chosen]
+        facts.append((chosen, used))
+        stated = " ".join(concepts[c][f] for c, f in zip(chosen, used))
+        docs.append(Document(page_content=f"{synthetic_text(rng, 20)} {stated} {synthetic_text(rng, 20)}"))
+
+    pairs = []
+    for target in (rng.randrange(chunks) for _ in range(queries)):
+        chosen, used = facts[target]
+        shared = rng.randrange(len(chosen))  # the one concept worded exactly as in the chunk
+        restated = [concepts[c][f if k == shared else rng.choice([o for o in range(forms) if o != f])]
+                    for k, (c, f) in enumerate(zip(chosen, used))]
+        pairs.append((f"What did the filing report about {' '.join(restated)}?", f"chunk-{target}"))
+    return docs, pairs, synonyms
+
+
+def run_set(label: str, docs, pairs, synonyms: dict, directory: str, args):
+    embeddings = HashingEmbeddings(synonyms=synonyms)
+    vector_store = LocalVectorStore(os.path.join(directory, label, "vectors"))
+    keyword_index = KeywordIndex(os.path.join(directory, f"{label}_keywords.sqlite"))
+
+    start = time.perf_counter()
+    for offset in range(0, len(docs), 1000):
+        batch = docs[offset:offset + 1000]
+        ids = [f"chunk-{i}" for i in range(offset, offset + len(batch))]
+        vector_store.upsert(ids, embeddings.embed_documents([d.page_content for d in batch]), batch)
+        keyword_index.add(ids, batch)
+    print(f"{label}: indexed {len(docs)} chunks in {time.perf_counter() - start:.1f}s")
+
+    config = {
+        "vector_db": {"provider": "local"},
+        "retriever": {
+            "top_k": args.top_k,
+            "score_threshold": 0.5,
+            "hybrid": {"vector_candidates": 20, "keyword_candidates": 20, "rrf_k": 60,
+                       "vector_weight": args.vector_weight, "keyword_weight": args.keyword_weight,
+                       "keyword_min_score_ratio": 0.2},
+        },
+    }
+    vector_only = RetrievalService(config, lambda: embeddings, vector_store, keyword_index=None)
+    hybrid = RetrievalService(config, lambda: embeddings, vector_store, keyword_index=keyword_index)
+
+    def keyword_only(question):
+        return [doc for doc, _ in keyword_index.search(question, args.top_k)]
+
+    for method, search in (("vector only", vector_only.search), ("bm25 only", keyword_only),
+                           ("hybrid rrf", hybrid.search)):
+        hits, latencies = 0, []
+        for question, relevant in pairs:
+            start = time.perf_counter()
+            results = search(question)
+            latencies.append(time.perf_counter() - start)
+            hits += any(doc.id == relevant for doc in results)
+        latencies_ms = 1000 * np.array(latencies)
+        print(f"{label:>10} {method:>12}: recall@{args.top_k} {hits / len(pairs):.3f}"
+              f" | p50 {np.percentile(latencies_ms, 50):6.2f} ms | p95 {np.percentile(latencies_ms, 95):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000, help="Chunks per query set")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per query set")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--vector-weight", type=float, default=1.0)
+    parser.add_argument("--keyword-weight", type=float, default=1.0)
+    parser.add_argument("--sets", nargs="+", choices=["identifier", "semantic"], default=["identifier", "semantic"])
+    args = parser.parse_args()
+
+    builders = {"identifier": identifier_set, "semantic": semantic_set}
+    with tempfile.TemporaryDirectory() as directory:
+        for label in args.sets:
+            docs, pairs, synonyms = builders[label](random.Random(0), args.chunks, args.queries)
+            run_set(label, docs, pairs, synonyms, directory, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+End-to-end load test of the FastAPI app with offline fakes for every external service.
+
+The real app (lifespan, routes, agent graph, sessions, caches and ingestion jobs) runs
+in-process behind httpx's ASGI transport. The LLM, embeddings, vector store, Polygon and
+Tavily are replaced by the fakes in benchmarks/fakes.py, each with its own latency, jitter
+and error rate, so no API keys or network access are needed. All state files go to a
+temporary directory through a copy of config.yaml (TRADING_BOT_CONFIG).
+
+For each scenario and concurrency level, --requests requests are sent by that many
+concurrent clients. Reported per level: p50/p95/p99 latency, throughput, error count and
+peak resident memory. --output writes the results as JSON; --baseline compares them with
+an earlier results file and --max-regression turns a p95 or throughput regression into a
+non-zero exit status.
+
+Scenarios:
+    query   POST /query
+    stream  POST /query/stream (latency to the last byte; time to first token is reported too)
+    upload  POST /upload of a generated PDF, then poll /jobs/{id} until the job finishes
+
+Run from the repository root:
+    python -m benchmarks.bench_load --scenario query stream --concurrency 1 8 32 --requests 200 \\
+        --llm-ms 300 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+import yaml
+from langchain_core.documents import Document
+from benchmarks.corpus import synthetic_text, write_pdf
+from benchmarks.fakes import Faults, FakeServices, install_fakes
+
+_TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM"]
+_TOPICS = ["revenue growth", "operating margin", "free cash flow", "guidance", "buyback", "segment results"]
+
+
+class MemorySampler:
+    """
+    Samples the process's resident set size in a background thread and keeps the peak.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def rss() -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No /proc (e.g. macOS): fall back to the process-lifetime peak
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+def question(rng: random.Random, i: int) -> str:
+    kind = rng.random()
+    topic = rng.choice(_TOPICS)
+    if kind < 0.4:
+        return f"How did {rng.choice(_TICKERS)} {topic} develop? (request {i})"
+    if kind < 0.6:
+        first, second = rng.sample(_TICKERS, 2)
+        return f"Compare {first} and {second} on {topic} (request {i})"
+    if kind < 0.75:
+        return f"What is the latest news on {rng.choice(_TICKERS)}? (request {i})"
+    return f"What do the filings say about {topic}? (request {i})"
+
+
+def write_config(directory: str, args) -> dict:
+    """
+    Copy config.yaml with every cache/ path moved into the temporary directory.
+    """
+    with open(os.path.join("config", "config.yaml")) as file:
+        config = yaml.safe_load(file)
+
+    def relocate(node):
+        if isinstance(node, dict):
+            return {key: relocate(value) for key, value in node.items()}
+        if isinstance(node, str) and node.startswith("cache/"):
+            return os.path.join(directory, node)
+        return node
+
+    config = relocate(config)
+    config["vector_db"]["provider"] = "local"  # no Pinecone key needed; the fake store replaces it
+    config["tools"]["polygon"]["watchlist"] = []
+    config["answer_cache"]["enabled"] = args.answer_cache
+    config["embedding_cache"]["enabled"] = args.embedding_cache
+    config["rate_limits"]["enabled"] = args.rate_limits
+    path = os.path.join(directory, "config.yaml")
+    with open(path, "w") as file:
+        yaml.safe_dump(config, file)
+    os.environ["TRADING_BOT_CONFIG"] = path
+    return config
+
+
+async def query_once(client, rng, i, stream: bool) -> dict:
+    body = {"question": question(rng, i)}
+    if not stream:
+        response = await client.post("/query", json=body)
+        return {"ok": response.status_code == 200 and "answer" in response.json()}
+    start, first_token, ok = time.perf_counter(), None, False
+    async with client.stream("POST", "/query/stream", json=body) as response:
+        async for line in response.aiter_lines():
+            if line == "event: token" and first_token is None:
+                first_token = time.perf_counter() - start
+            ok = ok or line == "event: final"
+    return {"ok": response.status_code == 200 and ok, "first_token": first_token}
+
+
+async def upload_once(client, rng, i, pdf_dir: str, pages: int) -> dict:
+    path = os.path.join(pdf_dir, f"upload-{i}.pdf")
+    write_pdf(path, pages=pages, seed=rng.randrange(1 << 30))
+    with open(path, "rb") as file:
+        response = await client.post("/upload", files={"files": (os.path.basename(path), file, "application/pdf")})
+    if response.status_code != 202:
+        return {"ok": False}
+    job_id = response.json()["job_id"]
+    while True:
+        await asyncio.sleep(0.02)
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return {"ok": job["status"] == "completed"}
+
+
+async def run_level(client, scenario: str, concurrency: int, args, pdf_dir: str) -> dict:
+    rng = random.Random(args.seed)
+    counter = iter(range(args.requests))
+    latencies, first_tokens, errors = [], [], 0
+
+    async def client_loop():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                if scenario == "upload":
+                    result = await upload_once(client, rng, i, pdf_dir, args.pdf_pages)
+                else:
+                    result = await query_once(client, rng, i, stream=(scenario == "stream"))
+            except Exception:
+                result = {"ok": False}
+            latencies.append(time.perf_counter() - start)
+            errors += not result["ok"]
+            if result.get("first_token") is not None:
+                first_tokens.append(result["first_token"])
+
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = 1000 * np.array(latencies)
+    row = {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "peak_rss_mb": round(memory.peak / 2 ** 20, 1),
+    }
+    if first_tokens:
+        row["first_token_p50_ms"] = round(1000 * statistics.median(first_tokens), 2)
+    return row
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "commit": commit}
+
+
+def compare(results: list, baseline_path: str, max_regression: float) -> bool:
+    """
+    Print changes against a baseline results file; returns False if any level regressed
+    by more than max_regression (a fraction) in p95 latency or throughput.
+    """
+    with open(baseline_path) as file:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(file)["results"]}
+    passed = True
+    print(f"\ncompared with {baseline_path}:")
+    for row in results:
+        before = baseline.get((row["scenario"], row["concurrency"]))
+        if before is None:
+            continue
+        p95 = row["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps = row["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        regressed = max_regression is not None and (p95 > max_regression or -rps > max_regression)
+        passed = passed and not regressed
+        print(f"{row['scenario']:>7} c={row['concurrency']:<4} p95 {p95:+7.1%} | throughput {rps:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return passed
+
+
+async def main_async(args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="bench_load_") as directory:
+        config = write_config(directory, args)
+        services = FakeServices(
+            llm=Faults("llm", args.llm_ms / 1000, args.jitter_ms / 1000, args.llm_error_rate, args.seed),
+            embeddings=Faults("embeddings", args.embed_ms / 1000, args.jitter_ms / 1000, args.embed_error_rate, args.seed + 1),
+            vector_store=Faults("vector_store", args.vector_ms / 1000, args.jitter_ms / 1000, args.vector_error_rate, args.seed + 2),
+            polygon=Faults("polygon", args.polygon_ms / 1000, args.jitter_ms / 1000, args.polygon_error_rate, args.seed + 3),
+            tavily=Faults("tavily", args.tavily_ms / 1000, args.jitter_ms / 1000, args.tavily_error_rate, args.seed + 4),
+        )
+        rng = random.Random(args.seed)
+        corpus = [Document(page_content=synthetic_text(rng, 120), metadata={"source": f"seed-{i}.pdf", "page": i})
+                  for i in range(args.corpus)]
+        install_fakes(services, config, corpus)
+
+        from main import app  # imported after the config path is set
+        pdf_dir = os.path.join(directory, "pdfs")
+        os.makedirs(pdf_dir)
+        results = []
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for scenario in args.scenario:
+                    for concurrency in args.concurrency:
+                        row = await run_level(client, scenario, concurrency, args, pdf_dir)
+                        results.append(row)
+                        print(f"{scenario:>7} c={concurrency:<4} p50 {row['p50_ms']:8.1f} ms | p95 {row['p95_ms']:8.1f} ms"
+                              f" | p99 {row['p99_ms']:8.1f} ms | {row['throughput_rps']:7.1f} req/s"
+                              f" | errors {row['errors']:>4} | peak RSS {row['peak_rss_mb']:7.1f} MB")
+
+    options = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    return {"options": options, "environment": environment(), "services": services.stats(), "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", nargs="+", choices=["query", "stream", "upload"], default=["query"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", type=int, default=500, help="Chunks seeded into the fake vector store")
+    parser.add_argument("--pdf-pages", type=int, default=5, help="Pages per uploaded PDF")
+    parser.add_argument("--answer-cache", action="store_true", help="Leave the semantic answer cache on")
+    parser.add_argument("--embedding-cache", action="store_true", help="Leave the embedding cache on")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Leave the provider rate limiters on (with the real quotas from config.yaml)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency per fake call, up to this")
+    for service, latency in (("llm", 300), ("embed", 50), ("vector", 20), ("polygon", 150), ("tavily", 400)):
+        parser.add_argument(f"--{service}-ms", type=float, default=latency, help=f"Latency of each {service} call")
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help=f"Fraction of {service} calls that fail")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare with")
+    parser.add_argument("--max-regression", type=float, help="Fail if p95 or throughput is worse by more than this fraction")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"results written to {args.output}")
+    if args.baseline and not compare(report["results"], args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
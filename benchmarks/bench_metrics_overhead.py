@@ -0,0 +1,96 @@
+"""
+Cost of the built-in instrumentation on the hot path.
+
+Reports the per-call cost of the metric primitives (histogram observe, timing block, counter
+increment, trace-id log record factory), the end-to-end cost per agent request with metrics
+enabled against disabled (stub LLM and tools with no latency, so the instrumentation is as
+large a share of the request as it can be), and how long rendering /metrics takes.
+
+Run from the repository root:
+    python -m benchmarks.bench_metrics_overhead --requests 300
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from custom_logging import metrics
+from custom_logging.logging import trace_id_var
+from agent.workflow import GraphBuilder
+from benchmarks.stubs import StubChatModel, make_stub_tools
+
+
+def per_call_ns(fn, calls: int = 200_000) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return 1e9 * (time.perf_counter() - start) / calls
+
+
+def primitives():
+    histogram = metrics.NODE_SECONDS.labels("bench")
+    counter = metrics.LLM_TOKENS.labels("bench", "input")
+
+    def timed_block():
+        with histogram.time():
+            pass
+
+    record = logging.getLogRecordFactory()
+    rows = [
+        ("histogram observe", lambda: histogram.observe(0.042)),
+        ("labels() + observe", lambda: metrics.TOOL_SECONDS.labels("bench_tool", "success").observe(0.042)),
+        ("timed block", timed_block),
+        ("counter inc", lambda: counter.inc(17)),
+        ("log record with trace id", lambda: record("bench", logging.INFO, __file__, 1, "message", None, None)),
+    ]
+    for enabled in (True, False):
+        metrics.registry.enabled = enabled
+        for name, fn in rows[:4]:
+            print(f"{name:<26} metrics {'on ' if enabled else 'off'} {per_call_ns(fn):8.0f} ns")
+    metrics.registry.enabled = True
+    trace_id_var.set("bench-trace")
+    print(f"{rows[4][0]:<26}             {per_call_ns(rows[4][1], 50_000):8.0f} ns")
+
+
+async def end_to_end(requests: int, rounds: int):
+    builder = GraphBuilder(llm=StubChatModel(), tools=make_stub_tools(), config={})
+    builder.build()
+    graph = builder.get_graph()
+    for _ in range(20):
+        await graph.ainvoke({"messages": ["warm up"]})
+
+    timings = {True: [], False: []}
+    for _ in range(rounds):
+        # Alternate so drift affects both settings alike
+        for enabled in (True, False):
+            metrics.registry.enabled = enabled
+            start = time.perf_counter()
+            for i in range(requests):
+                await graph.ainvoke({"messages": [f"question {i}"]})
+            timings[enabled].append(1e6 * (time.perf_counter() - start) / requests)
+    metrics.registry.enabled = True
+
+    on, off = statistics.median(timings[True]), statistics.median(timings[False])
+    print(f"agent request (2 LLM calls, 1 tool): metrics off {off:8.0f} us | on {on:8.0f} us"
+          f" | overhead {on - off:6.0f} us ({100 * (on - off) / off:.1f}%)")
+
+
+def render():
+    start = time.perf_counter()
+    text = metrics.registry.render()
+    print(f"render /metrics: {len(text.splitlines())} lines in {1000 * (time.perf_counter() - start):.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    primitives()
+    asyncio.run(end_to_end(args.requests, args.rounds))
+    render()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark DocumentParser over a locally generated PDF corpus at different worker counts.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel_parsing --files 50 --pages 30 --workers 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.corpus import write_pdf_corpus
+from data_ingestion.parsing import DocumentParser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = write_pdf_corpus(directory, args.files, args.pages)
+        print(f"Corpus: {args.files} PDFs x {args.pages} pages, {os.cpu_count()} CPUs available")
+
+        baseline = None
+        reference = None
+        for workers in args.workers:
+            document_parser = DocumentParser(max_workers=workers, pages_per_task=10, parallel_min_pages=20)
+            start = time.perf_counter()
+            documents, failures = document_parser.parse(corpus)
+            elapsed = time.perf_counter() - start
+            document_parser.close()
+
+            order = [(d.metadata["source"], d.metadata["page"]) for d in documents]
+            if reference is None:
+                reference = order
+            baseline = baseline or elapsed
+            print(f"workers={workers:>2}: {elapsed:.2f}s, {len(documents)} pages, "
+                  f"speedup {baseline / elapsed:.2f}x, order matches: {order == reference}, failures: {len(failures)}")
+
+
+if __name__ == "__main__":
+    main()
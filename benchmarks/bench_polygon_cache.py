@@ -0,0 +1,84 @@
+"""
+Upstream Polygon calls and lookup latency with and without the PolygonCache, for many
+concurrent users asking about a skewed (Zipf-like) set of tickers.
+
+A stub API wrapper sleeps for --latency-ms instead of calling Polygon, so no API key is needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_polygon_cache --lookups 2000 --users 32 --tickers 200
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain_community.tools.polygon.financials import PolygonFinancials
+from langchain_community.utilities.polygon import PolygonAPIWrapper
+from toolkit.polygon_cache import CachedPolygonFinancials, PolygonCache
+
+_calls_lock = threading.Lock()
+
+
+class StubPolygonAPIWrapper(PolygonAPIWrapper):
+    latency: float = 0.2
+    calls: int = 0
+
+    def run(self, mode, ticker, **kwargs):
+        with _calls_lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return json.dumps({"ticker": ticker, "mode": mode})
+
+
+def run(tool, tickers, users):
+    latencies = []
+
+    def lookup(ticker):
+        start = time.perf_counter()
+        tool.run(ticker)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(lookup, tickers))
+    return time.perf_counter() - start, 1000 * np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--watchlist", type=int, default=10, help="Most popular tickers prewarmed before the run")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    universe = [f"T{i:03d}" for i in range(args.tickers)]
+    weights = [1 / (rank + 1) for rank in range(args.tickers)]
+    tickers = rng.choices(universe, weights=weights, k=args.lookups)
+
+    for label in ("uncached", "cached", "cached+prewarm"):
+        wrapper = StubPolygonAPIWrapper(polygon_api_key="stub", latency=args.latency_ms / 1000)
+        cache = PolygonCache(ttl_seconds={"get_financials": 86400})
+        if label == "uncached":
+            tool = PolygonFinancials(api_wrapper=wrapper)
+        else:
+            tool = CachedPolygonFinancials(api_wrapper=wrapper, cache=cache)
+        if label == "cached+prewarm":
+            tool.prewarm(universe[:args.watchlist], max_workers=4)
+            wrapper.calls = 0
+
+        elapsed, latencies = run(tool, tickers, args.users)
+        line = (f"{label:>15}: {wrapper.calls:5d} upstream calls | {args.lookups / elapsed:7.1f} lookups/s"
+                f" | p50 {np.percentile(latencies, 50):7.2f} ms | p95 {np.percentile(latencies, 95):7.2f} ms")
+        if label != "uncached":
+            stats = cache.stats()
+            line += f" | hit rate {stats['hit_rate']:.3f} ({stats['coalesced']} coalesced)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+End-to-end latency with and without speculative prefetching, and how many prefetches are
+wasted, with stub LLM and tool backends.
+
+The stub LLM takes --llm-ms per call and answers each question with a scripted set of tool
+calls; the stub Polygon and retriever tools take --tool-ms. Scenarios cover a prefetch that
+is fully used, one the LLM does not need (it answers directly) and one where it asks about
+a different ticker than the one mentioned.
+
+Run from the repository root:
+    python -m benchmarks.bench_prefetch --runs 10
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from agent.workflow import GraphBuilder
+from benchmarks.stubs import StubChatModel
+
+SCENARIOS = {
+    # question: tool calls the LLM makes on its first step
+    "used": ("How did Apple's services margin develop? Compare with MSFT.", [
+        ("polygon_financials", {"query": "AAPL"}),
+        ("polygon_financials", {"query": "MSFT"}),
+        ("retriever_tool", {"question": "Apple services margin compared with MSFT"}),
+    ]),
+    "not needed": ("What does EPS stand for at Apple?", []),
+    "other ticker": ("Is Nvidia more expensive than its peers?", [
+        ("polygon_financials", {"query": "AMD"}),
+    ]),
+}
+
+
+class ScriptedChatModel(StubChatModel):
+    tool_plan: list = []
+
+    def _reply(self, messages):
+        if isinstance(messages[-1], ToolMessage) or not self.tool_plan:
+            return AIMessage(content="Stub answer")
+        return AIMessage(content="", tool_calls=[
+            {"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(self.tool_plan)
+        ])
+
+
+def stub_tool(name, arg, seconds):
+    async def _arun(**kwargs):
+        await asyncio.sleep(seconds)
+        return f"{name} result for {kwargs[arg]}"
+
+    return StructuredTool.from_function(
+        coroutine=_arun, name=name, description=f"Stub {name}.",
+        args_schema={"type": "object", "properties": {arg: {"type": "string"}}, "required": [arg]},
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--tool-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    tools = [stub_tool("polygon_financials", "query", args.tool_ms / 1000),
+             stub_tool("retriever_tool", "question", args.tool_ms / 1000)]
+    for scenario, (question, plan) in SCENARIOS.items():
+        for enabled in (False, True):
+            llm = ScriptedChatModel(latency=args.llm_ms / 1000, tool_plan=plan)
+            config = {"prefetch": {"enabled": enabled, "symbols_path": "config/symbols.csv"}}
+            builder = GraphBuilder(llm=llm, tools=tools, config=config)
+            builder.build()
+            graph = builder.get_graph()
+
+            latencies = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                await graph.ainvoke({"messages": [question]})
+                latencies.append(time.perf_counter() - start)
+            latencies = 1000 * np.array(latencies)
+
+            line = (f"{scenario:>12} | prefetch {'on ' if enabled else 'off'} | p50 {np.percentile(latencies, 50):7.1f} ms"
+                    f" | p95 {np.percentile(latencies, 95):7.1f} ms")
+            if enabled:
+                stats = builder.prefetcher.stats()
+                line += f" | prefetches used {stats['used']}, wasted {stats['wasted']} of {stats['started']}"
+            print(line)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,209 @@
+"""
+Goodput under a provider quota: naive per-call retries against the shared adaptive limiter.
+
+A fake provider enforces a server-side quota (requests per second, with a small burst) and
+answers calls over it with 429s; accepted calls take --latency seconds. Interactive clients
+(asyncio tasks, like /query) and bulk workers (threads, like ingestion) call it for
+--duration seconds in each mode:
+
+  naive       every call retries 429s with jittered backoff on its own
+  adaptive    shared limiter that does not know the quota (AIMD on 429s only)
+  quota       shared limiter configured with the provider's quota
+
+Reported per mode: goodput (successful calls/s), 429s received, calls that gave up, and
+interactive and bulk latency (including waiting and retries).
+
+Run from the repository root:
+    python -m benchmarks.bench_rate_limiter --duration 10 --quota 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+from utils.rate_limiter import AdaptiveRateLimiter, bulk_priority
+from utils.retry import backoff_delay
+
+
+class QuotaExceeded(Exception):
+    status_code = 429
+
+
+class QuotaProvider:
+    """
+    Fake provider admitting rate calls per second (burst of burst calls); the rest get 429s.
+    """
+
+    def __init__(self, rate: float, burst: float, latency: float, reject_latency: float = 0.005):
+        self.rate = rate
+        self.burst = burst
+        self.latency = latency
+        self.reject_latency = reject_latency
+        self._level = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def _admit(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.burst, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._level >= 1:
+                self._level -= 1
+                self.accepted += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def _latency(self) -> float:
+        return self.latency * random.uniform(0.8, 1.2)
+
+    def call(self):
+        if not self._admit():
+            time.sleep(self.reject_latency)
+            raise QuotaExceeded("429 Too Many Requests")
+        time.sleep(self._latency())
+
+    async def acall(self):
+        if not self._admit():
+            await asyncio.sleep(self.reject_latency)
+            raise QuotaExceeded("429 Too Many Requests")
+        await asyncio.sleep(self._latency())
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {"interactive": [], "bulk": []}
+        self.gave_up = 0
+
+    def record(self, kind: str, latency: float = None):
+        with self._lock:
+            if latency is None:
+                self.gave_up += 1
+            else:
+                self.latencies[kind].append(latency)
+
+
+def naive_call(provider: QuotaProvider, max_retries: int, base_delay: float, max_delay: float):
+    for attempt in range(max_retries + 1):
+        try:
+            return provider.call()
+        except QuotaExceeded:
+            if attempt == max_retries:
+                raise
+            time.sleep(max(backoff_delay(attempt, base_delay, max_delay), base_delay))
+
+
+async def naive_acall(provider: QuotaProvider, max_retries: int, base_delay: float, max_delay: float):
+    for attempt in range(max_retries + 1):
+        try:
+            return await provider.acall()
+        except QuotaExceeded:
+            if attempt == max_retries:
+                raise
+            await asyncio.sleep(max(backoff_delay(attempt, base_delay, max_delay), base_delay))
+
+
+def run_mode(mode: str, args) -> dict:
+    provider = QuotaProvider(args.quota, args.burst, args.latency)
+    retry = {"max_retries": args.max_retries, "base_delay": args.base_delay, "max_delay": args.max_delay}
+    limiter = None
+    if mode != "naive":
+        limiter = AdaptiveRateLimiter(
+            mode, requests_per_minute=60 * args.quota if mode == "quota" else 0, burst_seconds=args.burst / args.quota,
+            max_concurrency=args.interactive + args.bulk, initial_concurrency=args.interactive + args.bulk,
+            bulk_share=args.bulk_share, **retry,
+        )
+    results = Results()
+    deadline = time.monotonic() + args.duration
+
+    def bulk_worker():
+        with bulk_priority():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    if limiter is None:
+                        naive_call(provider, **retry)
+                    else:
+                        limiter.call(provider.call, description="bulk call")
+                    results.record("bulk", time.perf_counter() - start)
+                except QuotaExceeded:
+                    results.record("bulk")
+
+    async def interactive_client():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if limiter is None:
+                    await naive_acall(provider, **retry)
+                else:
+                    await limiter.acall(provider.acall, description="interactive call")
+                results.record("interactive", time.perf_counter() - start)
+            except QuotaExceeded:
+                results.record("interactive")
+            await asyncio.sleep(args.think_time * random.uniform(0.5, 1.5))
+
+    async def interactive():
+        await asyncio.gather(*(interactive_client() for _ in range(args.interactive)))
+
+    threads = [threading.Thread(target=bulk_worker, daemon=True) for _ in range(args.bulk)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    asyncio.run(interactive())
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    def percentile(values, q):
+        return 1000 * statistics.quantiles(values, n=100)[q - 1] if len(values) >= 2 else float("nan")
+
+    done = sum(len(v) for v in results.latencies.values())
+    return {
+        "mode": mode,
+        "goodput": done / elapsed,
+        "rejected": provider.rejected,
+        "gave_up": results.gave_up,
+        "interactive": len(results.latencies["interactive"]),
+        "interactive_p50": percentile(results.latencies["interactive"], 50),
+        "interactive_p95": percentile(results.latencies["interactive"], 95),
+        "bulk": len(results.latencies["bulk"]),
+        "bulk_p50": percentile(results.latencies["bulk"], 50),
+        "limit": limiter.stats()["concurrency_limit"] if limiter else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--quota", type=float, default=20.0, help="Provider quota in requests per second")
+    parser.add_argument("--burst", type=float, default=5.0, help="Provider burst allowance in requests")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per accepted call")
+    parser.add_argument("--interactive", type=int, default=4, help="Concurrent interactive clients")
+    parser.add_argument("--think-time", type=float, default=0.2, help="Seconds between an interactive client's calls")
+    parser.add_argument("--bulk", type=int, default=16, help="Bulk worker threads")
+    parser.add_argument("--bulk-share", type=float, default=0.5)
+    parser.add_argument("--max-retries", type=int, default=4)
+    parser.add_argument("--base-delay", type=float, default=0.1)
+    parser.add_argument("--max-delay", type=float, default=2.0)
+    parser.add_argument("--modes", nargs="+", default=["naive", "adaptive", "quota"],
+                        choices=["naive", "adaptive", "quota"])
+    args = parser.parse_args()
+
+    print(f"quota {args.quota:.0f} req/s (burst {args.burst:.0f}), {args.interactive} interactive clients, "
+          f"{args.bulk} bulk workers, {args.duration:.0f}s per mode")
+    print(f"{'mode':<9} {'goodput/s':>9} {'429s':>6} {'gave up':>7} {'interactive':>11} {'p50 ms':>7} "
+          f"{'p95 ms':>7} {'bulk':>6} {'p50 ms':>7} {'limit':>6}")
+    for mode in args.modes:
+        r = run_mode(mode, args)
+        print(f"{r['mode']:<9} {r['goodput']:9.1f} {r['rejected']:6d} {r['gave_up']:7d} {r['interactive']:11d} "
+              f"{r['interactive_p50']:7.0f} {r['interactive_p95']:7.0f} {r['bulk']:6d} {r['bulk_p50']:7.0f} "
+              f"{'-' if r['limit'] is None else r['limit']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Microbenchmark: per-call Pinecone setup (the old retriever_tool) against the pooled RetrievalService.
+
+A local HTTP server stands in for the Pinecone index data plane, so no account is needed.
+
+Run from the repository root:
+    python -m benchmarks.bench_retrieval_service --queries 300 --threads 8
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_pinecone import PineconeVectorStore
+from pinecone import Pinecone
+from toolkit.retrieval_service import RetrievalService
+from vector_store.pinecone_store import PineconeBackend
+
+CONFIG = {
+    "vector_db": {"index_name": "bench", "pool_size": 8, "keepalive_seconds": 300, "max_retries": 1},
+    "retriever": {"top_k": 3, "score_threshold": 0.0},
+}
+
+
+class _IndexStandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real index
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({
+            "namespace": "",
+            "matches": [
+                {"id": f"doc-{i}", "score": 0.9 - 0.1 * i, "metadata": {"text": f"Stand-in chunk {i}"}}
+                for i in range(3)
+            ],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _IndexStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://localhost:{server.server_port}"
+
+
+def run(fn, queries: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(fn, (f"question {i}" for i in range(queries))))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    host = start_stand_in()
+
+    def per_call(question):
+        # What retriever_tool did before: new client, index handle, store and embeddings per call
+        pc = Pinecone(api_key="bench")
+        store = PineconeVectorStore(index=pc.Index(host=host), embedding=DeterministicFakeEmbedding(size=768))
+        return store.similarity_search_with_relevance_scores(question, k=3, score_threshold=0.0)
+
+    service = RetrievalService(
+        config=CONFIG,
+        embeddings_factory=lambda: DeterministicFakeEmbedding(size=768),
+        vector_store=PineconeBackend.from_config(
+            CONFIG["vector_db"],
+            index_factory=lambda: Pinecone(api_key="bench").Index(host=host, connection_pool_maxsize=8),
+        ),
+    )
+    service.warm_up()
+
+    for label, fn in (("per-call setup", per_call), ("pooled service", service.search)):
+        elapsed = run(fn, args.queries, args.threads)
+        print(f"{label:>15}: {elapsed:.3f}s, {1000 * elapsed / args.queries:.2f} ms/query, "
+              f"{args.queries / elapsed:.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
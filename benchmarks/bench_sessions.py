@@ -0,0 +1,83 @@
+"""
+Prompt size and stored session size over a long conversation, with and without the
+session history bounds (windowing, token trimming and summarization).
+
+Every turn the stub LLM calls the stub retriever (which returns --tool-tokens of text),
+then answers. Both runs keep state in a SQLite checkpointer under one thread id; the
+unbounded run sends the whole history on every LLM call.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions --turns 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from agent.sessions import SessionStore
+from agent.workflow import GraphBuilder
+from benchmarks.stubs import StubChatModel, make_stub_tools
+
+
+class SessionChatModel(StubChatModel):
+    """
+    Stub model that records prompt sizes and answers summarization requests.
+    """
+    prompt_tokens: list = []
+
+    def _reply(self, messages):
+        self.prompt_tokens.append(count_tokens_approximately(messages))
+        if len(messages) == 1 and str(messages[0].content).startswith("Summarize"):
+            return AIMessage(content="Summary: " + str(messages[0].content)[-600:])
+        return super()._reply(messages)
+
+
+async def run(bounded: bool, args, directory):
+    tools = make_stub_tools()
+    retriever = tools[0]
+    padding = "Revenue grew on services and wearables while margins held. " * (args.tool_tokens // 12)
+    retriever.coroutine = None
+    retriever.func = lambda question: f"{padding} (for {question})"
+
+    store = await SessionStore(os.path.join(directory, f"sessions-{bounded}.sqlite")).open()
+    llm = SessionChatModel(prompt_tokens=[])
+    config = {"sessions": {"enabled": bounded, "max_turns": 8, "keep_turns": 4, "history_token_budget": 4000}}
+    builder = GraphBuilder(llm=llm, tools=tools, config=config)
+    builder.build(checkpointer=store.checkpointer)
+    graph = builder.get_graph()
+
+    thread = {"configurable": {"thread_id": "bench"}}
+    rows = []
+    for turn in range(1, args.turns + 1):
+        calls_before = len(llm.prompt_tokens)
+        start = time.perf_counter()
+        await graph.ainvoke({"messages": [f"Question {turn}: how did revenue develop?"]}, config=thread)
+        elapsed = time.perf_counter() - start
+        await store.finish_turn("bench")
+        if turn == 1 or turn % args.every == 0:
+            state = await graph.aget_state(thread)
+            rows.append((turn, max(llm.prompt_tokens[calls_before:]), len(state.values["messages"]),
+                         await store.session_bytes("bench"), 1000 * elapsed))
+    await store.close()
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--tool-tokens", type=int, default=1500)
+    parser.add_argument("--every", type=int, default=10, help="Report every N turns")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for bounded in (False, True):
+            print("bounded history" if bounded else "unbounded history")
+            print(f"{'turn':>6} {'prompt tokens':>14} {'stored msgs':>12} {'session bytes':>14} {'latency ms':>11}")
+            for turn, tokens, messages, stored, latency in await run(bounded, args, directory):
+                print(f"{turn:>6} {tokens:>14} {messages:>12} {stored:>14} {latency:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
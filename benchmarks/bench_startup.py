@@ -0,0 +1,95 @@
+"""
+Import time and cold-start time of the API, and the cost of load_config() calls.
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+  - import: `python -X importtime -c "import <module>"`, reporting the cumulative import
+    time of the module (which includes everything it constructs at import time) and the
+    slowest modules it pulls in;
+  - cold start: importing main and building the shared agent graph, as the API lifespan does;
+  - config: repeated load_config() calls, cached against parsing the YAML every time.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import yaml
+from utils.config_loader import default_config_path, load_config
+
+COLD_START = """
+import time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from agent.runtime import AgentRuntime
+AgentRuntime().start()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def python(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-W", "ignore", *args], capture_output=True, text=True,
+                          cwd=os.getcwd(), check=True)
+
+
+def import_times(module: str):
+    """
+    Cumulative import time, in ms, of the module and of each module it imports directly.
+    """
+    children = {}
+    for line in python("-X", "importtime", "-c", f"import {module}").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        # importtime lists a module after its imports, indenting each level by two spaces
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == module:
+                return {**children, module: int(total) / 1000}
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = int(total) / 1000
+    raise RuntimeError(f"{module} not found in the importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=["main", "agent.workflow", "toolkit.tools"])
+    parser.add_argument("--top", type=int, default=8, help="Slowest direct imports to list for main")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        print(f"import {module:<16} {statistics.median(r[module] for r in runs):8.1f} ms")
+        if module == "main":
+            slowest = sorted(((statistics.median(r.get(name, 0) for r in runs), name) for name in runs[0]
+                              if name != module), reverse=True)[:args.top]
+            for total, name in slowest:
+                print(f"    {name:<36} {total:8.1f} ms")
+
+    timings = [tuple(map(float, python("-c", COLD_START).stdout.split()[-2:])) for _ in range(args.runs)]
+    print(f"cold start: import main {1000 * statistics.median(t[0] for t in timings):8.1f} ms"
+          f" | build agent graph {1000 * statistics.median(t[1] for t in timings):8.1f} ms")
+
+    calls = 1000
+    path = default_config_path()
+    start = time.perf_counter()
+    for _ in range(calls):
+        with open(path) as file:
+            yaml.safe_load(file)
+    parsed = (time.perf_counter() - start) / calls
+    load_config()
+    start = time.perf_counter()
+    for _ in range(calls):
+        load_config()
+    cached = (time.perf_counter() - start) / calls
+    print(f"load_config: parse every call {1e6 * parsed:8.1f} us | cached {1e6 * cached:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
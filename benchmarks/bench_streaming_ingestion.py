@@ -0,0 +1,103 @@
+"""
+Peak memory and throughput of page-wise streaming ingestion against splitting the whole batch.
+
+A synthetic corpus of --files filings of --pages pages (about --page-kb KB of text each) is
+chunked, planned against a fresh ingestion manifest and sent through the embedding/upsert
+pipeline with a stub embedder that returns one shared --dimension-sized vector per chunk and
+a stub upsert that drops them. Each mode runs in its own process:
+
+  batch      every page in one list, split_documents over all of it, then manifest.plan()
+             (the old load_documents / store_in_vector_db flow)
+  streaming  pages generated lazily through PageChunker and manifest.plan_stream()
+
+Reported per mode: chunks, wall time, chunks per second, and peak resident memory above the
+process's starting point. Pages are generated rather than parsed from PDFs so multi-gigabyte
+corpora stay quick to produce; bench_parallel_parsing covers parsing.
+
+Run from the repository root:
+    python -m benchmarks.bench_streaming_ingestion --files 200 --pages 500
+    python -m benchmarks.bench_streaming_ingestion --files 1000 --pages 500 --modes streaming
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from benchmarks.bench_load import MemorySampler
+from benchmarks.corpus import synthetic_text
+from data_ingestion.chunking import PageChunker
+from data_ingestion.manifest import IngestionManifest, IngestionPlan
+from data_ingestion.upsert_pipeline import EmbeddingUpsertPipeline
+
+
+def generate_pages(files: int, pages: int, page_kb: float, seed: int = 0):
+    """
+    Yield the pages of the synthetic corpus, built from a pool of paragraphs numbered per page
+    so that every chunk is distinct.
+    """
+    rng = random.Random(seed)
+    paragraphs = [synthetic_text(rng, rng.randint(20, 120)) for _ in range(500)]
+    per_page = max(1, int(page_kb * 1024 / 500))
+    for f in range(files):
+        source = f"filing_{f:04d}.pdf"
+        for p in range(pages):
+            text = "\n\n".join(f"{p}.{i} {rng.choice(paragraphs)}" for i in range(per_page))
+            yield Document(page_content=text, metadata={"source": source, "page": p})
+
+
+def run_mode(mode: str, args) -> dict:
+    vector = [0.0] * args.dimension
+
+    def embed(texts):
+        return [vector] * len(texts)
+
+    def upsert(ids, vectors, documents):
+        pass
+
+    with tempfile.TemporaryDirectory(prefix="bench_stream_") as directory:
+        manifest = IngestionManifest(os.path.join(directory, "manifest.sqlite"))
+        pipeline = EmbeddingUpsertPipeline(embed, upsert, batch_size=args.batch_size)
+        pages = generate_pages(args.files, args.pages, args.page_kb, args.seed)
+        with MemorySampler() as memory:
+            start = time.perf_counter()
+            baseline = memory.peak
+            if mode == "batch":
+                splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, length_function=len)
+                plan = manifest.plan(splitter.split_documents(list(pages)))
+                stats = pipeline.run(iter(plan.new_chunks), total=len(plan.new_chunks))
+            else:
+                plan = IngestionPlan()
+                stats = pipeline.run(manifest.plan_stream(PageChunker().split(pages), plan))
+            manifest.commit(plan)
+            elapsed = time.perf_counter() - start
+    return {"mode": mode, "chunks": stats["chunks"], "seconds": elapsed,
+            "peak_mb": (memory.peak - baseline) / (1024 * 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=500, help="Pages per filing")
+    parser.add_argument("--page-kb", type=float, default=3.0, help="Approximate text per page")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--batch-size", type=int, default=64, help="Embedding batch size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--modes", nargs="+", choices=["batch", "streaming"], default=["batch", "streaming"])
+    args = parser.parse_args()
+
+    corpus_mb = args.files * args.pages * args.page_kb / 1024
+    print(f"{args.files} filings x {args.pages} pages, about {corpus_mb:,.0f} MB of text")
+    print(f"{'mode':<10} {'chunks':>9} {'seconds':>8} {'chunks/s':>9} {'peak RSS MB':>12}")
+    for mode in args.modes:
+        # A fresh process per mode, so one mode's freed memory does not hide the next one's peak
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            r = pool.apply(run_mode, (mode, args))
+        print(f"{r['mode']:<10} {r['chunks']:9d} {r['seconds']:8.1f} {r['chunks'] / r['seconds']:9.0f} "
+              f"{r['peak_mb']:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Prompt size and end-to-end latency of one agent question with and without tool-output
+compaction.
+
+The stub LLM calls the retriever, Polygon and Tavily tools in one step, then answers. Its
+latency grows with prompt size (--ms-per-1k-tokens), like prefill on a hosted model. The
+stub tools return results shaped like the real ones: Tavily with raw page content and
+near-duplicate pages, retriever chunks and a Polygon financials record.
+
+Run from the repository root:
+    python -m benchmarks.bench_tool_compaction --runs 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import numpy as np
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from agent.tool_compaction import estimate_tokens
+from agent.workflow import GraphBuilder
+from benchmarks.corpus import synthetic_text
+from benchmarks.stubs import StubChatModel
+
+QUESTION = "What guidance did Apple give on services revenue and margins last quarter?"
+RELEVANT = ("Apple guided services revenue to grow double digits year over year, "
+            "with gross margin between 46 and 47 percent.")
+
+
+class PromptSizedChatModel(StubChatModel):
+    """
+    Stub model that calls all three tools at once and whose latency scales with prompt tokens.
+    """
+    base_latency: float = 0.05
+    seconds_per_token: float = 0.0
+    prompt_tokens: list = []
+
+    def _reply(self, messages):
+        if messages and isinstance(messages[-1], ToolMessage):
+            return AIMessage(content="Answer based on the tool results.")
+        return AIMessage(content="", tool_calls=[
+            {"name": "retriever_tool", "args": {"question": QUESTION}, "id": "call_retriever"},
+            {"name": "polygon_financials", "args": {"query": "AAPL"}, "id": "call_polygon"},
+            {"name": "tavily_search_results_json", "args": {"query": QUESTION}, "id": "call_tavily"},
+        ])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        self.prompt_tokens.append(tokens)
+        await asyncio.sleep(self.base_latency + tokens * self.seconds_per_token)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def make_tools(rng):
+    def page(words):
+        return f"{synthetic_text(rng, words // 2)} {RELEVANT} {synthetic_text(rng, words // 2)}"
+
+    pages = [page(3000) for _ in range(3)]
+    tavily_results = json.dumps([
+        {"title": f"Result {i}", "url": f"https://example.com/{i}", "content": RELEVANT,
+         "raw_content": pages[i % len(pages)]}  # results 3 and 4 repeat pages 0 and 1
+        for i in range(5)
+    ])
+    retriever_results = [
+        {"page_content": page(300), "metadata": {"source": "apple-10q.pdf", "page": i}} for i in range(3)
+    ]
+    financials = json.dumps([{"ticker": "AAPL", "fiscal_period": f"Q{q}", "financials": {
+        "income_statement": {name: {"value": rng.random() * 1e9, "unit": "USD"} for name in
+                             ("revenues", "gross_profit", "operating_income", "net_income_loss", "diluted_eps")},
+    }} for q in range(1, 5)])
+
+    def tool(name, arg, output):
+        async def _arun(**kwargs):
+            return output
+        return StructuredTool.from_function(
+            coroutine=_arun, name=name, description=f"Stub {name}.",
+            args_schema={"type": "object", "properties": {arg: {"type": "string"}}, "required": [arg]},
+        )
+
+    return [
+        tool("retriever_tool", "question", retriever_results),
+        tool("polygon_financials", "query", financials),
+        tool("tavily_search_results_json", "query", tavily_results),
+    ]
+
+
+async def measure(config, tools, args):
+    llm = PromptSizedChatModel(base_latency=args.base_ms / 1000, seconds_per_token=args.ms_per_1k_tokens / 1e6,
+                               prompt_tokens=[])
+    builder = GraphBuilder(llm=llm, tools=tools, config=config)
+    builder.build()
+    graph = builder.get_graph()
+
+    latencies = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = await graph.ainvoke({"messages": [QUESTION]})
+        latencies.append(time.perf_counter() - start)
+    kept = any(RELEVANT in str(m.content) for m in result["messages"] if isinstance(m, ToolMessage))
+    # Every run makes two LLM calls; the second one carries the tool results
+    return llm.prompt_tokens[1], 1000 * np.array(latencies), kept
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--base-ms", type=float, default=50)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=20)
+    args = parser.parse_args()
+
+    tools = make_tools(random.Random(0))
+    configs = {
+        "no compaction": {"tool_compaction": {"enabled": False}},
+        "compaction": {"tool_compaction": {"enabled": True, "turn_token_budget": 4000,
+                                           "default_tool_token_budget": 2000}},
+    }
+    for label, config in configs.items():
+        prompt_tokens, latencies, kept = await measure(config, tools, args)
+        print(f"{label:>14}: prompt {prompt_tokens:7d} tokens | p50 {np.percentile(latencies, 50):7.1f} ms"
+              f" | p95 {np.percentile(latencies, 95):7.1f} ms | relevant passage kept: {kept}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Scenario checks for concurrent tool execution, per-tool timeouts, the request deadline and
+the iteration cap, using artificially slow stub tools and a stub LLM.
+
+Each scenario prints its elapsed time and whether the expected behaviour was observed; the
+script exits non-zero if any check fails.
+
+Run from the repository root:
+    python -m benchmarks.bench_tool_deadlines
+"""
+import asyncio
+import sys
+import time
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from agent.workflow import GraphBuilder
+from benchmarks.stubs import StubChatModel
+
+
+class MultiToolChatModel(StubChatModel):
+    """
+    Calls every tool in each step until it has taken `tool_steps` steps, then answers.
+    """
+    tool_names: list = []
+    tool_steps: int = 1
+
+    def _reply(self, messages):
+        steps = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        # Answer when done, or when asked to answer after a tool step (the budget-exhausted note)
+        if steps >= self.tool_steps or (steps and not isinstance(messages[-1], ToolMessage)):
+            results = [m for m in messages if isinstance(m, ToolMessage)]
+            return AIMessage(content=f"Answer from {len(results)} tool results")
+        return AIMessage(content="", tool_calls=[
+            {"name": name, "args": {"query": "AAPL"}, "id": f"call_{steps}_{name}"} for name in self.tool_names
+        ])
+
+
+def slow_tool(name, seconds, sync_only=False):
+    def _run(query):
+        time.sleep(seconds)
+        return f"{name} result for {query}"
+
+    async def _arun(query):
+        await asyncio.sleep(seconds)
+        return f"{name} result for {query}"
+
+    return StructuredTool.from_function(
+        func=_run, coroutine=None if sync_only else _arun, name=name, description=f"Stub {name}.",
+        args_schema={"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+    )
+
+
+async def run(tools, agent_config, tool_steps=1):
+    llm = MultiToolChatModel(tool_names=[tool.name for tool in tools], tool_steps=tool_steps)
+    builder = GraphBuilder(llm=llm, tools=tools, config={"agent": agent_config})
+    builder.build()
+    start = time.perf_counter()
+    result = await builder.get_graph().ainvoke({"messages": ["How is AAPL doing?"]})
+    elapsed = time.perf_counter() - start
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    return elapsed, result, tool_messages
+
+
+async def main():
+    checks = []
+
+    def check(label, ok, elapsed):
+        checks.append(ok)
+        print(f"{'PASS' if ok else 'FAIL'} {label:<60} {elapsed:6.2f}s")
+
+    # Three 0.5s tools in one step finish together, not one after another
+    tools = [slow_tool("retriever_tool", 0.5), slow_tool("polygon_financials", 0.5),
+             slow_tool("tavily_search_results_json", 0.5)]
+    elapsed, _, messages = await run(tools, {"tool_timeout_seconds": 5})
+    check("three tool calls run concurrently", elapsed < 1.0 and len(messages) == 3, elapsed)
+
+    # A 5s Tavily search is cancelled at its 1s timeout; the fast results are kept
+    tools = [slow_tool("retriever_tool", 0.2), slow_tool("polygon_financials", 0.2),
+             slow_tool("tavily_search_results_json", 5)]
+    elapsed, result, messages = await run(tools, {"tool_timeouts": {"tavily_search_results_json": 1}})
+    statuses = {m.name: m.status for m in messages}
+    check("slow tool times out, partial results returned",
+          elapsed < 1.5 and statuses == {"retriever_tool": "success", "polygon_financials": "success",
+                                         "tavily_search_results_json": "error"}
+          and result["messages"][-1].content.startswith("Answer"), elapsed)
+
+    # Sync-only tools are bounded the same way
+    tools = [slow_tool("retriever_tool", 0.2, sync_only=True), slow_tool("tavily_search_results_json", 5, sync_only=True)]
+    elapsed, _, messages = await run(tools, {"tool_timeout_seconds": 1})
+    check("sync-only slow tool times out", elapsed < 1.5 and [m.status for m in messages] == ["success", "error"],
+          elapsed)
+
+    # A model that keeps calling tools is stopped by the iteration cap
+    tools = [slow_tool("retriever_tool", 0.05)]
+    elapsed, result, messages = await run(tools, {"max_iterations": 3}, tool_steps=100)
+    check("iteration cap stops the tool loop", len(messages) == 3 and not result["messages"][-1].tool_calls, elapsed)
+
+    # ...and by the request deadline, which also shortens the tool timeouts
+    tools = [slow_tool("retriever_tool", 0.8)]
+    elapsed, result, messages = await run(tools, {"request_timeout_seconds": 2, "max_iterations": 100}, tool_steps=100)
+    check("request deadline stops the tool loop", elapsed < 2.5 and result["iterations"] <= 4, elapsed)
+
+    sys.exit(0 if all(checks) else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""
+Peak memory of staging an upload on disk: whole-file read (the old load_documents) against
+chunked spooling. Peak Python heap is measured with tracemalloc for each file size.
+
+Run from the repository root:
+    python -m benchmarks.bench_upload_memory --sizes-mb 10 100 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from data_ingestion.uploads import spool_upload
+
+
+def whole_file(stream, path):
+    with open(path, "wb") as out:
+        out.write(stream.read())
+
+
+def chunked(stream, path):
+    spool_upload(stream, path, max_bytes=0)
+
+
+def measure(fn, source_path, target_path):
+    with open(source_path, "rb") as stream:
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(stream, target_path)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    os.remove(target_path)
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in args.sizes_mb:
+            source_path = os.path.join(directory, "upload.bin")
+            with open(source_path, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+
+            for label, fn in (("whole-file read", whole_file), ("chunked spool", chunked)):
+                peak, elapsed = measure(fn, source_path, os.path.join(directory, "spooled.bin"))
+                print(f"{size_mb:>5} MB {label:>15}: peak {peak / (1024 * 1024):8.1f} MB, {elapsed:.2f}s")
+            os.remove(source_path)
+
+
+if __name__ == "__main__":
+    main()
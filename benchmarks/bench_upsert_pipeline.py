@@ -0,0 +1,79 @@
+"""
+Throughput of the embedding/upsert pipeline with stub embedding and index backends.
+
+The stub embedder costs a fixed latency per batch plus a per-text cost and can inject
+rate-limit errors; the stub index costs a fixed latency per upsert call.
+
+Run from the repository root:
+    python -m benchmarks.bench_upsert_pipeline --chunks 5000 --rate-limit-prob 0.05
+"""
+import argparse
+import random
+import threading
+import time
+from langchain_core.documents import Document
+from data_ingestion.upsert_pipeline import EmbeddingUpsertPipeline
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class StubEmbedder:
+    def __init__(self, batch_latency, per_text_latency, rate_limit_prob):
+        self.batch_latency = batch_latency
+        self.per_text_latency = per_text_latency
+        self.rate_limit_prob = rate_limit_prob
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        time.sleep(self.batch_latency + self.per_text_latency * len(texts))
+        if random.random() < self.rate_limit_prob:
+            with self._lock:
+                self.rate_limited += 1
+            raise RateLimitError("429 Resource exhausted")
+        return [[0.0] * 8 for _ in texts]
+
+
+class StubIndex:
+    def __init__(self, latency):
+        self.latency = latency
+        self.stored = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, ids, vectors, documents):
+        time.sleep(self.latency)
+        with self._lock:
+            self.stored += len(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--embed-batch-latency", type=float, default=0.05)
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005)
+    parser.add_argument("--upsert-latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.05)
+    args = parser.parse_args()
+
+    chunks = [(f"id-{i}", Document(page_content=f"chunk {i}")) for i in range(args.chunks)]
+    settings = [
+        ("sequential (1/1, batch 64)", dict(batch_size=64, embed_workers=1, upsert_workers=1)),
+        ("pipelined (2/4, batch 64)", dict(batch_size=64, embed_workers=2, upsert_workers=4)),
+        ("pipelined (4/8, batch 128)", dict(batch_size=128, embed_workers=4, upsert_workers=8)),
+    ]
+    for label, options in settings:
+        embedder = StubEmbedder(args.embed_batch_latency, args.embed_text_latency, args.rate_limit_prob)
+        index = StubIndex(args.upsert_latency)
+        pipeline = EmbeddingUpsertPipeline(
+            embedder.embed_documents, index.upsert, retry_base_delay=0.05, retry_max_delay=0.5, **options
+        )
+        stats = pipeline.run(iter(chunks), total=len(chunks))
+        assert index.stored == len(chunks)
+        print(f"{label:>28}: {stats['chunks_per_second']:8.0f} chunks/s "
+              f"({stats['seconds']:.2f}s, {embedder.rate_limited} rate-limited batches retried)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Query latency and recall@k of the local memory-mapped vector store against an exact
+float64 brute-force search, on random embeddings.
+
+1M chunks at 768 dimensions need about 3 GB of disk for the matrix; use --dimension to
+shrink the footprint.
+
+Run from the repository root:
+    python -m benchmarks.bench_vector_store --sizes 10000 100000 1000000 --dimension 768
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from langchain_core.documents import Document
+from vector_store.local_store import LocalVectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=10_000, help="Upsert batch size while loading")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalVectorStore(directory, initial_capacity=size)
+            store.ensure_ready(args.dimension)
+            corpus = np.empty((size, args.dimension), dtype=np.float32)
+
+            start = time.perf_counter()
+            for offset in range(0, size, args.batch):
+                vectors = rng.standard_normal((min(args.batch, size - offset), args.dimension)).astype(np.float32)
+                corpus[offset:offset + len(vectors)] = vectors
+                ids = [f"chunk-{offset + i}" for i in range(len(vectors))]
+                store.upsert(ids, vectors, [Document(page_content=chunk_id) for chunk_id in ids])
+            load_seconds = time.perf_counter() - start
+
+            # Exact reference in float64
+            reference = corpus.astype(np.float64)
+            reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+            queries = rng.standard_normal((args.queries, args.dimension))
+            latencies, recalls = [], []
+            for query in queries:
+                start = time.perf_counter()
+                results = store.search(query, args.k)
+                latencies.append(time.perf_counter() - start)
+
+                exact = np.argsort(-(reference @ (query / np.linalg.norm(query))))[:args.k]
+                found = {int(doc.page_content.split("-")[1]) for doc, _ in results}
+                recalls.append(len(found & set(exact.tolist())) / args.k)
+
+            start = time.perf_counter()
+            store.search_many(queries, args.k)
+            batched = (time.perf_counter() - start) / args.queries
+
+            latencies_ms = 1000 * np.array(latencies)
+            print(f"{size:>9} chunks: load {load_seconds:6.1f}s | query p50 {np.percentile(latencies_ms, 50):7.2f} ms, "
+                  f"p95 {np.percentile(latencies_ms, 95):7.2f} ms | batched {1000 * batched:6.2f} ms/query | "
+                  f"recall@{args.k} {np.mean(recalls):.3f}")
+            store.close()
+            del store
+
+
+if __name__ == "__main__":
+    main()
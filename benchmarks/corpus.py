@@ -0,0 +1,66 @@
+"""
+Synthetic document corpora for the ingestion benchmarks.
+"""
+import os
+import random
+
+_WORDS = (
+    "revenue margin guidance equity dividend NIFTY AAPL MSFT 10-K 10-Q earnings outlook "
+    "liquidity leverage cash flow operating segment growth quarter fiscal risk factor "
+    "inflation interest rate capital expenditure buyback valuation multiple"
+).split()
+
+
+def synthetic_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0):
+    """
+    Write a text-only PDF with the given number of pages, without any PDF library.
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1}"] + [synthetic_text(rng, 12) for _ in range(lines_per_page)]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def write_pdf_corpus(directory: str, files: int, pages: int, lines_per_page: int = 40):
+    """
+    Write `files` PDFs of `pages` pages each and return their (path, source) pairs.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for i in range(files):
+        path = os.path.join(directory, f"report_{i:03d}.pdf")
+        write_pdf(path, pages, lines_per_page, seed=i)
+        corpus.append((path, os.path.basename(path)))
+    return corpus
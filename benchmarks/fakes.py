@@ -0,0 +1,306 @@
+"""
+Offline fakes for every external service the API talks to (Groq, Google embeddings,
+Pinecone, Polygon and Tavily), each with configurable latency and error injection.
+
+install_fakes() wires them into the application through the tool registry and the vector
+store factory, so main.app (with its real lifespan, routes, graph, ingestion pipeline and
+caches) runs end to end without network access or API keys.
+"""
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import StructuredTool
+from benchmarks.stubs import StubChatModel
+from vector_store.base import VectorStoreBackend
+
+
+class FakeServiceError(RuntimeError):
+    """
+    Raised by a fake when an error is injected.
+    """
+
+
+@dataclass
+class Faults:
+    """
+    Latency and error injection for one fake service: every call waits latency seconds
+    (plus up to jitter seconds) and fails with probability error_rate.
+    """
+    service: str
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def _draw(self) -> Tuple[float, bool]:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self.jitter * self._rng.random()
+            failed = self._rng.random() < self.error_rate
+            self.errors += failed
+        return delay, failed
+
+    def _raise(self):
+        raise FakeServiceError(f"Injected {self.service} failure")
+
+    def wait(self):
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._raise()
+
+    async def await_(self):
+        delay, failed = self._draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            self._raise()
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "errors": self.errors}
+
+
+_TICKER = re.compile(r"\b[A-Z]{2,5}\b")
+_WEB_WORDS = ("news", "latest", "today", "this week")
+
+
+def scripted_tool_calls(question: str) -> List[dict]:
+    """
+    The tool calls the fake LLM makes for a question: Polygon for up to two tickers it
+    mentions, Tavily for news-like questions, and the retriever for everything.
+    """
+    calls = [("retriever_tool", {"question": question})]
+    calls += [("polygon_financials", {"query": ticker}) for ticker in _TICKER.findall(question)[:2]]
+    if any(word in question.lower() for word in _WEB_WORDS):
+        calls.append(("tavily_search_results_json", {"query": question}))
+    return [{"name": name, "args": args, "id": f"call_{i}_{time.monotonic_ns()}"}
+            for i, (name, args) in enumerate(calls)]
+
+
+class FakeChatModel(StubChatModel):
+    """
+    Chat model that answers each question with scripted tool calls, then a final answer
+    built from the tool results, reporting token usage like a real provider.
+    """
+    faults: Any = None
+
+    def _reply(self, messages) -> AIMessage:
+        prompt_tokens = sum(len(str(m.content)) // 4 for m in messages)
+        if isinstance(messages[-1], ToolMessage):
+            results = [str(m.content)[:60] for m in messages if isinstance(m, ToolMessage)][-3:]
+            content = "Based on the data: " + " | ".join(results)
+            tool_calls = []
+        else:
+            content, tool_calls = "", scripted_tool_calls(str(messages[-1].content))
+        output_tokens = len(content) // 4 + 10 * len(tool_calls)
+        return AIMessage(content=content, tool_calls=tool_calls, usage_metadata={
+            "input_tokens": prompt_tokens, "output_tokens": output_tokens,
+            "total_tokens": prompt_tokens + output_tokens,
+        })
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        self.faults.wait()
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        await self.faults.await_()
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        await self.faults.await_()
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            yield chunk
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic hashed bag-of-words embeddings: texts sharing words get similar vectors.
+    """
+
+    def __init__(self, faults: Faults, dimension: int = 768):
+        self.faults = faults
+        self.dimension = dimension
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimension] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        self.faults.wait()
+        return self._embed(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.faults.wait()
+        return [self._embed(text) for text in texts]
+
+
+class InMemoryVectorStore(VectorStoreBackend):
+    """
+    Brute-force cosine search over a numpy matrix, standing in for Pinecone.
+    """
+
+    def __init__(self, faults: Faults, dimension: int = 768):
+        self.faults = faults
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        self._rows = {}
+        self._documents: List[Document] = []
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+
+    def ensure_ready(self, dimension: int):
+        pass
+
+    def upsert(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], documents: Sequence[Document]):
+        self.faults.wait()
+        self.add_unchecked(ids, vectors, documents)
+
+    def add_unchecked(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], documents: Sequence[Document]):
+        """
+        Upsert without injected latency or errors (for seeding).
+        """
+        with self._lock:
+            new = []
+            for chunk_id, vector, document in zip(ids, vectors, documents):
+                document = Document(page_content=document.page_content, metadata=document.metadata, id=chunk_id)
+                if chunk_id in self._rows:
+                    row = self._rows[chunk_id]
+                    self._vectors[row] = vector
+                    self._documents[row] = document
+                else:
+                    self._rows[chunk_id] = len(self._ids) + len(new)
+                    new.append((chunk_id, vector, document))
+            if new:
+                self._ids += [chunk_id for chunk_id, _, _ in new]
+                self._documents += [document for _, _, document in new]
+                self._vectors = np.vstack([self._vectors, np.asarray([v for _, v, _ in new], dtype=np.float32)])
+
+    def delete(self, ids: Sequence[str]):
+        self.faults.wait()
+        removed = set(ids)
+        with self._lock:
+            keep = [row for row, chunk_id in enumerate(self._ids) if chunk_id not in removed]
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._vectors = self._vectors[keep]
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Document, float]]:
+        self.faults.wait()
+        return self._search_many([vector], k)[0]
+
+    def search_many(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        One round trip (one injected latency) for the whole batch of queries.
+        """
+        self.faults.wait()
+        return self._search_many(vectors, k)
+
+    def _search_many(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        with self._lock:
+            if not self._ids:
+                return [[] for _ in vectors]
+            similarities = np.asarray(vectors, dtype=np.float32) @ self._vectors.T
+            results = []
+            for row_similarities in similarities:
+                top = np.argsort(-row_similarities)[:k]
+                results.append([(self._documents[row], float(row_similarities[row])) for row in top])
+            return results
+
+    def __len__(self):
+        return len(self._ids)
+
+
+def fake_tool(name: str, arg: str, faults: Faults, reply: str) -> StructuredTool:
+    """
+    Async tool with the name and argument of a real one (e.g. polygon_financials).
+    """
+    async def _arun(**kwargs):
+        await faults.await_()
+        return f"{reply} for {kwargs[arg]}"
+
+    def _run(**kwargs):
+        faults.wait()
+        return f"{reply} for {kwargs[arg]}"
+
+    return StructuredTool.from_function(
+        func=_run, coroutine=_arun, name=name, description=f"Offline stand-in for {name}.",
+        args_schema={"type": "object", "properties": {arg: {"type": "string"}}, "required": [arg]},
+    )
+
+
+class FakeModelLoader:
+    """
+    ModelLoader replacement handing out the fake LLM and embeddings; needs no API keys.
+    """
+
+    def __init__(self, llm: FakeChatModel, embeddings: FakeEmbeddings):
+        self.llm = llm
+        self.embeddings = embeddings
+
+    def load_llm(self):
+        return self.llm
+
+    def load_embeddings(self):
+        return self.embeddings
+
+
+@dataclass
+class FakeServices:
+    llm: Faults
+    embeddings: Faults
+    vector_store: Faults
+    polygon: Faults
+    tavily: Faults
+    store: InMemoryVectorStore = None
+
+    def stats(self) -> dict:
+        return {name: getattr(self, name).stats() for name in ("llm", "embeddings", "vector_store", "polygon", "tavily")}
+
+
+def install_fakes(services: FakeServices, config: dict, corpus: Sequence[Document] = ()):
+    """
+    Route the application's LLM, embeddings, vector store, Polygon and Tavily through the
+    fakes. Must run before the app starts (the registry builds real clients on first use).
+    """
+    from toolkit.retrieval_service import RetrievalService
+    from toolkit.tools import registry
+    from vector_store.factory import set_vector_store
+    from vector_store.keyword_index import get_keyword_index
+
+    dimension = config["vector_db"].get("dimension", 768)
+    embeddings = FakeEmbeddings(services.embeddings, dimension)
+    services.store = InMemoryVectorStore(services.vector_store, dimension)
+    if corpus:
+        # Seed the store and keyword index directly, without injected latency or errors
+        ids = [f"seed-{i}" for i in range(len(corpus))]
+        services.store.add_unchecked(ids, [embeddings._embed(d.page_content) for d in corpus], corpus)
+        keyword_index = get_keyword_index(config)
+        if keyword_index is not None:
+            keyword_index.add(ids, corpus)
+    set_vector_store(config, services.store)
+
+    registry.set("model_loader", FakeModelLoader(FakeChatModel(faults=services.llm), embeddings))
+    registry.set("polygon_cache", None)
+    registry.set("financials_tool", fake_tool("polygon_financials", "query", services.polygon, "Financials"))
+    registry.set("tavilytool", fake_tool("tavily_search_results_json", "query", services.tavily, "Search results"))
+    registry.set("retrieval_service", RetrievalService(config=config, embeddings_factory=lambda: embeddings))
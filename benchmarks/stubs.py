@@ -0,0 +1,98 @@
+"""
+Offline stand-ins for the LLM and tools, used by the benchmark scripts.
+"""
+import asyncio
+import json
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import StructuredTool
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that calls one tool on the first turn and answers once a tool result is present.
+    """
+    latency: float = 0.0
+    tool_name: str = "retriever_tool"
+    tool_args: dict = {"question": "stub question"}
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        if messages and isinstance(messages[-1], ToolMessage):
+            return AIMessage(content=f"Answer based on: {str(messages[-1].content)[:80]}")
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": self.tool_name, "args": dict(self.tool_args), "id": f"call_{time.monotonic_ns()}"}],
+        )
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _astream(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        if reply.tool_calls:
+            chunk = AIMessageChunk(content="", tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}
+                for call in reply.tool_calls
+            ])
+            yield ChatGenerationChunk(message=chunk)
+            return
+        for word in reply.content.split(" "):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def make_stub_tools(latency: float = 0.0, sync_only: bool = False):
+    """
+    Return stub versions of the agent's retriever, Polygon and Tavily tools.
+    With sync_only the tools offer no coroutine, like tools wrapping blocking SDKs.
+    """
+
+    def _make(name, arg_name, reply):
+        def _run(**kwargs):
+            if latency:
+                time.sleep(latency)
+            return f"{reply} for {kwargs[arg_name]}"
+
+        async def _arun(**kwargs):
+            if latency:
+                await asyncio.sleep(latency)
+            return f"{reply} for {kwargs[arg_name]}"
+
+        return StructuredTool.from_function(
+            func=_run,
+            coroutine=None if sync_only else _arun,
+            name=name,
+            description=f"Stub {name}.",
+            args_schema={
+                "type": "object",
+                "properties": {arg_name: {"type": "string"}},
+                "required": [arg_name],
+            },
+        )
+
+    return [
+        _make("retriever_tool", "question", "Stub documents"),
+        _make("polygon_financials", "query", "Stub financials"),
+        _make("tavily_search_results_json", "query", "Stub search results"),
+    ]
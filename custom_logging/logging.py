@@ -1,17 +1,37 @@
+import contextvars
 import logging
+import multiprocessing
 import os
 from datetime import datetime
 LOG_DIR=os.path.join(os.getcwd(),'logs')
-os.makedirs(LOG_DIR,exist_ok=True)
 
 LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
 LOG_FILE_PATH=os.path.join(LOG_DIR,LOG_FILE)
 
+# Trace id of the request being handled; set per request by the API and copied into
+# every log record, including records from tasks and worker threads the request starts
+trace_id_var = contextvars.ContextVar("trace_id", default="-")
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-)
+_record_factory = logging.getLogRecordFactory()
 
-logger = logging.getLogger("my_agentic_app")
\ No newline at end of file
+
+def _record_with_trace_id(*args, **kwargs):
+    record = _record_factory(*args, **kwargs)
+    record.trace_id = trace_id_var.get()
+    return record
+
+
+logging.setLogRecordFactory(_record_with_trace_id)
+
+# Spawned worker processes (e.g. document parsing) re-import this module; only the main
+# process creates a log file, so each worker does not leave an empty one behind. The
+# process name is checked because spawn imports the main module before parent_process() is set
+if multiprocessing.current_process().name == "MainProcess":
+    os.makedirs(LOG_DIR,exist_ok=True)
+    logging.basicConfig(
+        filename=LOG_FILE_PATH,
+        format="[ %(asctime)s ] %(lineno)d %(name)s - %(levelname)s - [%(trace_id)s] %(message)s",
+        level=logging.INFO
+    )
+
+logger = logging.getLogger("my_agentic_app")
@@ -0,0 +1,207 @@
+import bisect
+from abc import ABC, abstractmethod
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; request-path operations (nodes, tools, LLM and embedding calls)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds; ingestion stages over whole uploads
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    def __init__(self, registry):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, registry, buckets: Tuple[float, ...]):
+        self._registry = registry
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """
+        Observe the duration of the with-block, also when it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: Sequence[str]):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **labels):
+        """
+        The time series for one combination of label values (created on first use).
+        """
+        key = tuple(map(str, values)) if values else tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        A new time series for one combination of label values.
+        """
+
+    @abstractmethod
+    def _samples(self, key, child) -> List[str]:
+        """
+        Exposition lines of one time series.
+        """
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._samples(key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild(self._registry)
+
+    def _samples(self, key, child):
+        return [f"{self.name}{_label_text(self.labelnames, key)} {child.value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self._registry, self.buckets)
+
+    def _samples(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}")
+        labels = _label_text(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry rendered in the Prometheus text format.
+
+    Counters and histograms are labelled time series updated under a per-series lock, so
+    recording from request handlers, worker threads and the event loop is safe. When the
+    registry is disabled every update returns immediately.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric):
+        self._metrics.setdefault(metric.name, metric)
+        return self._metrics[metric.name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+NODE_SECONDS = registry.histogram(
+    "agent_node_duration_seconds", "Time spent in each agent graph node.", ["node"])
+TOOL_SECONDS = registry.histogram(
+    "agent_tool_duration_seconds", "Duration of agent tool calls.", ["tool", "status"])
+LLM_SECONDS = registry.histogram(
+    "llm_request_duration_seconds", "Duration of LLM calls made by the agent.", ["purpose"])
+TTFT_SECONDS = registry.histogram(
+    "stream_time_to_first_token_seconds", "Time from a streamed query's start to its first answer token.", [])
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "LLM tokens reported by the provider.", ["purpose", "type"])
+EMBEDDING_SECONDS = registry.histogram(
+    "embedding_request_duration_seconds", "Duration of embedding provider calls.", ["operation"])
+EMBEDDED_TEXTS = registry.counter(
+    "embedding_texts_total", "Texts sent to the embedding provider.", ["operation"])
+INGESTION_STAGE_SECONDS = registry.histogram(
+    "ingestion_stage_duration_seconds", "Duration of document ingestion stages.", ["stage"], STAGE_BUCKETS)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests.", ["method", "route", "status"])
+RATE_LIMIT_WAIT_SECONDS = registry.histogram(
+    "rate_limiter_wait_seconds", "Time provider calls waited for the rate limiter.", ["provider", "priority"])
+RATE_LIMITED_TOTAL = registry.counter(
+    "rate_limited_responses_total", "Provider responses that reported a rate limit (429).", ["provider"])
+
+
+def record_llm_usage(message, purpose: str):
+    """
+    Count the input and output tokens of an LLM response that carries usage metadata.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        LLM_TOKENS.labels(purpose, "input").inc(usage.get("input_tokens", 0))
+        LLM_TOKENS.labels(purpose, "output").inc(usage.get("output_tokens", 0))
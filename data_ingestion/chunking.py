@@ -0,0 +1,58 @@
+from typing import Iterable, Iterator
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+class PageChunker:
+    """
+    Split a stream of pages into chunks, one page at a time.
+
+    The last chunk of a page is held back and split again together with the next page of
+    the same source, so chunks overlap across page breaks as they do within a page. A chunk
+    keeps the metadata (source, page) of the page it starts on. Only the current page and
+    the held-back chunk are in memory, however long the document.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, page_separator: str = "\n\n"):
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len
+        )
+        self.page_separator = page_separator
+
+    @classmethod
+    def from_config(cls, ingestion_config: dict) -> "PageChunker":
+        return cls(
+            chunk_size=ingestion_config.get("chunk_size", 1000),
+            chunk_overlap=ingestion_config.get("chunk_overlap", 200),
+        )
+
+    def split(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """
+        Yield the chunks of pages as they are consumed. Pages of a source must be contiguous
+        and in order, as DocumentParser produces them.
+        """
+        carry, carry_metadata = "", None
+        for page in pages:
+            if not page.page_content.strip():
+                continue
+            if carry and page.metadata.get("source") != carry_metadata.get("source"):
+                yield Document(page_content=carry, metadata=dict(carry_metadata))
+                carry = ""
+            text = carry + self.page_separator + page.page_content if carry else page.page_content
+            chunks = self.splitter.split_text(text)
+            # Only the first chunks can start inside the carried text; stop looking once one does not
+            starts, offset = [], 0
+            for chunk in chunks:
+                start = text.find(chunk, offset) if offset < len(carry) else -1
+                starts.append(start if start >= 0 else len(carry))
+                offset = max(start, offset) + 1
+            for chunk, start in zip(chunks[:-1], starts):
+                metadata = carry_metadata if start < len(carry) else page.metadata
+                yield Document(page_content=chunk, metadata=dict(metadata))
+            if starts[-1] >= len(carry):
+                carry_metadata = page.metadata
+            carry = chunks[-1]
+        if carry:
+            yield Document(page_content=carry, metadata=dict(carry_metadata))
@@ -1,42 +1,60 @@
+import itertools
 import os
 import tempfile
-from typing import List
+from typing import Iterable, List, Sequence, Tuple
 from dotenv import load_dotenv
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_pinecone import PineconeVectorStore
+from data_ingestion.chunking import PageChunker
+from data_ingestion.manifest import IngestionManifest, IngestionPlan
+from data_ingestion.parsing import get_document_parser
+from data_ingestion.upsert_pipeline import EmbeddingUpsertPipeline
+from data_ingestion.uploads import spool_uploads
 from utils.model_loader import ModelLoader
+from utils.answer_cache import invalidate_answer_caches
+from vector_store.factory import get_vector_store
+from vector_store.keyword_index import get_keyword_index
 from utils.config_loader import load_config
-from pinecone import ServerlessSpec, Pinecone
 from custom_logging.logging import logger
-from uuid import uuid4
+from custom_logging.metrics import INGESTION_STAGE_SECONDS
 import sys
 from exception.exceptions import TradingBotException
 
 class DataIngestion:
     """
-    Class to handle document loading, transformation, and ingestion into the Pinecone vector store.
+    Class to handle document loading, transformation, and ingestion into the vector store.
     """
 
-    def __init__(self):
+    def __init__(self, model_loader=None):
         try:
             logger.info("Initializing DataIngestion pipeline...")
-            self.model_loader = ModelLoader()
-            self._load_env_variables()
+            # The embedding model comes from the given loader (shared with the agent), or a new ModelLoader
+            self.model_loader = model_loader or ModelLoader()
             self.config = load_config()
+            self._load_env_variables(embedding_key=model_loader is None)
+            ingestion_config = self.config.get("ingestion", {})
+            self.max_upload_bytes = ingestion_config.get("max_upload_mb", 200) * 1024 * 1024
+            self.upload_chunk_size = ingestion_config.get("upload_chunk_kb", 1024) * 1024
+            # Shared, so ingestion jobs reuse one pool of parsing processes
+            self.parser = get_document_parser(ingestion_config)
+            self.chunker = PageChunker.from_config(ingestion_config)
+            self.manifest = IngestionManifest(
+                ingestion_config.get("manifest_path", "cache/ingestion_manifest.sqlite")
+            )
             logger.info("DataIngestion pipeline initialized successfully.")
         except Exception as e:
             logger.error("Failed to initialize DataIngestion pipeline.")
             raise TradingBotException(e, sys)
 
-    def _load_env_variables(self):
+    def _load_env_variables(self, embedding_key: bool = True):
         """
-        Load and validate environment variables required for ingestion.
+        Load and validate environment variables required for ingestion. A model loader passed
+        in has validated its own keys, so the embedding key is only checked for a new one.
         """
         try:
             load_dotenv()
-            required_vars = ["GOOGLE_API_KEY", "PINECONE_API_KEY"]
+            required_vars = ["GOOGLE_API_KEY"] if embedding_key else []
+            if self.config["vector_db"].get("provider", "pinecone") == "pinecone":
+                required_vars.append("PINECONE_API_KEY")
             missing_vars = [var for var in required_vars if os.getenv(var) is None]
 
             if missing_vars:
@@ -54,83 +72,115 @@ class DataIngestion:
         Load and parse uploaded files into LangChain Document objects.
         """
         try:
-            documents = []
-            for uploaded_file in uploaded_files:
-                file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
-                suffix = file_ext if file_ext in [".pdf", ".docx"] else ".tmp"
-
-                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-                    temp_file.write(uploaded_file.file.read())
-                    temp_path = temp_file.name
+            # Spooled uploads live in a temporary directory that is removed even if parsing fails
+            with tempfile.TemporaryDirectory(prefix="ingest_") as spool_dir:
+                files = spool_uploads(uploaded_files, spool_dir, self.max_upload_bytes, self.upload_chunk_size)
+                return self.parse_files(files)
+        except Exception as e:
+            logger.error("Failed to load documents.")
+            raise TradingBotException(e, sys)
 
-                if file_ext == ".pdf":
-                    logger.info(f"Loading PDF file: {uploaded_file.filename}")
-                    loader = PyPDFLoader(temp_path)
-                    documents.extend(loader.load())
-                elif file_ext == ".docx":
-                    logger.info(f"Loading DOCX file: {uploaded_file.filename}")
-                    loader = Docx2txtLoader(temp_path)
-                    documents.extend(loader.load())
-                else:
-                    logger.warning(f"Unsupported file type skipped: {uploaded_file.filename}")
+    def parse_files(self, files: List[Tuple[str, str]]) -> List[Document]:
+        """
+        Parse (path, original filename) pairs into LangChain Document objects.
+        """
+        try:
+            # Parse files (and page ranges of large PDFs) in parallel worker processes
+            with INGESTION_STAGE_SECONDS.labels("parsing").time():
+                documents, failures = self.parser.parse(files)
+            if failures:
+                logger.warning(f"{len(failures)} file(s) could not be parsed and were skipped.")
             logger.info(f"Total documents loaded: {len(documents)}")
             return documents
         except Exception as e:
-            logger.error("Failed to load documents.")
+            logger.error("Failed to parse documents.")
             raise TradingBotException(e, sys)
 
-    def store_in_vector_db(self, documents: List[Document]):
+    def store_in_vector_db(self, documents: Iterable[Document], progress_callback=None,
+                           failures: Sequence[Tuple[str, str]] = ()):
         """
-        Split documents and store embeddings in Pinecone vector store.
+        Split documents and store embeddings in the configured vector store.
+        documents may be a lazy iterator of pages: they are split, embedded and upserted as
+        they arrive, so memory does not grow with the size of the corpus. failures holds the
+        (source, error) of files whose parsing failed part-way; it may grow while documents
+        is consumed, and the chunks already stored for those files are removed again.
+        progress_callback(stage, done, total) is called as the ingestion advances.
+        Returns the number of documents now in the index (new, updated or unchanged).
         """
+        report = progress_callback or (lambda stage, done=None, total=None: None)
+        plan = IngestionPlan()
         try:
-            logger.info("Splitting documents for ingestion...")
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200,
-                length_function=len
-            )
-            documents = text_splitter.split_documents(documents)
-            logger.info(f"Total document chunks created: {len(documents)}")
-
-            logger.info("Connecting to Pinecone...")
-            pinecone_client = Pinecone(api_key=self.pinecone_api_key)
-            index_name = self.config["vector_db"]["index_name"]
+            split_chunks = self.chunker.split(documents)
+            first = next(split_chunks, None)
+            if first is None:
+                logger.warning("No valid documents found for ingestion.")
+                return 0
 
-            # Create index if not exists
-            if index_name not in [i.name for i in pinecone_client.list_indexes()]:
-                logger.info(f"Creating new Pinecone index: {index_name}")
-                pinecone_client.create_index(
-                    name=index_name,
-                    dimension=768,  # Adjust based on embedding model
-                    metric="cosine",
-                    spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-                )
-            else:
-                logger.info(f"Pinecone index '{index_name}' already exists.")
+            vector_db_config = self.config["vector_db"]
+            vector_store = get_vector_store(self.config)
+            vector_store.ensure_ready(vector_db_config.get("dimension", 768))
+            keyword_index = get_keyword_index(self.config)
+            embeddings = self.model_loader.load_embeddings()
 
-            index = pinecone_client.Index(index_name)
-            vector_store = PineconeVectorStore(index=index, embedding=self.model_loader.load_embeddings())
+            def upsert(ids, vectors, chunks):
+                vector_store.upsert(ids, vectors, chunks)
+                if keyword_index is not None:
+                    keyword_index.add(ids, chunks)
 
-            uuids = [str(uuid4()) for _ in range(len(documents))]
-            logger.info("Adding documents to Pinecone vector store...")
-            vector_store.add_documents(documents=documents, ids=uuids)
-            logger.info("Documents successfully ingested into Pinecone.")
+            # Only embed chunks the manifest has not seen; deterministic IDs make re-runs idempotent
+            logger.info("Splitting, embedding and upserting documents into the vector store...")
+            report("embedding", 0, None)
+            pipeline = EmbeddingUpsertPipeline.from_config(
+                self.config.get("ingestion", {}), embeddings.embed_documents, upsert,
+                progress_callback=lambda done, total: report("embedding", done, total),
+            )
+            # Parsing, splitting and embedding overlap, so they are timed as one stage
+            with INGESTION_STAGE_SECONDS.labels("streaming").time():
+                pipeline.run(self.manifest.plan_stream(itertools.chain([first], split_chunks), plan, failures))
+            if plan.stale_ids:
+                report("deleting_stale", 0, len(plan.stale_ids))
+                logger.info(f"Deleting {len(plan.stale_ids)} stale chunks from the vector store...")
+                with INGESTION_STAGE_SECONDS.labels("deleting_stale").time():
+                    vector_store.delete(plan.stale_ids)
+                    if keyword_index is not None:
+                        keyword_index.delete(plan.stale_ids)
+            self.manifest.commit(plan)
+            if plan.new_chunk_count or plan.stale_ids:
+                # Cached answers built from the old documents are out of date
+                invalidate_answer_caches("retriever_tool")
+            logger.info("Documents successfully ingested into the vector store.")
+            return len(plan.records) + len(plan.unchanged_sources)
         except Exception as e:
+            self.manifest.discard(plan)
             logger.error("Failed to store documents in vector database.")
             raise TradingBotException(e, sys)
 
+    def ingest_files(self, files: List[Tuple[str, str]], progress_callback=None) -> dict:
+        """
+        Parse already spooled (path, original filename) pairs page by page and store them.
+        Returns the number of documents stored and the (source, error) of files that failed.
+        """
+        try:
+            if progress_callback:
+                progress_callback("parsing")
+            failures = []
+            stored = self.store_in_vector_db(self.parser.iter_parse(files, failures), progress_callback, failures)
+            if failures:
+                logger.warning(f"{len(failures)} file(s) could not be parsed and were skipped.")
+            return {"stored_documents": stored, "failed_files": failures}
+        except Exception as e:
+            logger.error("Ingestion of spooled files failed.")
+            raise TradingBotException(e, sys)
+
     def run_pipeline(self, uploaded_files):
         """
         Execute the full ingestion pipeline: load, split, and store.
         """
         try:
             logger.info("Running data ingestion pipeline...")
-            documents = self.load_documents(uploaded_files)
-            if not documents:
-                logger.warning("No valid documents found for ingestion.")
-                return
-            self.store_in_vector_db(documents)
+            with tempfile.TemporaryDirectory(prefix="ingest_") as spool_dir:
+                files = spool_uploads(uploaded_files, spool_dir, self.max_upload_bytes, self.upload_chunk_size)
+                self.ingest_files(files)
             logger.info("Data ingestion pipeline completed successfully.")
         except Exception as e:
             logger.error("Data ingestion pipeline failed.")
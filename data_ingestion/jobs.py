@@ -0,0 +1,202 @@
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import List, Optional
+from data_ingestion.uploads import spool_uploads
+from utils.rate_limiter import bulk_priority
+from custom_logging.logging import logger, trace_id_var
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+
+
+class JobStore:
+    """
+    SQLite-backed record of ingestion jobs, so job state survives restarts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT, done INTEGER, total INTEGER, "
+                "error TEXT, files TEXT NOT NULL, spool_dir TEXT NOT NULL, created_at REAL, updated_at REAL, "
+                "failed_files TEXT)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, job_id: str, files: list, spool_dir: str):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, files, spool_dir, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, QUEUED, json.dumps(files), spool_dir, now, now),
+            )
+
+    def update(self, job_id: str, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["files"] = [name for _, name in json.loads(job["files"])]
+        job["failed_files"] = [{"file": name, "error": error}
+                               for name, error in json.loads(job["failed_files"] or "[]")]
+        return job
+
+    def unfinished(self) -> List[dict]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def files(self, job_id: str) -> list:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT files FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return [tuple(pair) for pair in json.loads(row[0])]
+
+
+class IngestionJobQueue:
+    """
+    Background ingestion: uploads are spooled to disk and queued as jobs, and a fixed pool
+    of worker threads runs them. On start-up, jobs left queued or running by a previous
+    process are resumed (ingestion is idempotent thanks to the manifest) or failed if
+    their spooled files are gone.
+    """
+
+    def __init__(self, store_path: str, spool_root: str, max_concurrency: int = 2,
+                 max_upload_bytes: int = 0, upload_chunk_size: int = 1024 * 1024, ingestion_factory=None):
+        self.store = JobStore(store_path)
+        self.spool_root = spool_root
+        self.max_concurrency = max_concurrency
+        self.max_upload_bytes = max_upload_bytes
+        self.upload_chunk_size = upload_chunk_size
+        self._ingestion_factory = ingestion_factory
+        self._queue = queue.Queue()
+        self._workers = []
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_config(cls, config: dict, ingestion_factory):
+        jobs_config = config.get("jobs", {})
+        ingestion_config = config.get("ingestion", {})
+        return cls(
+            store_path=jobs_config.get("store_path", "cache/jobs.sqlite"),
+            spool_root=jobs_config.get("spool_dir", "cache/uploads"),
+            max_concurrency=jobs_config.get("max_concurrency", 2),
+            max_upload_bytes=ingestion_config.get("max_upload_mb", 200) * 1024 * 1024,
+            upload_chunk_size=ingestion_config.get("upload_chunk_kb", 1024) * 1024,
+            ingestion_factory=ingestion_factory,
+        )
+
+    def start(self):
+        """
+        Re-queue unfinished jobs from the store and start the worker threads.
+        """
+        for job in self.store.unfinished():
+            if os.path.isdir(job["spool_dir"]):
+                logger.info("Resuming ingestion job %s (was %s).", job["id"], job["status"])
+                self.store.update(job["id"], status=QUEUED, stage="resumed")
+                self._queue.put(job["id"])
+            else:
+                logger.warning("Failing ingestion job %s: spooled files are missing.", job["id"])
+                self.store.update(job["id"], status=FAILED, error="Spooled files were lost before the job ran.")
+
+        for i in range(self.max_concurrency):
+            worker = threading.Thread(target=self._work, name=f"ingestion-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        logger.info("Ingestion job queue started with %d workers.", self.max_concurrency)
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop taking new jobs. Jobs still running are resumed on the next start.
+        """
+        self._stopping.set()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def submit(self, uploaded_files) -> str:
+        """
+        Spool uploads into a per-job directory and queue the job. Returns the job id.
+        """
+        job_id = uuid.uuid4().hex
+        spool_dir = os.path.join(self.spool_root, job_id)
+        os.makedirs(spool_dir, exist_ok=True)
+        files = spool_uploads(uploaded_files, spool_dir, self.max_upload_bytes, self.upload_chunk_size)
+        if not files:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            raise ValueError("No supported files to ingest.")
+
+        self.store.create(job_id, files, spool_dir)
+        self._queue.put(job_id)
+        logger.info("Queued ingestion job %s with %d files.", job_id, len(files))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is not None:
+            job.pop("spool_dir", None)
+        return job
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            # Log lines of a job carry its id as the trace id; its provider calls queue behind /query
+            token = trace_id_var.set(job_id)
+            try:
+                with bulk_priority():
+                    self._run(job_id)
+            finally:
+                trace_id_var.reset(token)
+
+    def _run(self, job_id: str):
+        job = self.store.get(job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return
+        logger.info("Running ingestion job %s.", job_id)
+        self.store.update(job_id, status=RUNNING, stage="starting", error=None)
+
+        def progress(stage, done=None, total=None):
+            self.store.update(job_id, stage=stage, done=done, total=total)
+
+        try:
+            result = self._ingestion_factory().ingest_files(self.store.files(job_id), progress_callback=progress)
+        except Exception as e:
+            logger.error("Ingestion job %s failed: %s", job_id, str(e), exc_info=True)
+            self.store.update(job_id, status=FAILED, error=str(e))
+        else:
+            failed_files = json.dumps(result["failed_files"])
+            if not result["stored_documents"]:
+                error = ("None of the files could be parsed." if result["failed_files"]
+                         else "The files contain no extractable text.")
+                logger.error("Ingestion job %s stored no documents: %s", job_id, error)
+                self.store.update(job_id, status=FAILED, error=error, failed_files=failed_files)
+            else:
+                logger.info("Ingestion job %s completed (%d documents, %d files failed).",
+                            job_id, result["stored_documents"], len(result["failed_files"]))
+                self.store.update(job_id, status=COMPLETED, stage=COMPLETED, failed_files=failed_files)
+        shutil.rmtree(job["spool_dir"], ignore_errors=True)
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Sequence, Set, Tuple
+from langchain_core.documents import Document
+from custom_logging.logging import logger
+
+
+def make_chunk_id(source: str, text: str) -> str:
+    """
+    Deterministic chunk ID derived from the document source and the chunk text.
+    """
+    return hashlib.sha256(f"{source}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestionPlan:
+    """
+    What an ingestion run has to do to bring the index in line with the documents.
+    """
+    new_chunks: List[Tuple[str, Document]] = field(default_factory=list)
+    stale_ids: List[str] = field(default_factory=list)
+    unchanged_sources: List[str] = field(default_factory=list)
+    # source -> (content hash, chunk count) for every changed document; its chunk IDs are
+    # staged in the manifest's pending_chunks table under plan_id until commit()
+    records: Dict[str, Tuple[str, int]] = field(default_factory=dict)
+    new_chunk_count: int = 0
+    plan_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+class IngestionManifest:
+    """
+    Local SQLite record of which documents and chunks are already in the vector index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(source TEXT PRIMARY KEY, content_hash TEXT NOT NULL, chunk_count INTEGER, updated_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks "
+                "(source TEXT NOT NULL, chunk_id TEXT NOT NULL, PRIMARY KEY (source, chunk_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending_chunks "
+                "(plan_id TEXT NOT NULL, source TEXT NOT NULL, chunk_id TEXT NOT NULL, created_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pending_chunks_plan ON pending_chunks (plan_id, source)")
+            # Rows left behind by runs that died before commit() or discard()
+            conn.execute("DELETE FROM pending_chunks WHERE created_at < ?", (time.time() - 86400,))
+
+    def _connect(self):
+        # One short-lived connection per call keeps the manifest safe to use from several threads
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _indexed(self, source: str) -> Tuple[str, Set[str]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT content_hash FROM documents WHERE source = ?", (source,)).fetchone()
+            ids = {r[0] for r in conn.execute("SELECT chunk_id FROM chunks WHERE source = ?", (source,))}
+        return (row[0] if row else None), ids
+
+    def plan(self, chunks: List[Document]) -> IngestionPlan:
+        """
+        Work out which chunks need embedding and which indexed chunks are now stale.
+        Chunks are grouped by their "source" metadata; repeated chunks within a source are dropped.
+        """
+        by_source = OrderedDict()
+        for chunk in chunks:
+            by_source.setdefault(str(chunk.metadata.get("source", "")), []).append(chunk)
+        plan = IngestionPlan()
+        plan.new_chunks = list(self.plan_stream(
+            (chunk for source_chunks in by_source.values() for chunk in source_chunks), plan))
+        return plan
+
+    def plan_stream(self, chunks: Iterable[Document], plan: IngestionPlan,
+                    failures: Sequence[Tuple[str, str]] = ()) -> Iterator[Tuple[str, Document]]:
+        """
+        Streaming plan(): yield the (id, chunk) pairs that need embedding as chunks arrive, and
+        fill in plan once chunks is exhausted. Chunks of a source must be contiguous; only the
+        IDs of the current source are kept in memory, the rest are staged in the manifest.
+        Sources in failures (which may grow while chunks is consumed) are left as they were
+        indexed, and the chunks already yielded for them are marked stale.
+        """
+        finished = OrderedDict()  # source -> (content hash, indexed hash, stale ids, chunk count)
+        source, ids, indexed_ids, indexed_hash = None, None, set(), None
+
+        def finish():
+            content_hash = hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+            finished[source] = (content_hash, indexed_hash, sorted(indexed_ids - ids.keys()), len(ids))
+            if content_hash == indexed_hash:
+                return
+            now = time.time()
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "INSERT INTO pending_chunks (plan_id, source, chunk_id, created_at) VALUES (?, ?, ?, ?)",
+                    [(plan.plan_id, source, chunk_id, now) for chunk_id in ids],
+                )
+
+        for chunk in chunks:
+            chunk_source = str(chunk.metadata.get("source", ""))
+            if chunk_source != source:
+                if source is not None:
+                    finish()
+                if chunk_source in finished:
+                    raise ValueError(f"Chunks of {chunk_source} are not contiguous")
+                source, ids = chunk_source, OrderedDict()
+                indexed_hash, indexed_ids = self._indexed(source)
+            chunk_id = make_chunk_id(source, chunk.page_content)
+            if chunk_id in ids:
+                continue
+            ids[chunk_id] = None
+            if chunk_id not in indexed_ids:
+                plan.new_chunk_count += 1
+                yield chunk_id, chunk
+        if source is not None:
+            finish()
+
+        failed = {failed_source for failed_source, _ in failures}
+        for source, (content_hash, indexed_hash, stale_ids, count) in finished.items():
+            if source in failed:
+                _, indexed_ids = self._indexed(source)
+                plan.stale_ids.extend(chunk_id for chunk_id in self._pending(plan, source)
+                                      if chunk_id not in indexed_ids)
+            elif indexed_hash == content_hash:
+                plan.unchanged_sources.append(source)
+            else:
+                plan.stale_ids.extend(stale_ids)
+                plan.records[source] = (content_hash, count)
+
+        logger.info("Ingestion plan: %d new chunks, %d stale chunks, %d unchanged documents",
+                    plan.new_chunk_count, len(plan.stale_ids), len(plan.unchanged_sources))
+
+    def _pending(self, plan: IngestionPlan, source: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT chunk_id FROM pending_chunks WHERE plan_id = ? AND source = ?", (plan.plan_id, source))]
+
+    def commit(self, plan: IngestionPlan):
+        """
+        Record the documents of a plan as indexed. Call only after the index has been updated.
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            for source, (content_hash, count) in plan.records.items():
+                conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+                conn.execute(
+                    "INSERT INTO chunks (source, chunk_id) "
+                    "SELECT source, chunk_id FROM pending_chunks WHERE plan_id = ? AND source = ?",
+                    (plan.plan_id, source),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (source, content_hash, chunk_count, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (source, content_hash, count, now),
+                )
+            conn.execute("DELETE FROM pending_chunks WHERE plan_id = ?", (plan.plan_id,))
+
+    def discard(self, plan: IngestionPlan):
+        """
+        Drop the staged chunk IDs of a plan that will not be committed.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM pending_chunks WHERE plan_id = ?", (plan.plan_id,))
@@ -0,0 +1,209 @@
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Tuple
+from langchain_core.documents import Document
+from langchain_community.document_loaders import Docx2txtLoader
+from pypdf import PdfReader
+from custom_logging.logging import logger
+
+# Parsing tasks run in worker processes, so they are module-level functions that take
+# and return picklable values.
+
+
+def count_pdf_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def parse_pdf_pages(path: str, source: str, start: int, end: int) -> List[Document]:
+    """
+    Extract pages [start, end) of a PDF, one Document per page.
+    """
+    reader = PdfReader(path)
+    return [
+        Document(page_content=reader.pages[page].extract_text(), metadata={"source": source, "page": page})
+        for page in range(start, end)
+    ]
+
+
+def parse_docx(path: str, source: str) -> List[Document]:
+    documents = Docx2txtLoader(path).load()
+    for document in documents:
+        document.metadata["source"] = source
+    return documents
+
+
+def _run_task(task):
+    """
+    Run one parsing task, returning its error instead of raising so one bad file cannot abort the batch.
+    """
+    func, args = task
+    try:
+        return func(*args), None
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+
+class DocumentParser:
+    """
+    Parse PDF and DOCX files in a process pool.
+
+    Large PDFs are split into page ranges that are parsed in parallel. Output keeps the
+    input file order and page order, and a file that fails to parse is logged and left out.
+    The pool is started on first use and reused until close().
+    """
+
+    def __init__(self, max_workers: int = None, pages_per_task: int = 20, parallel_min_pages: int = 40):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.parallel_min_pages = parallel_min_pages
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawned, not forked: parsing runs on job threads of a multi-threaded server, and
+                # a forked child can inherit a lock (logging, sqlite, httpx) another thread holds
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        """
+        Drop a pool whose worker died, so the next parse starts a new one.
+        """
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _plan(self, path: str, source: str, file_ext: str):
+        """
+        Return the parsing tasks for one file.
+        """
+        if file_ext == ".docx":
+            return [(parse_docx, (path, source))]
+
+        pages = count_pdf_pages(path)
+        step = self.pages_per_task if pages >= self.parallel_min_pages else max(pages, 1)
+        return [(parse_pdf_pages, (path, source, start, min(start + step, pages))) for start in range(0, pages, step)]
+
+    def _plan_files(self, files: List[Tuple[str, str]]):
+        """
+        Return the parsing tasks of all files, the source each task belongs to, and the
+        files that could not be planned.
+        """
+        tasks, owners, failures = [], [], {}
+        for path, source in files:
+            file_ext = os.path.splitext(source)[1].lower()
+            try:
+                file_tasks = self._plan(path, source, file_ext)
+            except Exception as e:
+                failures[source] = f"{type(e).__name__}: {e}"
+                continue
+            tasks.extend(file_tasks)
+            owners.extend([source] * len(file_tasks))
+        return tasks, owners, failures
+
+    def parse(self, files: List[Tuple[str, str]]) -> Tuple[List[Document], List[Tuple[str, str]]]:
+        """
+        Parse (path, source) pairs. Returns the documents and the (source, error) of files that failed.
+        """
+        tasks, owners, failures = self._plan_files(files)
+
+        workers = min(self.max_workers, len(tasks))
+        results = list(self._run_in_order(tasks, workers))
+
+        for source, (_, error) in zip(owners, results):
+            if error and source not in failures:
+                failures[source] = error
+
+        documents = []
+        for source, (docs, _) in zip(owners, results):
+            if source not in failures:
+                documents.extend(docs)
+
+        for source, error in failures.items():
+            logger.error("Failed to parse %s, skipping it: %s", source, error)
+        logger.info("Parsed %d files into %d documents using %d workers.",
+                    len(files) - len(failures), len(documents), max(workers, 1))
+        return documents, list(failures.items())
+
+    def iter_parse(self, files: List[Tuple[str, str]], failures: List[Tuple[str, str]]) -> Iterator[Document]:
+        """
+        parse() as a generator: documents come out in order as their tasks finish, with at most
+        two tasks per worker in flight, so only a few page ranges are held at a time. A file that
+        fails stops yielding pages (earlier ones may already be out) and its (source, error) is
+        appended to failures.
+        """
+        tasks, owners, planning_failures = self._plan_files(files)
+        failures.extend(planning_failures.items())
+        for source, error in planning_failures.items():
+            logger.error("Failed to parse %s, skipping it: %s", source, error)
+
+        failed, count = set(planning_failures), 0
+        workers = min(self.max_workers, len(tasks))
+        for source, (docs, error) in zip(owners, self._run_in_order(tasks, workers)):
+            if source in failed:
+                continue
+            if error:
+                failed.add(source)
+                failures.append((source, error))
+                logger.error("Failed to parse %s, skipping it: %s", source, error)
+                continue
+            count += len(docs)
+            yield from docs
+        logger.info("Parsed %d files into %d documents using %d workers.",
+                    len(files) - len(failed), count, max(workers, 1))
+
+    def _run_in_order(self, tasks, workers: int):
+        """
+        Yield task results in task order, keeping at most 2 * workers tasks in flight.
+        """
+        if workers <= 1:
+            for task in tasks:
+                yield _run_task(task)
+            return
+        pool = self._executor()
+        remaining = iter(tasks)
+        in_flight = deque()
+        try:
+            in_flight.extend(pool.submit(_run_task, task) for task in itertools.islice(remaining, 2 * workers))
+            while in_flight:
+                result = in_flight.popleft().result()
+                for task in itertools.islice(remaining, 1):
+                    in_flight.append(pool.submit(_run_task, task))
+                yield result
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+_shared_parsers = {}
+_shared_parsers_lock = threading.Lock()
+
+
+def get_document_parser(ingestion_config: dict) -> DocumentParser:
+    """
+    Return the process-wide parser for a configuration, so ingestion jobs share one worker pool.
+    """
+    key = (ingestion_config.get("parse_workers"), ingestion_config.get("pdf_pages_per_task", 20),
+           ingestion_config.get("pdf_parallel_min_pages", 40))
+    with _shared_parsers_lock:
+        if key not in _shared_parsers:
+            _shared_parsers[key] = DocumentParser(max_workers=key[0], pages_per_task=key[1], parallel_min_pages=key[2])
+        return _shared_parsers[key]
@@ -0,0 +1,55 @@
+import os
+from typing import List, Tuple
+from custom_logging.logging import logger
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+SUPPORTED_EXTENSIONS = [".pdf", ".docx"]
+
+
+def spool_upload(stream, path: str, max_bytes: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Copy an upload stream to `path` in fixed-size chunks, so memory use does not depend
+    on the file size. Raises ValueError and removes the partial file if the upload is
+    larger than max_bytes. Returns the number of bytes written.
+    """
+    written = 0
+    try:
+        with open(path, "wb") as out:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise ValueError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+                out.write(chunk)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    logger.debug("Spooled %d bytes to %s", written, path)
+    return written
+
+
+def spool_uploads(uploaded_files, spool_dir: str, max_bytes: int,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Tuple[str, str]]:
+    """
+    Spool every supported upload into spool_dir. Returns (path, original filename) pairs;
+    unsupported and oversized files are logged and skipped.
+    """
+    files = []
+    for index, uploaded_file in enumerate(uploaded_files):
+        file_ext = os.path.splitext(uploaded_file.filename)[1].lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            logger.warning(f"Unsupported file type skipped: {uploaded_file.filename}")
+            continue
+
+        # Stream the upload to disk in chunks instead of reading it into memory
+        path = os.path.join(spool_dir, f"{index}{file_ext}")
+        try:
+            spool_upload(uploaded_file.file, path, max_bytes, chunk_size)
+        except ValueError as e:
+            logger.error(f"Upload skipped: {uploaded_file.filename}: {e}")
+            continue
+        files.append((path, uploaded_file.filename))
+    return files
@@ -0,0 +1,158 @@
+import contextvars
+import queue
+import threading
+import time
+from typing import Iterable, List, Tuple
+from langchain_core.documents import Document
+from utils.retry import retry_with_backoff
+from custom_logging.logging import logger
+
+_DONE = object()
+
+
+class EmbeddingUpsertPipeline:
+    """
+    Pipelined embedding and upsert stage for ingestion.
+
+    Chunks are grouped into embedding batches on a bounded queue, embedded by embedding
+    workers, and handed over another bounded queue to concurrent upsert workers. Full
+    queues block the stage feeding them, so memory stays bounded however many chunks
+    flow through. Failed batches are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, embed_fn, upsert_fn, batch_size: int = 64, embed_workers: int = 2,
+                 upsert_workers: int = 4, queue_size: int = 8, max_retries: int = 5,
+                 retry_base_delay: float = 1.0, retry_max_delay: float = 30.0, progress_callback=None):
+        """
+        embed_fn(texts) -> vectors; upsert_fn(ids, vectors, documents) -> None;
+        progress_callback(done_chunks, total_chunks) is called after every upserted batch.
+        """
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.batch_size = batch_size
+        self.embed_workers = embed_workers
+        self.upsert_workers = upsert_workers
+        self.queue_size = queue_size
+        self.retry_options = {"max_retries": max_retries, "base_delay": retry_base_delay,
+                              "max_delay": retry_max_delay}
+        self.progress_callback = progress_callback
+
+    @classmethod
+    def from_config(cls, ingestion_config: dict, embed_fn, upsert_fn, progress_callback=None):
+        return cls(
+            embed_fn,
+            upsert_fn,
+            batch_size=ingestion_config.get("embed_batch_size", 64),
+            embed_workers=ingestion_config.get("embed_workers", 2),
+            upsert_workers=ingestion_config.get("upsert_workers", 4),
+            queue_size=ingestion_config.get("pipeline_queue_size", 8),
+            max_retries=ingestion_config.get("max_retries", 5),
+            retry_base_delay=ingestion_config.get("retry_base_delay", 1.0),
+            retry_max_delay=ingestion_config.get("retry_max_delay", 30.0),
+            progress_callback=progress_callback,
+        )
+
+    def run(self, chunks: Iterable[Tuple[str, Document]], total: int = None) -> dict:
+        """
+        Embed and upsert (id, document) pairs. Raises the first error that exhausts its retries.
+        """
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue = queue.Queue(maxsize=self.queue_size)
+        abort = threading.Event()
+        errors = []
+        progress = {"done": 0}
+        progress_lock = threading.Lock()
+        start = time.perf_counter()
+
+        def put(target: queue.Queue, item) -> bool:
+            # Block while the next stage is behind, but give up if the pipeline aborts
+            while not abort.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fail(e: Exception):
+            errors.append(e)
+            abort.set()
+
+        def embed_worker():
+            while True:
+                batch = embed_queue.get()
+                if batch is _DONE:
+                    return
+                if abort.is_set():
+                    continue
+                try:
+                    vectors = retry_with_backoff(
+                        self.embed_fn, [doc.page_content for _, doc in batch],
+                        description=f"Embedding batch of {len(batch)}", **self.retry_options,
+                    )
+                    put(upsert_queue, (batch, vectors))
+                except Exception as e:
+                    fail(e)
+
+        def upsert_worker():
+            while True:
+                item = upsert_queue.get()
+                if item is _DONE:
+                    return
+                if abort.is_set():
+                    continue
+                batch, vectors = item
+                try:
+                    retry_with_backoff(
+                        self.upsert_fn, [chunk_id for chunk_id, _ in batch], vectors, [doc for _, doc in batch],
+                        description=f"Upserting batch of {len(batch)}", **self.retry_options,
+                    )
+                except Exception as e:
+                    fail(e)
+                    continue
+                with progress_lock:
+                    progress["done"] += len(batch)
+                    done = progress["done"]
+                elapsed = time.perf_counter() - start
+                logger.info("Ingested %d/%s chunks (%.1f chunks/s)", done, total or "?", done / max(elapsed, 1e-9))
+                if self.progress_callback:
+                    self.progress_callback(done, total)
+
+        # Workers run in copies of the caller's context, keeping its trace id and rate-limit priority
+        embedders = [threading.Thread(target=contextvars.copy_context().run, args=(embed_worker,), daemon=True)
+                     for _ in range(self.embed_workers)]
+        upserters = [threading.Thread(target=contextvars.copy_context().run, args=(upsert_worker,), daemon=True)
+                     for _ in range(self.upsert_workers)]
+        for thread in embedders + upserters:
+            thread.start()
+
+        try:
+            batch: List[Tuple[str, Document]] = []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) == self.batch_size:
+                    if not put(embed_queue, batch):
+                        break
+                    batch = []
+            if batch:
+                put(embed_queue, batch)
+        finally:
+            # Shut the stages down in order; queued work drains first unless aborted
+            for _ in embedders:
+                embed_queue.put(_DONE)
+            for thread in embedders:
+                thread.join()
+            for _ in upserters:
+                upsert_queue.put(_DONE)
+            for thread in upserters:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - start
+        stats = {"chunks": progress["done"], "seconds": elapsed,
+                 "chunks_per_second": progress["done"] / elapsed if elapsed else 0.0}
+        logger.info("Embedding/upsert pipeline finished: %d chunks in %.2fs (%.1f chunks/s)",
+                    stats["chunks"], elapsed, stats["chunks_per_second"])
+        return stats
@@ -1,7 +1,11 @@
 from pydantic import BaseModel
 from langgraph.graph.message import add_messages
-from typing import Annotated, TypedDict
+from typing import Annotated, List, Optional, TypedDict
 class RagToolSchema(BaseModel):
     question:str 
 class QuestionRequest(BaseModel):
-    question: str
\ No newline at end of file
+    question: str
+    thread_id: Optional[str] = None  # continue this conversation session; a new one is started if empty
+class BatchQuestionRequest(BaseModel):
+    questions: List[str]  # independent questions, each answered in a new conversation session
+    max_concurrency: Optional[int] = None  # graph runs at a time; capped by batch.max_concurrency in config
@@ -1,13 +1,135 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
 from fastapi import FastAPI, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from data_ingestion.ingestion_pipeline import DataIngestion  # Handles data ingestion and storage
-from agent.workflow import GraphBuilder  # Manages the LLM workflow or agent stream
+from data_ingestion.jobs import IngestionJobQueue  # Background ingestion jobs
+from agent.runtime import AgentRuntime  # Shared, application-lifespan agent graph
+from agent.streaming import (  # Server-Sent Events for token streaming and batch results
+    batch_done_frame, batch_result_frame, cached_answer_frame, stream_answer,
+)
+from agent.sessions import SessionStore  # Thread-id conversation sessions (LangGraph checkpointer)
+from toolkit.tools import registry as tool_registry  # Shared, lazily built tool state
+from toolkit.retrieval_service import primed_retrieval  # Batch retrieval reused by the agent
 from data_models.models import *  # Includes data schemas like QuestionRequest
-from custom_logging.logging import logger  # Custom logger for application-level logging
+from utils.config_loader import load_config
+from utils.embedding_cache import embedding_cache_stats
+from utils.answer_cache import AnswerCache, register_answer_cache, tools_used
+from utils.rate_limiter import bulk_priority, rate_limiter_stats, retry_after_seconds
+from utils.retry import is_rate_limit_error
+from langchain_core.messages import AIMessage, HumanMessage
+from custom_logging.logging import logger, trace_id_var  # Custom logger for application-level logging
+from custom_logging import metrics  # Prometheus-format latency histograms and counters
+
+
+async def _watch_config(runtime: AgentRuntime, interval: float):
+    """
+    Periodically reload the agent runtime when config.yaml changes.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(runtime.reload_if_changed)
+        except Exception as e:
+            logger.error("Config hot-reload failed: %s", str(e), exc_info=True)
+
+
+async def _evict_idle_sessions(session_store: SessionStore, interval: float):
+    """
+    Periodically delete conversation sessions that have been idle for too long.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await session_store.evict_idle()
+        except Exception as e:
+            logger.error("Session eviction failed: %s", str(e), exc_info=True)
+
+
+def _warm_up_retrieval():
+    """
+    Build the retrieval service and open its vector store and embeddings clients.
+    """
+    tool_registry.get("retrieval_service").warm_up()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the agent runtime and start the ingestion job queue once at startup.
+    """
+    config = load_config()
+    runtime_config = config.get("runtime", {})
+
+    metrics_config = config.get("metrics", {})
+    metrics.registry.enabled = metrics_config.get("enabled", True)
+    app.state.trace_ids = metrics_config.get("trace_ids", True)
+
+    # Sync-only tools and blocking helpers run here instead of on the event loop
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(
+            max_workers=runtime_config.get("thread_pool_size", 16),
+            thread_name_prefix="agent-worker",
+        )
+    )
+
+    # Conversation sessions: state is checkpointed per thread_id in a local SQLite file
+    sessions_config = config.get("sessions", {})
+    session_store = None
+    background_tasks = []
+    if sessions_config.get("enabled", False):
+        session_store = await SessionStore.from_config(sessions_config).open()
+        background_tasks.append(asyncio.create_task(
+            _evict_idle_sessions(session_store, sessions_config.get("eviction_interval_seconds", 600))
+        ))
+    app.state.session_store = session_store
+
+    runtime = AgentRuntime(checkpointer=session_store.checkpointer if session_store else None)
+    runtime.add_warm_up_hook(_warm_up_retrieval)
+    if runtime_config.get("warm_up", True):
+        await asyncio.to_thread(runtime.warm_up)
+    app.state.agent_runtime = runtime
+
+    # Semantic cache of final answers for paraphrased questions
+    answer_cache_config = config.get("answer_cache", {})
+    app.state.answer_cache = None
+    if answer_cache_config.get("enabled", False):
+        embeddings = tool_registry.get("model_loader").load_embeddings()
+        app.state.answer_cache = register_answer_cache(
+            AnswerCache.from_config(answer_cache_config, embeddings.embed_query)
+        )
+
+    # Ingestion runs in background workers so uploads never hold up /query
+    job_queue = IngestionJobQueue.from_config(
+        config, ingestion_factory=lambda: DataIngestion(model_loader=tool_registry.get("model_loader"))
+    )
+    job_queue.start()
+    app.state.job_queue = job_queue
+
+    # Prewarm Polygon financials for the watchlist without delaying startup
+    polygon_config = config["tools"].get("polygon", {})
+    if tool_registry.get("polygon_cache") is not None and polygon_config.get("watchlist"):
+        asyncio.get_running_loop().run_in_executor(
+            None, tool_registry.get("financials_tool").prewarm, polygon_config["watchlist"], polygon_config.get("prewarm_workers", 2)
+        )
 
-app = FastAPI()
+    poll_seconds = runtime_config.get("config_poll_seconds", 0)
+    if poll_seconds:
+        background_tasks.append(asyncio.create_task(_watch_config(runtime, poll_seconds)))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    job_queue.stop()
+    if session_store is not None:
+        await session_store.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS to allow cross-origin requests (use specific origins in production!)
 app.add_middleware(
@@ -18,43 +140,136 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """
+    Record request latency by route, and tag the request's log lines with a trace id
+    (taken from an incoming X-Request-ID header, or generated) that is echoed back.
+    """
+    token = None
+    if getattr(request.app.state, "trace_ids", False):
+        trace_id = request.headers.get("x-request-id", "")[:64] or uuid.uuid4().hex[:16]
+        token = trace_id_var.set(trace_id)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        if token is not None:
+            response.headers["X-Request-ID"] = trace_id
+        return response
+    finally:
+        # For streamed responses this is the time until the response starts
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.labels(
+            request.method, route.path if route is not None else "unmatched", status
+        ).observe(time.perf_counter() - start)
+        if token is not None:
+            trace_id_var.reset(token)
+
 @app.post('/upload')
-async def upload_files(files: List[UploadFile] = File(...)):
+async def upload_files(http_request: Request, files: List[UploadFile] = File(...)):
     """
-    Endpoint to upload and ingest files (e.g., PDFs, docs) into the vector store.
+    Endpoint to upload files (e.g., PDFs, docs) for ingestion into the vector store.
+    Files are spooled to disk and ingested by a background job; poll /jobs/{job_id} for progress.
     """
     try:
         logger.info("Received %d files for ingestion.", len(files))
+        job_id = await asyncio.to_thread(http_request.app.state.job_queue.submit, files)
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
 
-        ingestion = DataIngestion()
-        ingestion.run_pipeline(files)
-
-        logger.info("Files successfully processed and stored.")
-        return {"message": "Files successfully processed and stored."}
-    
+    except ValueError as e:
+        logger.warning("Rejected upload: %s", str(e))
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
         logger.error("Error during file upload: %s", str(e), exc_info=True)
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, http_request: Request):
+    """
+    Endpoint reporting the stage, progress and error of an ingestion job.
+    """
+    job = await asyncio.to_thread(http_request.app.state.job_queue.get, job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job id: {job_id}"})
+    return job
+
+
+async def _lookup_answer(http_request: Request, request: QuestionRequest):
+    """
+    Look up a cached answer for a question that starts a new conversation.
+    Returns (cached entry or None, question vector or None).
+    """
+    answer_cache = http_request.app.state.answer_cache
+    # Follow-up questions depend on the conversation so far, so only new conversations use the cache
+    if answer_cache is None or request.thread_id:
+        return None, None
+    try:
+        vector = await asyncio.to_thread(answer_cache.embed, request.question)
+        return answer_cache.lookup(request.question, vector), vector
+    except Exception as e:
+        logger.warning("Answer cache lookup failed: %s", str(e))
+        return None, None
+
+
+def _store_answer(http_request: Request, question: str, vector, final_output):
+    """
+    Cache a completed answer unless a tool failed or timed out while producing it.
+    """
+    answer_cache = http_request.app.state.answer_cache
+    if answer_cache is None or vector is None or not isinstance(final_output, dict):
+        return
+    messages = final_output.get("messages") or []
+    names, failed = tools_used(messages)
+    if messages and not failed:
+        answer_cache.store(question, messages[-1].content, names, vector)
+
+
+async def _record_cached_turn(http_request: Request, graph, thread_id: str, question: str, answer: str):
+    """
+    Add a cached question and answer to the thread, so follow-up questions have the context.
+    """
+    session_store = http_request.app.state.session_store
+    if session_store is None:
+        return
+    await graph.aupdate_state(
+        {"configurable": {"thread_id": thread_id}},
+        {"messages": [HumanMessage(content=question), AIMessage(content=answer)]},
+        as_node="chatbot",
+    )
+    await session_store.finish_turn(thread_id)
+
+
 @app.post("/query")
-async def query_chatbot(request: QuestionRequest):
+async def query_chatbot(request: QuestionRequest, http_request: Request):
     """
     Endpoint to query the chatbot/LLM with a natural language question.
     """
     try:
         logger.info("Received query: %s", request.question)
 
-        # Initialize graph workflow and build computation graph
-        graph_service = GraphBuilder()
-        graph_service.build()
-        graph = graph_service.get_graph()
+        # Reuse the graph compiled once at startup
+        graph = http_request.app.state.agent_runtime.graph
 
-        # Format message for graph input (may vary based on your graph implementation)
+        # Format message for graph input; earlier turns of the thread come from the checkpointer
         messages = {"messages": [request.question]}
+        thread_id = request.thread_id or uuid.uuid4().hex
+
+        # Paraphrases of recent questions are answered from the answer cache
+        cached, vector = await _lookup_answer(http_request, request)
+        if cached is not None:
+            await _record_cached_turn(http_request, graph, thread_id, request.question, cached["answer"])
+            return {"answer": cached["answer"], "thread_id": thread_id, "cached": True}
 
-        logger.info("Invoking graph with message: %s", messages)
-        result = graph.invoke(messages)
+        logger.info("Invoking graph with message: %s (thread %s)", messages, thread_id)
+        result = await graph.ainvoke(messages, config={"configurable": {"thread_id": thread_id}})
+        session_store = http_request.app.state.session_store
+        if session_store is not None:
+            await session_store.finish_turn(thread_id)
+        _store_answer(http_request, request.question, vector, result)
 
         # Parse result depending on graph's return type
         if isinstance(result, dict) and "messages" in result:
@@ -63,8 +278,203 @@ async def query_chatbot(request: QuestionRequest):
             final_output = str(result)
 
         logger.info("Query response: %s", final_output)
-        return {"answer": final_output}
+        return {"answer": final_output, "thread_id": thread_id}
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            # Provider quota still exhausted after the rate limiter's retries: ask the client to back off
+            logger.warning("Chatbot query rate limited: %s", str(e))
+            retry_after = max(1, round(retry_after_seconds(e)))
+            return JSONResponse(status_code=503, headers={"Retry-After": str(retry_after)},
+                                content={"error": "Upstream provider is rate limiting requests; retry later."})
         logger.error("Error during chatbot query: %s", str(e), exc_info=True)
         return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/query/stream")
+async def query_chatbot_stream(request: QuestionRequest, http_request: Request):
+    """
+    Endpoint to query the chatbot/LLM and stream tokens, tool events and the final answer as SSE.
+    """
+    logger.info("Received streaming query: %s", request.question)
+    graph = http_request.app.state.agent_runtime.graph
+    messages = {"messages": [request.question]}
+    thread_id = request.thread_id or uuid.uuid4().hex
+    session_store = http_request.app.state.session_store
+
+    async def frames():
+        cached, vector = await _lookup_answer(http_request, request)
+        if cached is not None:
+            await _record_cached_turn(http_request, graph, thread_id, request.question, cached["answer"])
+            yield cached_answer_frame(cached["answer"], cached["similarity"])
+            return
+
+        async for frame in stream_answer(
+            graph, messages, config={"configurable": {"thread_id": thread_id}},
+            on_final=lambda output: _store_answer(http_request, request.question, vector, output),
+        ):
+            yield frame
+        if session_store is not None:
+            await session_store.finish_turn(thread_id)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Thread-Id": thread_id},
+    )
+
+
+async def _prepare_batch(http_request: Request, questions: List[str]):
+    """
+    Embed a batch's questions with one call, look them up in the answer cache and retrieve
+    documents for the rest with one vector store query.
+    Returns, per question, (answer cache vector or None, cached entry or None, documents or None);
+    on failure the questions are left to retrieve on their own.
+    """
+    answer_cache = http_request.app.state.answer_cache
+    retrieval_service = tool_registry.get("retrieval_service")
+    try:
+        # The retriever and the answer cache embed questions with the same model
+        vectors = await asyncio.to_thread(retrieval_service.embed_questions, questions)
+    except Exception as e:
+        logger.warning("Batch embedding failed, questions will retrieve on their own: %s", str(e))
+        return [(None, None, None)] * len(questions)
+
+    cache_vectors = [AnswerCache.normalize(vector) if answer_cache is not None else None for vector in vectors]
+    cached = [answer_cache.lookup(question, vector) if answer_cache is not None else None
+              for question, vector in zip(questions, cache_vectors)]
+    misses = [i for i, entry in enumerate(cached) if entry is None]
+    documents = [None] * len(questions)
+    try:
+        retrieved = await asyncio.to_thread(
+            retrieval_service.search_many, [questions[i] for i in misses], [vectors[i] for i in misses]
+        )
+        for i, docs in zip(misses, retrieved):
+            documents[i] = docs
+    except Exception as e:
+        logger.warning("Batch retrieval failed, questions will retrieve on their own: %s", str(e))
+    return list(zip(cache_vectors, cached, documents))
+
+
+@app.post("/query/batch")
+async def query_chatbot_batch(request: BatchQuestionRequest, http_request: Request):
+    """
+    Endpoint answering many independent questions, streaming a result event (SSE) as each one
+    finishes and a done event at the end.
+
+    Retrieval for the whole batch is one embeddings call and one vector store query; the
+    agent reuses those documents. Graph runs are limited to max_concurrency at a time and
+    make their provider calls at bulk rate-limit priority, behind interactive /query traffic.
+    """
+    batch_config = load_config().get("batch", {})
+    max_questions = batch_config.get("max_questions", 500)
+    if not 1 <= len(request.questions) <= max_questions:
+        return JSONResponse(status_code=400, content={"error": f"Send between 1 and {max_questions} questions"})
+    max_concurrency = batch_config.get("max_concurrency", 8)
+    concurrency = max(1, min(request.max_concurrency or max_concurrency, max_concurrency))
+    match_threshold = batch_config.get("retrieval_match_threshold", 0.3)
+    questions = request.questions
+    logger.info("Received batch of %d questions (concurrency %d).", len(questions), concurrency)
+
+    graph = http_request.app.state.agent_runtime.graph
+    session_store = http_request.app.state.session_store
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(index: int, question: str, vector, cached, documents):
+        thread_id = uuid.uuid4().hex
+        try:
+            if cached is not None:
+                await _record_cached_turn(http_request, graph, thread_id, question, cached["answer"])
+                return index, question, {"answer": cached["answer"], "thread_id": thread_id, "cached": True}
+            async with semaphore:
+                primed = primed_retrieval(question, documents, match_threshold) if documents is not None \
+                    else nullcontext()
+                with bulk_priority(), primed:
+                    result = await graph.ainvoke({"messages": [question]},
+                                                 config={"configurable": {"thread_id": thread_id}})
+            if session_store is not None:
+                await session_store.finish_turn(thread_id)
+            _store_answer(http_request, question, vector, result)
+            return index, question, {"answer": result["messages"][-1].content, "thread_id": thread_id}
+        except Exception as e:
+            logger.error("Error answering batch question %d: %s", index, str(e), exc_info=True)
+            return index, question, {"error": str(e), "rate_limited": is_rate_limit_error(e)}
+
+    async def frames():
+        start = time.perf_counter()
+        with bulk_priority():
+            prepared = await _prepare_batch(http_request, questions)
+        tasks = [asyncio.create_task(answer(i, question, *prepared[i])) for i, question in enumerate(questions)]
+        counts = {"answered": 0, "cached": 0, "failed": 0}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, question, result = await next_done
+                counts["failed" if "error" in result else "cached" if result.get("cached") else "answered"] += 1
+                yield batch_result_frame(index, question, result)
+        finally:
+            # A client that disconnects cancels the questions still running
+            for task in tasks:
+                task.cancel()
+        yield batch_done_frame({"questions": len(questions), **counts,
+                                "seconds": round(time.perf_counter() - start, 3)})
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/reload")
+async def reload_runtime(http_request: Request):
+    """
+    Endpoint to rebuild the shared agent runtime after a configuration change.
+    """
+    try:
+        reloaded = await asyncio.to_thread(http_request.app.state.agent_runtime.reload_if_changed)
+        return {"reloaded": reloaded}
+    except Exception as e:
+        logger.error("Error during runtime reload: %s", str(e), exc_info=True)
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.delete("/sessions/{thread_id}")
+async def delete_session(thread_id: str, http_request: Request):
+    """
+    Endpoint to end a conversation session and delete its stored history.
+    """
+    session_store = http_request.app.state.session_store
+    if session_store is None:
+        return JSONResponse(status_code=404, content={"error": "Sessions are disabled"})
+    await session_store.delete(thread_id)
+    return {"deleted": thread_id}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """
+    Endpoint exposing latency histograms and counters in the Prometheus text format.
+    """
+    if not metrics.registry.enabled:
+        return JSONResponse(status_code=404, content={"error": "Metrics are disabled"})
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/stats")
+async def cache_stats(http_request: Request):
+    """
+    Endpoint reporting cache hit, miss and eviction counters, prefetch usage, session storage
+    and the provider rate limiters.
+    """
+    stats = {"embedding_cache": embedding_cache_stats(), "rate_limits": rate_limiter_stats()}
+    polygon_cache = tool_registry.get("polygon_cache")
+    if polygon_cache is not None:
+        stats["polygon_cache"] = polygon_cache.stats()
+    prefetcher = http_request.app.state.agent_runtime.graph_service.prefetcher
+    if prefetcher is not None:
+        stats["prefetch"] = prefetcher.stats()
+    if http_request.app.state.session_store is not None:
+        stats["sessions"] = await http_request.app.state.session_store.stats()
+    if http_request.app.state.answer_cache is not None:
+        stats["answer_cache"] = http_request.app.state.answer_cache.stats()
+    return stats
@@ -4,6 +4,6 @@ setup(name="agentic-trading-system",
        version="0.0.1",
        author="shahbaz-zulfiqar",
        author_email="shahbazzulfiqar894@gmail.com",
-       packages=find_packages(),
+       packages=find_packages(exclude=["benchmarks"]),
        install_requires=['lancedb','langchain','langgraph','tavily-python','polygon']
        )
\ No newline at end of file
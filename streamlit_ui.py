@@ -1,3 +1,5 @@
+import json
+import time
 import streamlit as st
 import requests
 from exception.exceptions import TradingBotException
@@ -6,6 +8,8 @@ from custom_logging.logging import logger
 
 # Backend FastAPI service endpoint
 BASE_URL = "http://localhost:8000"
+# Stop waiting for an ingestion job after this many seconds (it keeps running on the server)
+JOB_POLL_TIMEOUT_SECONDS = 30 * 60
 
 # Streamlit page configuration
 st.set_page_config(
@@ -17,9 +21,11 @@ st.set_page_config(
 
 st.title("📈 Stock Market Agentic Chatbot")
 
-# Initialize chat history session state
+# Initialize chat history session state; the backend keeps the conversation under thread_id
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = None
 
 # ---------------------------
 # Sidebar Section: File Upload
@@ -33,21 +39,55 @@ with st.sidebar:
         if uploaded_files:
             files = []
             for f in uploaded_files:
-                file_data = f.read()
-                if not file_data:
+                if not f.size:
                     logger.warning(f"Skipped empty file: {getattr(f, 'name', 'unknown')}")
                     continue
-                files.append(("files", (getattr(f, "name", "file.pdf"), file_data, f.type)))
+                f.seek(0)
+                files.append(("files", (getattr(f, "name", "file.pdf"), f, f.type)))
 
             if files:
                 try:
-                    with st.spinner("Uploading and processing files..."):
+                    with st.spinner("Uploading files..."):
                         logger.info("Uploading %d files to backend.", len(files))
                         response = requests.post(f"{BASE_URL}/upload", files=files)
 
-                    if response.status_code == 200:
-                        logger.info("File upload successful.")
-                        st.success("✅ Files uploaded and processed successfully!")
+                    if response.status_code == 202:
+                        job_id = response.json()["job_id"]
+                        logger.info("File upload accepted as ingestion job %s.", job_id)
+
+                        # Ingestion runs in the background; poll the job until it finishes
+                        progress_bar = st.progress(0.0, text="Queued for ingestion...")
+                        deadline = time.monotonic() + JOB_POLL_TIMEOUT_SECONDS
+                        job, problem = None, None
+                        while True:
+                            job_response = requests.get(f"{BASE_URL}/jobs/{job_id}", timeout=30)
+                            if job_response.status_code == 404:
+                                problem = "the server no longer knows this ingestion job (was it restarted?)."
+                                break
+                            if not job_response.ok:
+                                problem = f"job status request failed with {job_response.status_code}: {job_response.text}"
+                                break
+                            job = job_response.json()
+                            if job["status"] in ("completed", "failed"):
+                                break
+                            if time.monotonic() > deadline:
+                                problem = f"ingestion is still running on the server after {JOB_POLL_TIMEOUT_SECONDS // 60} minutes."
+                                break
+                            fraction = (job["done"] or 0) / job["total"] if job.get("total") else 0.0
+                            progress_bar.progress(min(fraction, 1.0), text=f"Ingesting: {job['stage']}...")
+                            time.sleep(1)
+                        progress_bar.empty()
+
+                        if problem:
+                            logger.warning("Stopped polling ingestion job %s: %s", job_id, problem)
+                            st.warning("⚠️ Could not confirm ingestion: " + problem)
+                        elif job["status"] == "completed":
+                            st.success("✅ Files uploaded and processed successfully!")
+                        else:
+                            logger.error("Ingestion job %s failed: %s", job_id, job["error"])
+                            st.error("❌ Ingestion failed: " + str(job["error"]))
+                        for failed in (job or {}).get("failed_files", []):
+                            st.warning(f"⚠️ Skipped {failed['file']}: {failed['error']}")
                     else:
                         logger.error("Upload failed with status %s: %s", response.status_code, response.text)
                         st.error("❌ Upload failed: " + response.text)
@@ -66,6 +106,11 @@ with st.sidebar:
 # ---------------------------
 st.header("💬 Chat")
 
+if st.button("🆕 New conversation"):
+    st.session_state.messages = []
+    st.session_state.thread_id = None
+    st.rerun()
+
 # Display chat history from session state
 for chat in st.session_state.messages:
     if chat["role"] == "user":
@@ -83,26 +128,64 @@ with st.form(key="chat_form", clear_on_submit=True):
 # ---------------------------
 # Chatbot Query Handler
 # ---------------------------
+def iter_sse(response):
+    """
+    Yield (event, data) pairs from a Server-Sent Events response.
+    """
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
 if submit_button and user_input.strip():
     try:
         logger.info("User asked: %s", user_input)
 
         # Add user's message to chat history
         st.session_state.messages.append({"role": "user", "content": user_input})
-
-        # Spinner while processing
-        with st.spinner("Bot is thinking..."):
-            payload = {"question": user_input}
-            response = requests.post(f"{BASE_URL}/query", json=payload)
-
-        if response.status_code == 200:
-            answer = response.json().get("answer", "No answer returned.")
-            logger.info("Bot answered: %s", answer)
+        st.markdown(f"**🧑 You:** {user_input}")
+
+        # Render the answer as it streams in
+        answer_placeholder = st.empty()
+        status_placeholder = st.empty()
+        answer = ""
+
+        payload = {"question": user_input, "thread_id": st.session_state.thread_id}
+        with requests.post(f"{BASE_URL}/query/stream", json=payload, stream=True) as response:
+            if response.status_code != 200:
+                logger.error("Bot response failed with status %s: %s", response.status_code, response.text)
+                st.error("❌ Bot failed to respond: " + response.text)
+            else:
+                # Follow-up questions continue the same backend session
+                st.session_state.thread_id = response.headers.get("X-Thread-Id", st.session_state.thread_id)
+                for event, data in iter_sse(response):
+                    if event == "token":
+                        answer += data["content"]
+                        answer_placeholder.markdown(f"**🤖 Bot:** {answer}▌")
+                    elif event == "tool_start":
+                        # Text streamed before a tool call is the model's preamble, not the answer
+                        answer = ""
+                        status_placeholder.info(f"🔧 Calling {data['name']}...")
+                    elif event == "tool_end":
+                        status_placeholder.info(f"✅ {data['name']} finished")
+                    elif event == "final":
+                        answer = data["answer"]
+                        logger.info("Bot answered: %s (metrics: %s)", answer, data.get("metrics"))
+                    elif event == "error":
+                        logger.error("Bot response failed: %s", data["error"])
+                        st.error("❌ Bot failed to respond: " + data["error"])
+                        answer = ""
+
+        if answer:
             st.session_state.messages.append({"role": "bot", "content": answer})
             st.rerun()  # Refresh to show new messages
-        else:
-            logger.error("Bot response failed with status %s: %s", response.status_code, response.text)
-            st.error("❌ Bot failed to respond: " + response.text)
 
     except Exception as e:
         logger.exception("Exception during chatbot interaction.")
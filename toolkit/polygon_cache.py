@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_community.tools.polygon.financials import PolygonFinancials
+from custom_logging.logging import logger
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PolygonCache:
+    """
+    TTL cache for Polygon API responses, keyed by endpoint (tool mode) and ticker.
+
+    Entries live in a bounded in-memory LRU backed by an optional SQLite file, so cached
+    financials survive restarts. Concurrent lookups of the same key share one upstream
+    request (single-flight); a caller waiting on another's request gives up with a
+    TimeoutError after wait_timeout_seconds. Failed lookups are not cached.
+    """
+
+    def __init__(self, ttl_seconds: Optional[Dict[str, float]] = None, default_ttl_seconds: float = 3600,
+                 max_entries: int = 1000, sqlite_path: Optional[str] = None, wait_timeout_seconds: float = 30):
+        self.ttl_seconds = dict(ttl_seconds or {})
+        self.default_ttl_seconds = default_ttl_seconds
+        self.max_entries = max_entries
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "coalesced": 0, "misses": 0, "errors": 0, "evictions": 0,
+                          "wait_timeouts": 0}
+
+        self._db = None
+        if sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)")
+            self._db.commit()
+            logger.info("Polygon cache disk tier at %s", sqlite_path)
+
+    @classmethod
+    def from_config(cls, cache_config: dict) -> "PolygonCache":
+        return cls(
+            ttl_seconds=cache_config.get("ttl_seconds", {}),
+            default_ttl_seconds=cache_config.get("default_ttl_seconds", 3600),
+            max_entries=cache_config.get("max_entries", 1000),
+            sqlite_path=cache_config.get("sqlite_path") or None,
+            wait_timeout_seconds=cache_config.get("wait_timeout_seconds", 30),
+        )
+
+    @staticmethod
+    def make_key(endpoint: str, ticker: str) -> str:
+        return f"{endpoint}:{ticker.strip().upper()}"
+
+    def _ttl(self, key: str) -> float:
+        return self.ttl_seconds.get(key.split(":", 1)[0], self.default_ttl_seconds)
+
+    def _lookup_locked(self, key: str, now: float):
+        ttl = self._ttl(key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[0] <= ttl:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[1]
+            del self._entries[key]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] <= ttl:
+                self._put_memory_locked(key, row[0], row[1])
+                self._counters["disk_hits"] += 1
+                return row[0]
+        return None
+
+    def _put_memory_locked(self, key: str, value: str, stored_at: float):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _store(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._put_memory_locked(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)", (key, value, now)
+                )
+                self._db.commit()
+
+    def is_fresh(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and time.time() - entry[0] <= self._ttl(key)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], str]) -> str:
+        """
+        Return the cached value for key, or call fetch() once for all concurrent callers.
+        """
+        with self._lock:
+            value = self._lookup_locked(key, time.time())
+            if value is not None:
+                return value
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+                self._counters["misses"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(self.wait_timeout_seconds):
+                # The leader keeps running and will still cache its result for later callers
+                with self._lock:
+                    self._counters["wait_timeouts"] += 1
+                raise TimeoutError(f"Timed out after {self.wait_timeout_seconds}s waiting for the "
+                                   f"in-flight Polygon request for {key}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            self._store(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        served = counters["hits"] + counters["disk_hits"] + counters["coalesced"]
+        lookups = served + counters["misses"]
+        return {
+            **counters,
+            "upstream_calls": counters["misses"],
+            "upstream_calls_saved": served,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "size": size,
+            "max_entries": self.max_entries,
+        }
+
+
+class CachedPolygonFinancials(PolygonFinancials):
+    """
+    PolygonFinancials served through a PolygonCache.
+    """
+
+    cache: PolygonCache
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> str:
+        return self.cache.get_or_fetch(
+            PolygonCache.make_key(self.mode, query),
+            lambda: super(CachedPolygonFinancials, self)._run(query.strip().upper(), run_manager),
+        )
+
+    def prewarm(self, tickers: Iterable[str], max_workers: int = 2):
+        """
+        Fetch financials for a watchlist of tickers that are not already cached.
+        """
+        pending = [t for t in tickers if not self.cache.is_fresh(PolygonCache.make_key(self.mode, t))]
+        if not pending:
+            return
+
+        def fetch(ticker):
+            try:
+                self._run(ticker)
+            except Exception as e:
+                logger.warning("Could not prewarm Polygon financials for %s: %s", ticker, str(e))
+
+        logger.info("Prewarming Polygon financials for %d tickers", len(pending))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="polygon-prewarm") as pool:
+            list(pool.map(fetch, pending))
+        logger.info("Polygon prewarm completed: %s", self.cache.stats())
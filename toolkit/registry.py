@@ -0,0 +1,65 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from custom_logging.logging import logger
+
+
+class LazyRegistry:
+    """
+    Named factories whose objects are built on first use and then shared.
+
+    Importing a module that registers factories costs nothing: API clients, model loaders
+    and tools are only constructed when something asks for them. A factory may get() other
+    entries it depends on.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Optional[Callable[[], Any]] = None):
+        """
+        Register a factory under a name; usable as a decorator.
+        """
+        def _register(factory):
+            self._factories[name] = factory
+            return factory
+
+        return _register(factory) if factory is not None else _register
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def get(self, name: str) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Nothing registered under {name!r}")
+        with self._lock:
+            if name not in self._instances:
+                logger.info("Building %s on first use", name)
+                self._instances[name] = self._factories[name]()
+        return self._instances[name]
+
+    def set(self, name: str, value: Any):
+        """
+        Use an already built object instead of calling the factory, e.g. an offline fake.
+        """
+        with self._lock:
+            self._instances[name] = value
+
+    def built(self) -> List[str]:
+        """
+        Names that have been built so far.
+        """
+        return list(self._instances)
+
+    def reset(self, name: Optional[str] = None):
+        """
+        Forget built objects (one, or all) so the next get() builds them again.
+        """
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
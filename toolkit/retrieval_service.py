@@ -0,0 +1,159 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+from vector_store.factory import get_vector_store
+from vector_store.keyword_index import get_keyword_index, tokenize
+from utils.config_loader import load_config
+from utils.embedding_cache import embed_queries
+from custom_logging.logging import logger
+
+# (question, documents, match threshold) retrieved ahead of time for the current graph run
+_primed = contextvars.ContextVar("primed_retrieval", default=None)
+
+
+def relevance_score(similarity: float) -> float:
+    """
+    Map cosine similarity in [-1, 1] to a [0, 1] relevance score, as PineconeVectorStore does.
+    """
+    return (similarity + 1) / 2
+
+
+def question_overlap(a: str, b: str) -> float:
+    """
+    Jaccard overlap of the keyword tokens of two questions.
+    """
+    first, second = set(tokenize(a)), set(tokenize(b))
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+@contextmanager
+def primed_retrieval(question: str, documents: List[Document], match_threshold: float = 0.3):
+    """
+    Answer retriever searches made inside the block (by the agent, in this context) from
+    documents already retrieved for question, when the search shares enough words with it.
+    """
+    token = _primed.set((question, documents, match_threshold))
+    try:
+        yield
+    finally:
+        _primed.reset(token)
+
+
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], weights: Sequence[float], k: int = 60) -> List[Document]:
+    """
+    Fuse ranked lists with weighted reciprocal rank fusion: score = sum(weight / (k + rank)).
+    Documents are matched across lists by id.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class RetrievalService:
+    """
+    Long-lived, thread-safe retrieval service shared by every retriever_tool call.
+
+    Owns one embeddings client and one vector store backend (selected by
+    vector_db.provider), both created on first use and reused afterwards. With
+    retriever.hybrid.enabled, a BM25 keyword search runs alongside the vector search
+    and the two rankings are combined with reciprocal rank fusion.
+    """
+
+    def __init__(self, config: dict = None, embeddings_factory=None, vector_store=None, keyword_index=None):
+        self.config = config or load_config()
+        self._embeddings_factory = embeddings_factory
+        self._vector_store = vector_store
+        self._keyword_index = keyword_index if keyword_index is not None else get_keyword_index(self.config)
+        self._embeddings = None
+        self._lock = threading.Lock()
+
+    def _components(self):
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = self._embeddings_factory()
+            if self._vector_store is None:
+                self._vector_store = get_vector_store(self.config)
+            return self._embeddings, self._vector_store
+
+    def warm_up(self):
+        """
+        Load the embeddings client and open the vector store before the first request.
+        """
+        _, vector_store = self._components()
+        vector_store.warm_up()
+
+    def _vector_k(self) -> int:
+        retriever_config = self.config["retriever"]
+        if self._keyword_index is None:
+            return retriever_config["top_k"]
+        return retriever_config.get("hybrid", {}).get("vector_candidates", 20)
+
+    def _above_threshold(self, results) -> List[Document]:
+        threshold = self.config["retriever"]["score_threshold"]
+        documents = [doc for doc, similarity in results if relevance_score(similarity) >= threshold]
+        logger.debug("Vector search kept %d of %d results above threshold %.2f",
+                     len(documents), len(results), threshold)
+        return documents
+
+    def search(self, question: str) -> List[Document]:
+        """
+        Similarity search with the configured top-k and score threshold, fused with keyword
+        search when hybrid retrieval is enabled.
+        """
+        primed = _primed.get()
+        if primed is not None and question_overlap(question, primed[0]) >= primed[2]:
+            logger.debug("Using documents retrieved ahead for: %s", primed[0])
+            return list(primed[1])
+        embeddings, vector_store = self._components()
+        results = vector_store.search(embeddings.embed_query(question), k=self._vector_k())
+        return self._fuse(question, self._above_threshold(results))
+
+    def embed_questions(self, questions: List[str]) -> List[List[float]]:
+        """
+        Embed several questions as search queries with one batched embeddings call.
+        """
+        embeddings, _ = self._components()
+        return embed_queries(embeddings, list(questions))
+
+    def search_many(self, questions: List[str], vectors: Optional[Sequence[Sequence[float]]] = None
+                    ) -> List[List[Document]]:
+        """
+        search() for several questions: one batched embeddings call (unless their vectors from
+        embed_questions are given) and one batched vector store query.
+        """
+        if not questions:
+            return []
+        _, vector_store = self._components()
+        vectors = self.embed_questions(questions) if vectors is None else vectors
+        results = vector_store.search_many(vectors, k=self._vector_k())
+        return [self._fuse(question, self._above_threshold(hits)) for question, hits in zip(questions, results)]
+
+    def _fuse(self, question: str, vector_results: List[Document]) -> List[Document]:
+        retriever_config = self.config["retriever"]
+        top_k = retriever_config["top_k"]
+        if self._keyword_index is None:
+            return vector_results
+
+        hybrid_config = retriever_config.get("hybrid", {})
+        keyword_hits = self._keyword_index.search(question, hybrid_config.get("keyword_candidates", 20))
+        # Drop the long tail of chunks that only share common words with the question;
+        # otherwise they collect RRF credit from both lists and bury the exact-term match.
+        min_score = hybrid_config.get("keyword_min_score_ratio", 0.2) * (keyword_hits[0][1] if keyword_hits else 0.0)
+        keyword_results = [doc for doc, score in keyword_hits if score >= min_score]
+        fused = reciprocal_rank_fusion(
+            [vector_results, keyword_results],
+            [hybrid_config.get("vector_weight", 1.0), hybrid_config.get("keyword_weight", 1.0)],
+            k=hybrid_config.get("rrf_k", 60),
+        )
+        logger.debug("Hybrid search fused %d vector and %d keyword candidates",
+                     len(vector_results), len(keyword_results))
+        return fused[:top_k]
@@ -1,83 +1,149 @@
-import os
-from langchain.tools import tool
-from langchain_community.tools import TavilySearchResults
-from langchain_community.tools.polygon.financials import PolygonFinancials
-from langchain_community.utilities.polygon import PolygonAPIWrapper
-from langchain_community.tools.bing_search import BingSearchResults
+from langchain_core.tools import ToolException, tool
 from data_models.models import RagToolSchema
-from langchain_pinecone import PineconeVectorStore
-from utils.model_loader import ModelLoader
+from toolkit.registry import LazyRegistry
 from utils.config_loader import load_config
-from dotenv import load_dotenv
-from pinecone import Pinecone
+from utils.retry import is_rate_limit_error
 from custom_logging.logging import logger
 
-# Load environment variables from .env file
-load_dotenv()
+# API clients and tools are built on first use, so importing this module stays cheap.
+# registry.get("<name>") returns the shared instance; module attributes of the same names
+# (e.g. toolkit.tools.retrieval_service) resolve through the registry as well.
+registry = LazyRegistry()
 
-# Initialize Polygon API wrapper for financial data
-api_wrapper = PolygonAPIWrapper()
 
-# Initialize model loader for embeddings
-model_loader = ModelLoader()
+@registry.register("api_wrapper")
+def _api_wrapper():
+    # Initialize Polygon API wrapper for financial data
+    from langchain_community.utilities.polygon import PolygonAPIWrapper
+    return PolygonAPIWrapper()
+
+
+@registry.register("model_loader")
+def _model_loader():
+    # Initialize model loader for embeddings (loads .env and validates API keys)
+    from utils.model_loader import ModelLoader
+    return ModelLoader()
+
+
+@registry.register("retrieval_service")
+def _retrieval_service():
+    # Long-lived retrieval service: one vector store backend and one embeddings client
+    from toolkit.retrieval_service import RetrievalService
+    return RetrievalService(config=load_config(), embeddings_factory=registry.get("model_loader").load_embeddings)
 
-# Load application configuration from YAML or JSON
-config = load_config()
 
 @tool(args_schema=RagToolSchema)
 def retriever_tool(question):
     """
-    Retrieves relevant documents from Pinecone vector store based on a user's question.
-    
+    Retrieves relevant documents from the vector store based on a user's question.
+
     Parameters:
         question (str): The question input used for similarity search.
 
     Returns:
-        List[Document]: List of relevant documents retrieved from Pinecone.
+        List[dict]: Content and metadata of the relevant documents retrieved from the vector store.
     """
     try:
         logger.info("Starting retriever tool with question: %s", question)
 
-        # Load Pinecone API key from environment and initialize client
-        pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        if not pinecone_api_key:
-            raise ValueError("PINECONE_API_KEY is not set in the environment.")
-        pc = Pinecone(api_key=pinecone_api_key)
-
-        # Set up the Pinecone Vector Store with embedding model
-        index_name = config["vector_db"]["index_name"]
-        vector_store = PineconeVectorStore(
-            index=pc.Index(index_name),
-            embedding=model_loader.load_embeddings()
-        )
-
-        # Create a retriever with score threshold and top-k filtering
-        retriever = vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={
-                "k": config["retriever"]["top_k"],
-                "score_threshold": config["retriever"]["score_threshold"]
-            }
-        )
-
-        # Perform similarity search and return documents
-        retriever_result = retriever.invoke(question)
+        # Perform similarity search with top-k and score threshold filtering
+        retriever_result = registry.get("retrieval_service").search(question)
         logger.info("Retriever tool returned %d documents", len(retriever_result))
-        return retriever_result
+        # Plain records serialise to JSON in the ToolMessage, so tool-output compaction can split them
+        return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in retriever_result]
 
     except Exception as e:
+        if is_rate_limit_error(e):
+            # An empty result would read as "no relevant documents"; report the tool as failed instead
+            logger.warning("Retriever tool rate limited: %s", str(e))
+            raise ToolException("Document search is rate limited right now; try again shortly.") from e
         logger.error("Error in retriever_tool: %s", str(e), exc_info=True)
         return []  # You can also raise a custom exception if preferred
 
-# Tavily tool for web search with deep content fetching
-tavilytool = TavilySearchResults(
-    max_results=config["tools"]["tavily"]["max_results"],
-    search_depth="advanced",
-    include_answer=True,
-    include_raw_content=True,
-)
-logger.info("TavilySearchResults tool initialized with max_results=%d", config["tools"]["tavily"]["max_results"])
-
-# Financials tool for retrieving company financial data via Polygon API
-financials_tool = PolygonFinancials(api_wrapper=api_wrapper)
-logger.info("PolygonFinancials tool initialized using Polygon API")
+
+retriever_tool.handle_tool_error = True  # ToolExceptions become error ToolMessages the agent can see
+
+
+@registry.register("tavilytool")
+def _tavilytool():
+    # Tavily tool for web search with deep content fetching
+    from langchain_community.tools import TavilySearchResults
+    max_results = load_config()["tools"]["tavily"]["max_results"]
+    tavilytool = TavilySearchResults(
+        max_results=max_results,
+        search_depth="advanced",
+        include_answer=True,
+        include_raw_content=True,
+    )
+    logger.info("TavilySearchResults tool initialized with max_results=%d", max_results)
+    return tavilytool
+
+
+@registry.register("polygon_cache")
+def _polygon_cache():
+    # Financials change at most quarterly: serve repeated tickers from the cache
+    cache_config = load_config()["tools"].get("polygon", {}).get("cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+    from toolkit.polygon_cache import PolygonCache
+    return PolygonCache.from_config(cache_config)
+
+
+@registry.register("financials_tool")
+def _financials_tool():
+    # Financials tool for retrieving company financial data via Polygon API
+    from langchain_community.tools.polygon.financials import PolygonFinancials
+    polygon_cache = registry.get("polygon_cache")
+    if polygon_cache is not None:
+        from toolkit.polygon_cache import CachedPolygonFinancials
+        financials_tool = CachedPolygonFinancials(api_wrapper=registry.get("api_wrapper"), cache=polygon_cache)
+    else:
+        financials_tool = PolygonFinancials(api_wrapper=registry.get("api_wrapper"))
+    logger.info("PolygonFinancials tool initialized using Polygon API (cache %s)",
+                "enabled" if polygon_cache else "disabled")
+    return financials_tool
+
+
+# Config sections each registry entry is built from, and the entries built on top of it.
+# reset_changed_tools() forgets these so a config reload rebuilds them with the new settings.
+_CONFIG_SECTIONS = {
+    "retrieval_service": [("vector_db",), ("retriever",), ("embedding_model",), ("embedding_cache",)],
+    "tavilytool": [("tools", "tavily")],
+    "polygon_cache": [("tools", "polygon", "cache")],
+}
+_DEPENDENTS = {"polygon_cache": ["financials_tool"]}
+
+
+def _section(config: dict, path) -> object:
+    for key in path:
+        config = config.get(key) if isinstance(config, dict) else None
+    return config
+
+
+def reset_changed_tools(old_config: dict, new_config: dict) -> list:
+    """
+    Forget the built registry entries whose config sections differ between the two configs,
+    along with the entries built on top of them. Returns the names that were reset.
+    """
+    changed = [name for name, paths in _CONFIG_SECTIONS.items()
+               if any(_section(old_config, path) != _section(new_config, path) for path in paths)]
+    names = []
+    for name in changed:
+        for entry in [name] + _DEPENDENTS.get(name, []):
+            if entry in registry.built() and entry not in names:
+                registry.reset(entry)
+                names.append(entry)
+    return names
+
+
+def default_tools() -> list:
+    """
+    The agent's tools, building the ones that have not been built yet.
+    """
+    return [retriever_tool, registry.get("financials_tool"), registry.get("tavilytool")]
+
+
+def __getattr__(name):
+    if name in registry:
+        return registry.get(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
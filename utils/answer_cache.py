@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.messages import BaseMessage, HumanMessage, ToolMessage
+from custom_logging.logging import logger
+
+
+def tools_used(messages: Sequence[BaseMessage]) -> Tuple[set, bool]:
+    """
+    Names of the tools called since the latest user message, and whether any of them failed.
+    """
+    names, failed = set(), False
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage):
+            names.add(message.name)
+            failed = failed or message.status == "error"
+    return names, failed
+
+
+class AnswerCache:
+    """
+    Semantic cache of final answers, looked up by question embedding.
+
+    A lookup returns the answer of the most similar cached question when the cosine
+    similarity reaches similarity_threshold and the entry has not expired. An entry's TTL
+    is the shortest TTL of the tools its answer used (market data expires faster than
+    document retrieval). Entries live in a fixed-capacity matrix searched with one
+    matrix-vector product; the least recently used entry is evicted when it is full.
+    """
+
+    def __init__(self, embed_fn: Callable[[str], List[float]], max_entries: int = 1000,
+                 similarity_threshold: float = 0.92, tool_ttl_seconds: Optional[Dict[str, float]] = None,
+                 default_ttl_seconds: float = 3600):
+        self.embed_fn = embed_fn
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.tool_ttl_seconds = dict(tool_ttl_seconds or {})
+        self.default_ttl_seconds = default_ttl_seconds
+        self._vectors = None  # (max_entries, dimension) normalized float32, allocated on first store
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._entries: Dict[int, dict] = {}
+        self._lru = OrderedDict()  # slot -> None, least recently used first
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def from_config(cls, cache_config: dict, embed_fn) -> "AnswerCache":
+        return cls(
+            embed_fn,
+            max_entries=cache_config.get("max_entries", 1000),
+            similarity_threshold=cache_config.get("similarity_threshold", 0.92),
+            tool_ttl_seconds=cache_config.get("tool_ttl_seconds", {}),
+            default_ttl_seconds=cache_config.get("default_ttl_seconds", 3600),
+        )
+
+    def embed(self, question: str) -> np.ndarray:
+        return self.normalize(self.embed_fn(question))
+
+    @staticmethod
+    def normalize(vector) -> np.ndarray:
+        """
+        A question embedding as the unit-length float32 vector lookup() and store() expect.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _remove_locked(self, slot: int, counter: str):
+        self._valid[slot] = False
+        self._entries.pop(slot, None)
+        self._lru.pop(slot, None)
+        self._counters[counter] += 1
+
+    def lookup(self, question: str, vector: Optional[np.ndarray] = None) -> Optional[dict]:
+        """
+        Return the cached entry for the closest question above the threshold, or None.
+        """
+        vector = self.embed(question) if vector is None else vector
+        now = time.time()
+        with self._lock:
+            if self._vectors is not None and self._valid.any():
+                similarities = self._vectors @ vector
+                similarities[~self._valid] = -np.inf
+                slot = int(np.argmax(similarities))
+                similarity = float(similarities[slot])
+                if similarity >= self.similarity_threshold:
+                    entry = self._entries[slot]
+                    if entry["expires_at"] > now:
+                        self._lru.move_to_end(slot)
+                        self._counters["hits"] += 1
+                        logger.info("Answer cache hit (similarity %.3f) for: %s", similarity, question)
+                        return {**entry, "similarity": similarity}
+                    self._remove_locked(slot, "expirations")
+            self._counters["misses"] += 1
+        return None
+
+    def ttl_for(self, tools: Iterable[str]) -> float:
+        ttls = [self.tool_ttl_seconds.get(tool, self.default_ttl_seconds) for tool in tools]
+        return min(ttls) if ttls else self.default_ttl_seconds
+
+    def store(self, question: str, answer: str, tools: Iterable[str], vector: Optional[np.ndarray] = None):
+        """
+        Cache an answer together with the tools it was produced with.
+        """
+        tools = sorted(set(tools))
+        ttl = self.ttl_for(tools)
+        if ttl <= 0 or not answer:
+            return
+        vector = self.embed(question) if vector is None else vector
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            free = np.flatnonzero(~self._valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = next(iter(self._lru))
+                self._remove_locked(slot, "evictions")
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = {"question": question, "answer": answer, "tools": tools,
+                                   "expires_at": time.time() + ttl}
+            self._lru[slot] = None
+            self._counters["stores"] += 1
+
+    def invalidate(self, tool: Optional[str] = None) -> int:
+        """
+        Drop the entries whose answers used the given tool, or every entry when tool is None.
+        """
+        with self._lock:
+            slots = [slot for slot, entry in self._entries.items() if tool is None or tool in entry["tools"]]
+            for slot in slots:
+                self._remove_locked(slot, "invalidations")
+        if slots:
+            logger.info("Invalidated %d cached answers (tool=%s)", len(slots), tool)
+        return len(slots)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {**counters, "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+                "size": size, "max_entries": self.max_entries}
+
+
+_shared_caches: List[AnswerCache] = []
+_shared_caches_lock = threading.Lock()
+
+
+def register_answer_cache(cache: AnswerCache) -> AnswerCache:
+    """
+    Register a cache so ingestion can invalidate it.
+    """
+    with _shared_caches_lock:
+        _shared_caches.append(cache)
+    return cache
+
+
+def invalidate_answer_caches(tool: Optional[str] = None) -> int:
+    """
+    Invalidate every registered answer cache, e.g. after new documents were ingested.
+    """
+    with _shared_caches_lock:
+        caches = list(_shared_caches)
+    return sum(cache.invalidate(tool) for cache in caches)
@@ -1,6 +1,36 @@
+import os
+import threading
 import yaml
 
-def load_config(config_path: str = r"E:\agenticTradingBot\config\config.yaml") -> dict:
-    with open(config_path, "r") as file:
-        config = yaml.safe_load(file)
-    return config
\ No newline at end of file
+# Set TRADING_BOT_CONFIG to use a config file other than config/config.yaml in the repository
+CONFIG_PATH_ENV = "TRADING_BOT_CONFIG"
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "config.yaml")
+
+_cache = {}  # path -> (modification time, parsed config)
+_cache_lock = threading.Lock()
+
+
+def default_config_path() -> str:
+    return os.environ.get(CONFIG_PATH_ENV) or DEFAULT_CONFIG_PATH
+
+
+def load_config(config_path: str = None) -> dict:
+    """
+    Return the parsed config, reading the YAML file only the first time and after it changes.
+
+    The returned dict is shared by every caller and must be treated as read-only. Editing
+    the file (which changes its modification time) makes the next call parse it again, so
+    hot reloading keeps working.
+    """
+    path = os.path.abspath(config_path or default_config_path())
+    modified = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != modified:
+            with open(path, "r") as file:
+                cached = (modified, yaml.safe_load(file))
+            _cache[path] = cached
+    return cached[1]
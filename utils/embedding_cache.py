@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from custom_logging.logging import logger
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def embed_queries(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    """
+    Embed several search queries with one batched call. The wrappers in this package pass the
+    batch down to the provider as queries; other embeddings (which embed queries and
+    documents alike) get an embed_documents call.
+    """
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    return embeddings.embed_documents(texts)
+
+
+def normalize_text(text: str, casefold: bool = False) -> str:
+    """
+    Normalize text for cache keys: Unicode NFKC, collapsed whitespace and optional case folding.
+    """
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    return text.casefold() if casefold else text
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: a bounded in-memory LRU with TTL, backed by an optional
+    SQLite file that survives restarts. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400,
+                 sqlite_path: Optional[str] = None, disk_ttl_seconds: float = 0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, vector)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+        self._db = None
+        if sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, stored_at REAL)"
+            )
+            self._db.commit()
+            logger.info("Embedding cache disk tier at %s", sqlite_path)
+
+    def _put_memory_locked(self, key: str, vector: List[float], stored_at: float):
+        self._entries[key] = (stored_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get(self, key: str) -> Optional[List[float]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                    del self._entries[key]
+                    self._counters["expirations"] += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry[1]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, stored_at FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not (self.disk_ttl_seconds and now - row[1] > self.disk_ttl_seconds):
+                    vector = array("f", row[0]).tolist()
+                    self._put_memory_locked(key, vector, now)
+                    self._counters["disk_hits"] += 1
+                    return vector
+
+            self._counters["misses"] += 1
+            return None
+
+    def put_many(self, items):
+        """
+        Store (key, vector) pairs in both tiers.
+        """
+        now = time.time()
+        with self._lock:
+            for key, vector in items:
+                self._put_memory_locked(key, vector, now)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, stored_at) VALUES (?, ?, ?)",
+                    [(key, array("f", vector).tobytes(), now) for key, vector in items],
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves repeated queries and chunks from an EmbeddingCache.
+
+    Keys combine the model name, the kind of embedding (query or document, which the
+    provider embeds differently) and the normalized text.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def _key(self, kind: str, text: str) -> str:
+        normalized = normalize_text(text, casefold=(kind == "query"))
+        return hashlib.sha256(f"{self.model_name}\x1f{kind}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many([(key, vector)])
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_many("document", texts, self.embeddings.embed_documents)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self._embed_many("query", texts, lambda missing: embed_queries(self.embeddings, missing))
+
+    def _embed_many(self, kind: str, texts: List[str], embed_fn) -> List[List[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+
+        # Embed each distinct missing text once, even if it repeats within the batch
+        missing = OrderedDict()
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        if missing:
+            embedded = embed_fn(list(missing.values()))
+            fresh = dict(zip(missing.keys(), embedded))
+            self.cache.put_many(list(fresh.items()))
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(cache_config: dict) -> EmbeddingCache:
+    """
+    Return the process-wide cache for a configuration, so the retriever and ingestion share it.
+    """
+    key = tuple(sorted(cache_config.items()))
+    with _shared_caches_lock:
+        if key not in _shared_caches:
+            _shared_caches[key] = EmbeddingCache(
+                max_entries=cache_config.get("max_entries", 10000),
+                ttl_seconds=cache_config.get("ttl_seconds", 86400),
+                sqlite_path=cache_config.get("sqlite_path") or None,
+                disk_ttl_seconds=cache_config.get("disk_ttl_seconds", 0),
+            )
+        return _shared_caches[key]
+
+
+def embedding_cache_stats() -> dict:
+    """
+    Counters of every shared embedding cache, keyed by its disk path (or "memory").
+    """
+    with _shared_caches_lock:
+        caches = list(_shared_caches.items())
+    return {dict(key).get("sqlite_path") or "memory": cache.stats() for key, cache in caches}
@@ -1,9 +1,63 @@
 import os
 from dotenv import load_dotenv
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from utils.config_loader import load_config
-from langchain_groq import ChatGroq
+from typing import List
+from langchain_core.embeddings import Embeddings
+from utils.embedding_cache import CachedEmbeddings, embed_queries, get_embedding_cache
+from utils.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
 from custom_logging.logging import logger
+from custom_logging.metrics import EMBEDDED_TEXTS, EMBEDDING_SECONDS
+
+
+class TimedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper recording the latency and volume of calls to the provider.
+    query_options are passed to embed_documents when it embeds a batch of queries.
+    """
+
+    def __init__(self, embeddings: Embeddings, query_options: dict = None):
+        self.embeddings = embeddings
+        self.query_options = query_options or {}
+
+    def embed_query(self, text: str) -> List[float]:
+        EMBEDDED_TEXTS.labels("query").inc()
+        with EMBEDDING_SECONDS.labels("query").time():
+            return self.embeddings.embed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.labels("documents").inc(len(texts))
+        with EMBEDDING_SECONDS.labels("documents").time():
+            return self.embeddings.embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.labels("queries").inc(len(texts))
+        with EMBEDDING_SECONDS.labels("queries").time():
+            return self.embeddings.embed_documents(texts, **self.query_options)
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper sending every provider call through the shared rate limiter.
+    """
+
+    def __init__(self, embeddings: Embeddings, limiter: AdaptiveRateLimiter):
+        self.embeddings = embeddings
+        self.limiter = limiter
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.limiter.call(self.embeddings.embed_query, text, tokens=len(text) // 4 + 1,
+                                 description="Embedding query")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.limiter.call(self.embeddings.embed_documents, texts,
+                                 tokens=sum(len(text) // 4 + 1 for text in texts),
+                                 description=f"Embedding {len(texts)} documents")
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.limiter.call(embed_queries, self.embeddings, texts,
+                                 tokens=sum(len(text) // 4 + 1 for text in texts),
+                                 description=f"Embedding {len(texts)} queries")
+
 
 class ModelLoader:
     """
@@ -15,9 +69,13 @@ class ModelLoader:
         # Load environment variables from .env file
         load_dotenv()
         self._validate_env()
-        self.config = load_config()
         logger.info("ModelLoader initialized successfully.")
 
+    @property
+    def config(self) -> dict:
+        # Read on every load, so a loader shared across hot reloads picks up config changes
+        return load_config()
+
     def _validate_env(self):
         """
         Ensure required environment variables are present.
@@ -33,13 +91,30 @@ class ModelLoader:
 
     def load_embeddings(self):
         """
-        Load and return the Google Generative AI embedding model.
+        Load and return the Google Generative AI embedding model, wrapped in the shared
+        embedding cache when embedding_cache.enabled is set.
         """
         try:
-            model_name = self.config["embedding_model"]["model_name"]
+            # Provider SDKs are slow to import, so they are imported when a model is loaded
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            config = self.config
+            model_name = config["embedding_model"]["model_name"]
             logger.info("Loading embedding model: %s", model_name)
-            embeddings = GoogleGenerativeAIEmbeddings(model=model_name)
+            # Instrumented below the cache, so only calls that reach the provider are measured
+            # Batched queries are embedded with the task type embed_query uses
+            embeddings = TimedEmbeddings(GoogleGenerativeAIEmbeddings(model=model_name),
+                                         query_options={"task_type": "RETRIEVAL_QUERY"})
+            limiter = get_rate_limiter("google_embeddings", config.get("rate_limits", {}))
+            if limiter is not None:
+                # Only cache misses count against the provider's quota
+                embeddings = RateLimitedEmbeddings(embeddings, limiter)
             logger.info("Embedding model loaded successfully.")
+
+            cache_config = config.get("embedding_cache", {})
+            if cache_config.get("enabled", False):
+                embeddings = CachedEmbeddings(embeddings, model_name, get_embedding_cache(cache_config))
+                logger.info("Embedding cache enabled for %s.", model_name)
             return embeddings
         except Exception as e:
             logger.exception("Failed to load embedding model: %s", str(e))
@@ -50,9 +125,15 @@ class ModelLoader:
         Load and return the Groq LLM.
         """
         try:
-            model_name = self.config["llm"]["groq"]["model_name"]
+            from langchain_groq import ChatGroq
+
+            config = self.config
+            model_name = config["llm"]["groq"]["model_name"]
             logger.info("Loading Groq LLM: %s", model_name)
-            groq_model = ChatGroq(model=model_name, api_key=self.groq_api_key)
+            # With the shared rate limiter on, the agent's calls are retried by the limiter instead
+            limiter = get_rate_limiter("groq", config.get("rate_limits", {}))
+            options = {"max_retries": 0} if limiter is not None else {}
+            groq_model = ChatGroq(model=model_name, api_key=self.groq_api_key, **options)
             logger.info("Groq LLM initialized successfully.")
             return groq_model
         except Exception as e:
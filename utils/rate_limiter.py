@@ -0,0 +1,390 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+from utils.retry import backoff_delay, is_rate_limit_error
+from custom_logging.logging import logger
+from custom_logging.metrics import RATE_LIMIT_WAIT_SECONDS, RATE_LIMITED_TOTAL
+
+INTERACTIVE, BULK = 0, 1  # lower runs first
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Priority of provider calls made by the current request or job; ingestion jobs set BULK
+priority_var = contextvars.ContextVar("rate_limit_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """
+    Run provider calls made inside the block (and in contexts copied from it) at BULK priority.
+    """
+    token = priority_var.set(BULK)
+    try:
+        yield
+    finally:
+        priority_var.reset(token)
+
+
+def retry_after_seconds(error: Exception) -> float:
+    """
+    The Retry-After delay a provider sent with an error, or 0.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def llm_usage_tokens(message) -> Optional[float]:
+    """
+    Total tokens an LLM response reports in its usage metadata, if any.
+    """
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+def _is_transient(error: Exception) -> bool:
+    return is_rate_limit_error(error) or isinstance(error, (ConnectionError, TimeoutError))
+
+
+class TokenBucket:
+    """
+    Refills at rate units per second up to capacity. Not thread-safe on its own.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until amount is available (amounts above capacity need a full bucket).
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        """
+        Remove amount (a negative amount refunds); the level may go negative when a call
+        used more than it reserved.
+        """
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class _Waiter:
+    __slots__ = ("priority", "requests", "tokens", "wake")
+
+    def __init__(self, priority: int, requests: int, tokens: float, wake: Callable[[], None]):
+        self.priority = priority
+        self.requests = requests
+        self.tokens = tokens
+        self.wake = wake
+
+
+class _Permit:
+    __slots__ = ("priority", "tokens", "started")
+
+    def __init__(self, priority: int, tokens: float):
+        self.priority = priority
+        self.tokens = tokens
+        self.started = time.perf_counter()
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide limiter for one provider, shared by every request, tool and ingestion job.
+
+    A call needs a concurrency slot, its requests (usually one) from the request bucket and its estimated
+    tokens from the token bucket. The concurrency limit adapts with AIMD: it grows by about
+    one per limit's worth of successful calls and is cut by decrease_factor when the
+    provider answers 429 or latency exceeds latency_target_seconds (at most once per typical
+    call latency). A 429 also pauses admissions for its Retry-After (at least base_delay),
+    so all callers back off together instead of each finding the quota on its own.
+    Waiting calls are served in priority order, so interactive /query traffic goes ahead of
+    ingestion, and bulk calls may hold at most bulk_share of the slots. call() and acall()
+    retry rate-limit and connection errors with jittered backoff.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 burst_seconds: float = 5.0, max_concurrency: int = 8, min_concurrency: int = 1,
+                 initial_concurrency: Optional[int] = None, latency_target_seconds: float = 0,
+                 decrease_factor: float = 0.5, bulk_share: float = 0.5, max_retries: int = 4,
+                 base_delay: float = 0.5, max_delay: float = 20.0):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute / 60 * burst_seconds) \
+            if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 60 * burst_seconds) \
+            if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.bulk_share = bulk_share
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._waiting = []  # heap of (priority, sequence, waiter)
+        self._sequence = itertools.count()
+        self._in_flight = {INTERACTIVE: 0, BULK: 0}
+        self._last_decrease = 0.0
+        self._typical_latency = 0.0  # moving average of successful calls
+        self._paused_until = 0.0
+        self._counters = {"calls": 0, "rate_limited": 0, "retries": 0, "failures": 0, "decreases": 0}
+
+    @classmethod
+    def from_config(cls, name: str, provider_config: dict) -> "AdaptiveRateLimiter":
+        return cls(
+            name,
+            requests_per_minute=provider_config.get("requests_per_minute", 0),
+            tokens_per_minute=provider_config.get("tokens_per_minute", 0),
+            burst_seconds=provider_config.get("burst_seconds", 5.0),
+            max_concurrency=provider_config.get("max_concurrency", 8),
+            min_concurrency=provider_config.get("min_concurrency", 1),
+            initial_concurrency=provider_config.get("initial_concurrency"),
+            latency_target_seconds=provider_config.get("latency_target_seconds", 0),
+            decrease_factor=provider_config.get("decrease_factor", 0.5),
+            bulk_share=provider_config.get("bulk_share", 0.5),
+            max_retries=provider_config.get("max_retries", 4),
+            base_delay=provider_config.get("retry_base_delay", 0.5),
+            max_delay=provider_config.get("retry_max_delay", 20.0),
+        )
+
+    def _try_grant_locked(self, waiter: _Waiter) -> Optional[float]:
+        """
+        Admit the waiter if it is first in line and capacity allows. Returns 0 when admitted,
+        otherwise how long to wait before trying again (None: until woken by a release).
+        """
+        if self._waiting[0][2] is not waiter:
+            return None
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return paused
+        slots = max(self.min_concurrency, int(self.limit))
+        if sum(self._in_flight.values()) >= slots:
+            return None
+        if waiter.priority == BULK and self._in_flight[BULK] >= max(1, int(slots * self.bulk_share)):
+            return None
+        wait = max(self.requests.wait_time(waiter.requests) if self.requests else 0.0,
+                   self.tokens.wait_time(waiter.tokens) if self.tokens and waiter.tokens else 0.0)
+        if wait > 0:
+            return wait
+        if self.requests:
+            self.requests.take(waiter.requests)
+        if self.tokens and waiter.tokens:
+            self.tokens.take(waiter.tokens)
+        heapq.heappop(self._waiting)
+        self._in_flight[waiter.priority] += 1
+        self._wake_head_locked()
+        return 0.0
+
+    def _wake_head_locked(self):
+        if self._waiting:
+            self._waiting[0][2].wake()
+
+    def _remove_locked(self, waiter: _Waiter):
+        self._waiting = [entry for entry in self._waiting if entry[2] is not waiter]
+        heapq.heapify(self._waiting)
+        self._wake_head_locked()
+
+    def acquire(self, tokens: float = 0, priority: Optional[int] = None, requests: int = 1) -> _Permit:
+        """
+        Block until the call may start.
+        """
+        priority = priority_var.get() if priority is None else priority
+        event = threading.Event()
+        waiter = _Waiter(priority, requests, tokens, event.set)
+        start = time.perf_counter()
+        with self._lock:
+            heapq.heappush(self._waiting, (priority, next(self._sequence), waiter))
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    wait = self._try_grant_locked(waiter)
+                if wait == 0:
+                    break
+                event.wait(min(wait or 1.0, 1.0))
+        except BaseException:
+            # An interrupted waiter left at the head of the queue would block everyone behind it
+            with self._lock:
+                self._remove_locked(waiter)
+            raise
+        RATE_LIMIT_WAIT_SECONDS.labels(self.name, _PRIORITY_NAMES[priority]).observe(time.perf_counter() - start)
+        return _Permit(priority, tokens)
+
+    async def aacquire(self, tokens: float = 0, priority: Optional[int] = None, requests: int = 1) -> _Permit:
+        """
+        Wait without blocking the event loop until the call may start.
+        """
+        priority = priority_var.get() if priority is None else priority
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = _Waiter(priority, requests, tokens, lambda: loop.call_soon_threadsafe(event.set))
+        start = time.perf_counter()
+        with self._lock:
+            heapq.heappush(self._waiting, (priority, next(self._sequence), waiter))
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    wait = self._try_grant_locked(waiter)
+                if wait == 0:
+                    break
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(wait or 1.0, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                self._remove_locked(waiter)
+            raise
+        RATE_LIMIT_WAIT_SECONDS.labels(self.name, _PRIORITY_NAMES[priority]).observe(time.perf_counter() - start)
+        return _Permit(priority, tokens)
+
+    def release(self, permit: _Permit, rate_limited: bool = False, failed: bool = False,
+                used_tokens: Optional[float] = None, retry_after: float = 0.0):
+        """
+        Return the permit's slot and adapt the concurrency limit to how the call went
+        (calls that failed for other reasons than a rate limit leave it unchanged).
+        """
+        latency = time.perf_counter() - permit.started
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight[permit.priority] -= 1
+            self._counters["calls"] += 1
+            if self.tokens and used_tokens is not None:
+                # Settle the estimate against the usage the provider reported
+                self.tokens.take(used_tokens - permit.tokens)
+            slow = self.latency_target_seconds and latency > self.latency_target_seconds
+            if rate_limited:
+                self._counters["rate_limited"] += 1
+                self._paused_until = max(self._paused_until, now + max(retry_after, self.base_delay))
+            if rate_limited or slow:
+                # One decrease per round of in-flight calls, not one per failed call
+                if now - self._last_decrease >= max(self._typical_latency, 0.05):
+                    self._last_decrease = now
+                    self._counters["decreases"] += 1
+                    self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+                    logger.info("%s rate limiter: concurrency limit lowered to %.1f (%s)", self.name, self.limit,
+                                "rate limited" if rate_limited else f"latency {latency:.2f}s")
+            elif not failed:
+                self._typical_latency += 0.2 * (latency - self._typical_latency)
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / max(self.limit, 1.0))
+            self._wake_head_locked()
+        if rate_limited:
+            RATE_LIMITED_TOTAL.labels(self.name).inc()
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if is_rate_limit_error(error):
+            delay = max(delay, self.base_delay, retry_after_seconds(error))
+        return delay
+
+    def _should_retry(self, attempt: int, error: Exception, description: str) -> Optional[float]:
+        if attempt == self.max_retries or not _is_transient(error):
+            with self._lock:
+                self._counters["failures"] += 1
+            return None
+        delay = self._retry_delay(attempt, error)
+        with self._lock:
+            self._counters["retries"] += 1
+        logger.warning("%s via %s failed (%s), retry %d/%d in %.2fs", description, self.name, str(error),
+                       attempt + 1, self.max_retries, delay)
+        return delay
+
+    def call(self, fn, *args, tokens: float = 0, requests: int = 1, usage: Optional[Callable] = None,
+             description: str = "call", **kwargs):
+        """
+        Run fn(*args, **kwargs) under the limiter, retrying rate-limit and connection errors.
+        requests is how many provider requests fn makes; usage(result), if given, returns
+        the tokens the call actually used.
+        """
+        for attempt in range(self.max_retries + 1):
+            permit = self.acquire(tokens, requests=requests)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.release(permit, rate_limited=is_rate_limit_error(e), failed=True,
+                             retry_after=retry_after_seconds(e))
+                delay = self._should_retry(attempt, e, description)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.release(permit, failed=True)
+                raise
+            self.release(permit, used_tokens=usage(result) if usage else None)
+            return result
+
+    async def acall(self, fn, *args, tokens: float = 0, requests: int = 1, usage: Optional[Callable] = None,
+                    description: str = "call", **kwargs):
+        """
+        Await fn(*args, **kwargs) under the limiter, retrying rate-limit and connection errors.
+        """
+        for attempt in range(self.max_retries + 1):
+            permit = await self.aacquire(tokens, requests=requests)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                self.release(permit, rate_limited=is_rate_limit_error(e), failed=True,
+                             retry_after=retry_after_seconds(e))
+                delay = self._should_retry(attempt, e, description)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.release(permit, failed=True)
+                raise
+            self.release(permit, used_tokens=usage(result) if usage else None)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "concurrency_limit": round(self.limit, 2),
+                    "in_flight": dict((_PRIORITY_NAMES[p], n) for p, n in self._in_flight.items()),
+                    "waiting": len(self._waiting)}
+
+
+_limiters: Dict[str, Tuple[dict, AdaptiveRateLimiter]] = {}  # provider -> (its config, limiter)
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, limits_config: dict) -> Optional[AdaptiveRateLimiter]:
+    """
+    Return the process-wide limiter for a provider, or None when rate limiting is disabled
+    or the provider has no limits configured. A changed provider config (after a hot
+    reload) replaces the limiter; calls holding the old one finish on it.
+    """
+    if not limits_config.get("enabled", False) or provider not in limits_config:
+        return None
+    provider_config = limits_config[provider]
+    with _limiters_lock:
+        current = _limiters.get(provider)
+        if current is None or current[0] != provider_config:
+            current = (dict(provider_config), AdaptiveRateLimiter.from_config(provider, provider_config))
+            _limiters[provider] = current
+        return current[1]
+
+
+def rate_limiter_stats() -> dict:
+    with _limiters_lock:
+        limiters = {provider: limiter for provider, (_, limiter) in _limiters.items()}
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
@@ -0,0 +1,46 @@
+import random
+import time
+from custom_logging.logging import logger
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    Best-effort detection of provider rate-limit / quota errors (HTTP 429 and friends).
+    """
+    for attr in ("status_code", "status", "code", "http_status"):
+        if getattr(error, attr, None) == 429:
+            return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in ("429", "rate limit", "ratelimit", "resource exhausted",
+                                                "resource_exhausted", "quota", "too many requests"))
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter: a random delay in [0, min(max_delay, base * 2**attempt)].
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def retry_with_backoff(fn, *args, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0,
+                       description: str = "call", **kwargs):
+    """
+    Call fn(*args, **kwargs), retrying failures with jittered exponential backoff.
+    Rate-limit errors wait at least base_delay before the next attempt.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            rate_limited = is_rate_limit_error(e)
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            if rate_limited:
+                delay = max(delay, base_delay)
+            logger.warning("%s failed (%s%s), retry %d/%d in %.2fs", description,
+                           "rate limited: " if rate_limited else "", str(e), attempt + 1, max_retries, delay)
+            time.sleep(delay)
@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from typing import List, Sequence, Tuple
+from langchain_core.documents import Document
+
+
+class VectorStoreBackend(ABC):
+    """
+    Storage and similarity search over chunk embeddings.
+
+    Backends store unit-length cosine embeddings together with the chunk text and metadata.
+    search() returns raw cosine similarities in [-1, 1], best first.
+    """
+
+    @abstractmethod
+    def ensure_ready(self, dimension: int):
+        """
+        Create the index (or its files) if it does not exist yet.
+        """
+
+    @abstractmethod
+    def upsert(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], documents: Sequence[Document]):
+        """
+        Insert or replace chunks by id.
+        """
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str]):
+        """
+        Remove chunks by id; unknown ids are ignored.
+        """
+
+    @abstractmethod
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Document, float]]:
+        """
+        Return the k most similar chunks with their cosine similarity.
+        """
+
+    def search_many(self, vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        Search several query vectors at once. Backends can override this with a batched query.
+        """
+        return [self.search(vector, k) for vector in vectors]
+
+    def warm_up(self):
+        """
+        Open connections or files before the first query.
+        """
+
+    def close(self):
+        """
+        Release connections or files.
+        """
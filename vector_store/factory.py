@@ -0,0 +1,55 @@
+import threading
+from vector_store.base import VectorStoreBackend
+from utils.rate_limiter import get_rate_limiter
+from custom_logging.logging import logger
+
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
+
+
+def create_vector_store(config: dict) -> VectorStoreBackend:
+    """
+    Build the vector store backend selected by vector_db.provider in config.yaml.
+    """
+    vector_db_config = config["vector_db"]
+    provider = vector_db_config.get("provider", "pinecone")
+    logger.info("Using vector store provider: %s", provider)
+
+    if provider == "pinecone":
+        from vector_store.pinecone_store import PineconeBackend
+        return PineconeBackend.from_config(vector_db_config,
+                                           limiter=get_rate_limiter("pinecone", config.get("rate_limits", {})))
+    if provider == "local":
+        from vector_store.local_store import LocalVectorStore
+        return LocalVectorStore.from_config(vector_db_config)
+    raise ValueError(f"Unknown vector_db.provider: {provider!r} (expected 'pinecone' or 'local')")
+
+
+def _store_key(config: dict) -> tuple:
+    vector_db_config = config["vector_db"]
+    return (
+        vector_db_config.get("provider", "pinecone"),
+        vector_db_config.get("index_name"),
+        vector_db_config.get("local", {}).get("path"),
+    )
+
+
+def set_vector_store(config: dict, backend: VectorStoreBackend):
+    """
+    Use the given backend wherever get_vector_store() is called with this config, e.g. an
+    in-memory fake in benchmarks.
+    """
+    with _shared_stores_lock:
+        _shared_stores[_store_key(config)] = backend
+
+
+def get_vector_store(config: dict) -> VectorStoreBackend:
+    """
+    Return the process-wide backend for the configured store, so retrieval and ingestion
+    share one connection pool (Pinecone) or one view of the index files (local).
+    """
+    key = _store_key(config)
+    with _shared_stores_lock:
+        if key not in _shared_stores:
+            _shared_stores[key] = create_vector_store(config)
+        return _shared_stores[key]
@@ -0,0 +1,140 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import closing
+from typing import List, Sequence, Tuple
+from langchain_core.documents import Document
+from custom_logging.logging import logger
+
+# Keeps tickers, form names and figures intact: "10-q", "brk.b", "3.5", "s&p" -> "s", "p"
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class KeywordIndex:
+    """
+    On-disk BM25 inverted index over chunk text, stored in SQLite and updated incrementally.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks "
+                "(chunk_id TEXT PRIMARY KEY, length INTEGER NOT NULL, text TEXT, metadata TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL, "
+                "length INTEGER NOT NULL, PRIMARY KEY (term, chunk_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_by_chunk ON postings (chunk_id)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _delete_locked(self, conn, ids):
+        conn.executemany("DELETE FROM postings WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+        conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+
+    def add(self, ids: Sequence[str], documents: Sequence[Document]):
+        """
+        Index (or re-index) chunks by id.
+        """
+        chunk_rows, posting_rows = [], []
+        for chunk_id, doc in zip(ids, documents):
+            terms = Counter(tokenize(doc.page_content))
+            length = sum(terms.values())
+            chunk_rows.append((chunk_id, length, doc.page_content, json.dumps(doc.metadata, default=str)))
+            # Chunk length is repeated on each posting so scoring never joins back to chunks
+            posting_rows.extend((term, chunk_id, tf, length) for term, tf in terms.items())
+
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            self._delete_locked(conn, list(ids))
+            conn.executemany("INSERT INTO chunks (chunk_id, length, text, metadata) VALUES (?, ?, ?, ?)", chunk_rows)
+            conn.executemany("INSERT INTO postings (term, chunk_id, tf, length) VALUES (?, ?, ?, ?)", posting_rows)
+
+    def delete(self, ids: Sequence[str]):
+        with self._write_lock, closing(self._connect()) as conn, conn:
+            self._delete_locked(conn, list(ids))
+
+    def search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        Return the k best BM25 matches for the query.
+        """
+        terms = list(set(tokenize(query)))
+        if not terms:
+            return []
+
+        with closing(self._connect()) as conn:
+            total_chunks, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            if not total_chunks:
+                return []
+            average_length = total_length / total_chunks
+
+            placeholders = ",".join("?" * len(terms))
+            document_frequency = dict(conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+            ).fetchall())
+            if not document_frequency:
+                return []
+            weighted_terms = [
+                (term, math.log(1 + (total_chunks - df + 0.5) / (df + 0.5))) for term, df in document_frequency.items()
+            ]
+
+            # Scoring runs inside SQLite so long posting lists never materialise in Python
+            values = ",".join("(?, ?)" for _ in weighted_terms)
+            best = conn.execute(
+                f"WITH query(term, idf) AS (VALUES {values}) "
+                "SELECT p.chunk_id, SUM(query.idf * p.tf * (? + 1) / (p.tf + ? * (1 - ? + ? * p.length / ?))) AS score "
+                "FROM query JOIN postings p ON p.term = query.term "
+                "GROUP BY p.chunk_id ORDER BY score DESC LIMIT ?",
+                [value for pair in weighted_terms for value in pair]
+                + [self.k1, self.k1, self.b, self.b, average_length, k],
+            ).fetchall()
+            if not best:
+                return []
+            placeholders = ",".join("?" * len(best))
+            records = {
+                chunk_id: (text, metadata) for chunk_id, text, metadata in conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({placeholders})",
+                    [chunk_id for chunk_id, _ in best],
+                )
+            }
+
+        logger.debug("Keyword search returned %d chunks for %d terms", len(best), len(terms))
+        return [
+            (Document(id=chunk_id, page_content=records[chunk_id][0], metadata=json.loads(records[chunk_id][1])), score)
+            for chunk_id, score in best
+        ]
+
+
+_shared_indexes = {}
+_shared_indexes_lock = threading.Lock()
+
+
+def get_keyword_index(config: dict):
+    """
+    Return the process-wide keyword index, or None when hybrid retrieval is disabled.
+    """
+    hybrid_config = config.get("retriever", {}).get("hybrid", {})
+    if not hybrid_config.get("enabled", False):
+        return None
+    path = hybrid_config.get("index_path", "cache/keyword_index.sqlite")
+    with _shared_indexes_lock:
+        if path not in _shared_indexes:
+            _shared_indexes[path] = KeywordIndex(path)
+        return _shared_indexes[path]
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from typing import List, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from vector_store.base import VectorStoreBackend
+from custom_logging.logging import logger
+
+
+class LocalVectorStore(VectorStoreBackend):
+    """
+    Offline vector store: a memory-mapped float32 matrix of unit-length embeddings,
+    searched with a vectorized dot product (cosine similarity) and argpartition top-k.
+
+    Files under `path`:
+        vectors.f32    row-major float32 matrix, grown by doubling its row capacity
+        chunks.sqlite  id, row, text and metadata of every chunk
+    Deleted rows are tombstoned and reused by later inserts.
+    """
+
+    def __init__(self, path: str, initial_capacity: int = 1024):
+        self.path = path
+        self.initial_capacity = initial_capacity
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._db_path = os.path.join(path, "chunks.sqlite")
+        self._lock = threading.RLock()
+        self._matrix = None
+        self._dimension = None
+        self._rows = 0  # rows in use, alive or tombstoned
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of = {}
+        self._free_rows = []
+
+        os.makedirs(path, exist_ok=True)
+        with closing(sqlite3.connect(self._db_path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks "
+                "(row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, text TEXT, metadata TEXT)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+            dimension = conn.execute("SELECT value FROM info WHERE key = 'dimension'").fetchone()
+            rows = conn.execute("SELECT row, id FROM chunks").fetchall()
+        if dimension is not None:
+            self._open(int(dimension[0]), rows)
+
+    @classmethod
+    def from_config(cls, vector_db_config: dict):
+        local_config = vector_db_config.get("local", {})
+        return cls(path=local_config.get("path", "cache/vector_store"),
+                   initial_capacity=local_config.get("initial_capacity", 1024))
+
+    def _open(self, dimension: int, rows):
+        self._dimension = dimension
+        self._row_of = {chunk_id: row for row, chunk_id in rows}
+        self._rows = max(self._row_of.values(), default=-1) + 1
+        self._alive = np.zeros(self._rows, dtype=bool)
+        self._alive[list(self._row_of.values())] = True
+        self._free_rows = [row for row in range(self._rows) if not self._alive[row]]
+        size = os.path.getsize(self._vectors_path) if os.path.exists(self._vectors_path) else 0
+        self._map(max(size // (4 * dimension), self._rows, self.initial_capacity))
+        logger.info("Opened local vector store at %s with %d chunks.", self.path, len(self._row_of))
+
+    def _map(self, capacity: int):
+        """
+        (Re)map the vector file with room for `capacity` rows.
+        """
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self._dimension * 4)
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(capacity, self._dimension))
+
+    def ensure_ready(self, dimension: int):
+        with self._lock:
+            if self._dimension is None:
+                with closing(sqlite3.connect(self._db_path)) as conn, conn:
+                    conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('dimension', ?)",
+                                 (str(dimension),))
+                self._open(dimension, [])
+            elif self._dimension != dimension:
+                raise ValueError(f"Local vector store has dimension {self._dimension}, got {dimension}.")
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def upsert(self, ids, vectors, documents):
+        if not ids:
+            return
+        vectors = self._normalize(vectors)
+        with self._lock:
+            self.ensure_ready(vectors.shape[1])
+            rows = []
+            for chunk_id in ids:
+                row = self._row_of.get(chunk_id)
+                if row is None:
+                    row = self._free_rows.pop() if self._free_rows else self._rows
+                    self._rows = max(self._rows, row + 1)
+                    self._row_of[chunk_id] = row
+                rows.append(row)
+
+            if self._rows > self._matrix.shape[0]:
+                self._map(max(self._rows, 2 * self._matrix.shape[0]))
+            if self._rows > len(self._alive):
+                self._alive = np.concatenate([self._alive, np.zeros(self._rows - len(self._alive), dtype=bool)])
+
+            self._matrix[rows] = vectors
+            self._matrix.flush()
+            self._alive[rows] = True
+            with closing(sqlite3.connect(self._db_path)) as conn, conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                    [(row, chunk_id, doc.page_content, json.dumps(doc.metadata, default=str))
+                     for row, chunk_id, doc in zip(rows, ids, documents)],
+                )
+
+    def delete(self, ids):
+        with self._lock:
+            rows = [self._row_of.pop(chunk_id) for chunk_id in ids if chunk_id in self._row_of]
+            if not rows:
+                return
+            self._alive[rows] = False
+            self._free_rows.extend(rows)
+            with closing(sqlite3.connect(self._db_path)) as conn, conn:
+                conn.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+
+    def _top_k(self, scores: np.ndarray, k: int):
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def search_many(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        with self._lock:
+            if self._dimension is None or not self._row_of:
+                return [[] for _ in vectors]
+            queries = self._normalize(vectors)
+            scores = queries @ self._matrix[:self._rows].T
+            scores[:, ~self._alive[:self._rows]] = -np.inf
+            hits = [self._top_k(row_scores, k) for row_scores in scores]
+
+            wanted = sorted({row for query_hits in hits for row, _ in query_hits})
+            with closing(sqlite3.connect(self._db_path)) as conn:
+                placeholders = ",".join("?" * len(wanted))
+                records = {
+                    row: (chunk_id, text, metadata) for row, chunk_id, text, metadata in conn.execute(
+                        f"SELECT row, id, text, metadata FROM chunks WHERE row IN ({placeholders})", wanted
+                    )
+                } if wanted else {}
+
+        results = []
+        for query_hits in hits:
+            documents = []
+            for row, score in query_hits:
+                chunk_id, text, metadata = records[row]
+                documents.append((Document(id=chunk_id, page_content=text, metadata=json.loads(metadata)), score))
+            results.append(documents)
+        return results
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Document, float]]:
+        return self.search_many([vector], k)[0]
+
+    def close(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
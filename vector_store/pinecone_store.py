@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from typing import List, Sequence, Tuple
+from langchain_core.documents import Document
+from pinecone import Pinecone, ServerlessSpec
+from vector_store.base import VectorStoreBackend
+from custom_logging.logging import logger
+
+# Metadata key holding the chunk text (the same key PineconeVectorStore uses)
+TEXT_KEY = "text"
+
+
+class PineconeBackend(VectorStoreBackend):
+    """
+    Pinecone index behind one long-lived, pooled connection.
+
+    The index handle and its urllib3 connection pool are shared by every caller. Handles
+    idle for longer than keepalive_seconds are recycled, and a failed query drops the
+    connection and retries on a fresh one. With a rate limiter, every request goes through
+    it and rate-limited requests are retried with backoff.
+    """
+
+    def __init__(self, index_name: str, pool_size: int = 10, keepalive_seconds: float = 300,
+                 max_retries: int = 1, index_factory=None, limiter=None):
+        self.index_name = index_name
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.max_retries = max_retries
+        self._index_factory = index_factory or self._connect_index
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._index = None
+        self._last_used = 0.0
+
+    @classmethod
+    def from_config(cls, vector_db_config: dict, index_factory=None, limiter=None):
+        return cls(
+            index_name=vector_db_config["index_name"],
+            pool_size=vector_db_config.get("pool_size", 10),
+            keepalive_seconds=vector_db_config.get("keepalive_seconds", 300),
+            max_retries=vector_db_config.get("max_retries", 1),
+            index_factory=index_factory,
+            limiter=limiter,
+        )
+
+    def _client(self) -> Pinecone:
+        pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        if not pinecone_api_key:
+            raise ValueError("PINECONE_API_KEY is not set in the environment.")
+        return Pinecone(api_key=pinecone_api_key, pool_threads=self.pool_size)
+
+    def _connect_index(self):
+        """
+        Open a pooled connection to the configured Pinecone index.
+        """
+        return self._client().Index(self.index_name, pool_threads=self.pool_size,
+                                    connection_pool_maxsize=self.pool_size)
+
+    def _close_locked(self):
+        if self._index is not None and hasattr(self._index, "close"):
+            try:
+                self._index.close()
+            except Exception as e:
+                logger.debug("Ignoring error while closing Pinecone index: %s", str(e))
+        self._index = None
+
+    def _get_index(self):
+        """
+        Return the shared index handle, connecting on first use or after an idle period.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now - self._last_used > self.keepalive_seconds:
+                logger.info("Recycling Pinecone connection idle for %.0fs.", now - self._last_used)
+                self._close_locked()
+            if self._index is None:
+                logger.info("Connecting to Pinecone index '%s' (pool size %d).", self.index_name, self.pool_size)
+                self._index = self._index_factory()
+            self._last_used = now
+            return self._index
+
+    def _invalidate(self, index):
+        """
+        Drop the connection after a failure, unless another thread already replaced it.
+        """
+        with self._lock:
+            if self._index is index:
+                self._close_locked()
+
+    def _call(self, operation, requests: int = 1):
+        if self.limiter is None:
+            return self._call_with_reconnect(operation)
+        return self.limiter.call(self._call_with_reconnect, operation, requests=requests,
+                                 description="Pinecone request")
+
+    def _call_with_reconnect(self, operation):
+        for attempt in range(self.max_retries + 1):
+            index = self._get_index()
+            try:
+                return operation(index)
+            except Exception as e:
+                self._invalidate(index)
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Pinecone request failed (%s), reconnecting and retrying.", str(e))
+
+    def ensure_ready(self, dimension: int):
+        client = self._client()
+        if self.index_name not in [i.name for i in client.list_indexes()]:
+            logger.info(f"Creating new Pinecone index: {self.index_name}")
+            client.create_index(
+                name=self.index_name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+            )
+        else:
+            logger.info(f"Pinecone index '{self.index_name}' already exists.")
+
+    def upsert(self, ids, vectors, documents):
+        records = [
+            {"id": chunk_id, "values": list(vector), "metadata": {**doc.metadata, TEXT_KEY: doc.page_content}}
+            for chunk_id, vector, doc in zip(ids, vectors, documents)
+        ]
+        self._call(lambda index: index.upsert(vectors=records))
+
+    def delete(self, ids):
+        ids = list(ids)
+        for start in range(0, len(ids), 1000):  # Pinecone accepts at most 1000 ids per delete
+            batch = ids[start:start + 1000]
+            self._call(lambda index: index.delete(ids=batch))
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[Document, float]]:
+        response = self._call(lambda index: index.query(vector=list(vector), top_k=k, include_metadata=True))
+        return self._matches(response)
+
+    def search_many(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        Send all queries at once over the index's connection pool instead of one after another.
+        """
+        def query_all(index):
+            pending = [index.query(vector=list(vector), top_k=k, include_metadata=True, async_req=True)
+                       for vector in vectors]
+            return [result.get() for result in pending]
+
+        if len(vectors) == 0:
+            return []
+        return [self._matches(response) for response in self._call(query_all, requests=len(vectors))]
+
+    @staticmethod
+    def _matches(response) -> List[Tuple[Document, float]]:
+        results = []
+        for match in response["matches"]:
+            metadata = dict(match.get("metadata") or {})
+            text = metadata.pop(TEXT_KEY, "")
+            results.append((Document(id=match["id"], page_content=text, metadata=metadata), match["score"]))
+        return results
+
+    def warm_up(self):
+        self._get_index()
+
+    def close(self):
+        with self._lock:
+            self._close_locked()